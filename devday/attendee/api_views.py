@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from attendee.checkin import check_in_attendees
+from attendee.roster import get_roster_bundle
+from event.models import Event
+
+
+class CheckInScanSerializer(serializers.Serializer):
+    code = serializers.CharField(required=False, max_length=100)
+    id = serializers.IntegerField(required=False)
+    verification = serializers.CharField(required=False, max_length=100)
+    scanned_at = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if "code" not in attrs and not ("id" in attrs and "verification" in attrs):
+            raise serializers.ValidationError(
+                _(
+                    "A check in code or email address or an attendee id with its"
+                    " verification is required."
+                )
+            )
+        return attrs
+
+
+class CheckInBatchSerializer(serializers.Serializer):
+    scans = CheckInScanSerializer(many=True)
+
+    def validate_scans(self, value):
+        if len(value) > settings.ATTENDEE_CHECKIN_BATCH_MAX_SCANS:
+            raise serializers.ValidationError(
+                _("At most {} scans can be checked in at once.").format(
+                    settings.ATTENDEE_CHECKIN_BATCH_MAX_SCANS
+                )
+            )
+        return value
+
+
+class CheckInViewSet(viewsets.GenericViewSet):
+    """
+    Check-in of the attendees of an event for staff users and the door
+    tablets. A scan is either the check in code or the email address of an
+    attendee or the attendee id and verification from the QR code. The batch
+    action accepts scans that have been queued offline with their scan time.
+    Every scan is answered with the status of the check-in, the attendee and
+    their confirmed session reservations.
+
+    The roster action returns the signed roster of the event for offline
+    check-in, only the changes since the roster version given in the base
+    query parameter if possible.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = CheckInScanSerializer
+
+    def get_serializer_class(self):
+        if self.action == "batch":
+            return CheckInBatchSerializer
+        return super().get_serializer_class()
+
+    def get_event(self):
+        return get_object_or_404(Event, slug=self.kwargs["event"])
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        (result,) = check_in_attendees(self.get_event(), [serializer.validated_data])
+        return Response(result)
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = check_in_attendees(
+            self.get_event(), serializer.validated_data["scans"]
+        )
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"])
+    def roster(self, request, *args, **kwargs):
+        response = HttpResponse(
+            get_roster_bundle(self.get_event(), request.query_params.get("base")),
+            content_type="application/octet-stream",
+        )
+        patch_cache_control(response, private=True, no_store=True)
+        return response
@@ -0,0 +1,217 @@
+"""
+Check-in of attendees and its statistics.
+
+Scans of QR codes, check-in codes and email addresses are resolved and
+checked in by a single UPDATE ... WHERE checked_in IS NULL RETURNING
+statement, so concurrent scans at several doors cannot check in an attendee
+twice and a batch of queued offline scans costs one round-trip.
+
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from attendee.models import Attendee, DevDayUser
+from devday.utils import caching
+from talk.models import SessionReservation, Talk
+
+CHECKIN_OK = "OK"
+CHECKIN_ALREADY = "already"
+CHECKIN_INVALID = "invalid"
+CHECKIN_NOT_FOUND = "notfound"
+CHECKIN_WRONG_EVENT = "wrongevent"
+
+# Resolve the scans to attendees, check in the attendees of the event that are
+# not checked in yet at the time of their earliest scan and return the match
+# of every scan. Codes and attendee ids are unique across events, so scans for
+# other events can be told apart from unknown ones.
+CHECK_IN_SQL = """
+WITH scans AS (
+    SELECT *
+    FROM unnest(
+        %(ids)s::integer[],
+        %(codes)s::text[],
+        %(emails)s::text[],
+        %(times)s::timestamp with time zone[]
+    ) WITH ORDINALITY AS scan (attendee_id, code, email, scanned_at, position)
+), matches AS (
+    SELECT scan.position, scan.scanned_at, attendee.id, attendee.event_id,
+        attendee.user_id, attendee.checked_in
+    FROM scans scan JOIN {attendee} attendee ON attendee.id = scan.attendee_id
+    UNION ALL
+    SELECT scan.position, scan.scanned_at, attendee.id, attendee.event_id,
+        attendee.user_id, attendee.checked_in
+    FROM scans scan JOIN {attendee} attendee ON attendee.checkin_code = scan.code
+    UNION ALL
+    SELECT scan.position, scan.scanned_at, attendee.id, attendee.event_id,
+        attendee.user_id, attendee.checked_in
+    FROM scans scan
+    JOIN {user} u ON UPPER(u.email::text) = UPPER(scan.email)
+    JOIN {attendee} attendee
+        ON attendee.user_id = u.id AND attendee.event_id = %(event)s
+), updated AS (
+    UPDATE {attendee} attendee SET checked_in = earliest.scanned_at
+    FROM (
+        SELECT id, MIN(scanned_at) AS scanned_at
+        FROM matches
+        WHERE event_id = %(event)s AND checked_in IS NULL
+        GROUP BY id
+    ) earliest
+    WHERE attendee.id = earliest.id AND attendee.checked_in IS NULL
+    RETURNING attendee.id, attendee.checked_in
+)
+SELECT match.position, match.id, match.event_id, u.email,
+    COALESCE(match.checked_in, updated.checked_in),
+    match.checked_in IS NULL AND updated.checked_in = match.scanned_at
+FROM matches match
+JOIN {user} u ON u.id = match.user_id
+LEFT JOIN updated ON updated.id = match.id
+"""
+
+
+def checkin_cache_namespace(event_id):
+    return "attendee:checkin:{}".format(event_id)
+
+
+def get_checkin_statistics(event):
+    """
+    Count the registered and checked in attendees of the given event and the
+    confirmed and checked in reservations of its sessions with limited spots.
+
+    The per session counts are computed by one grouped query. The sessions are
+    returned as limited_sessions with attendees_registered and
+    attendees_checked_in attributes.
+    """
+    totals = Attendee.objects.filter(event=event).aggregate(
+        attendees_registered=Count("id"),
+        attendees_checked_in=Count("id", filter=Q(checked_in__isnull=False)),
+    )
+    confirmed = Q(sessionreservation__is_confirmed=True)
+    limited_sessions = list(
+        Talk.objects.filter(event=event, spots__gt=0).annotate(
+            attendees_registered=Count("sessionreservation", filter=confirmed),
+            attendees_checked_in=Count(
+                "sessionreservation",
+                filter=confirmed
+                & Q(sessionreservation__attendee__checked_in__isnull=False),
+            ),
+        )
+    )
+    return dict(totals, limited_sessions=limited_sessions)
+
+
+def get_checkin_statistics_snapshot(event):
+    """
+    Return the check-in statistics of the given event. The statistics are
+    shared for ATTENDEE_CHECKIN_SUMMARY_CACHE_TIMEOUT seconds to keep the load
+    low when many clients poll them at the same time.
+    """
+    return caching.get_or_build(
+        checkin_cache_namespace(event.id),
+        lambda: get_checkin_statistics(event),
+        settings.ATTENDEE_CHECKIN_SUMMARY_CACHE_TIMEOUT,
+        name="statistics",
+    )
+
+
+def get_confirmed_reservations(attendee_ids):
+    """
+    Return the titles and the formats of the sessions with confirmed
+    reservations of the given attendees in one query as a dictionary of lists
+    keyed by attendee id.
+    """
+    reservations = {attendee_id: [] for attendee_id in attendee_ids}
+    rows = (
+        SessionReservation.objects.filter(
+            attendee_id__in=attendee_ids, is_confirmed=True
+        )
+        .order_by("id", "talk__talkformat__duration", "talk__talkformat__name")
+        .values_list("id", "attendee_id", "talk__title", "talk__talkformat__name")
+    )
+    reservation_ids = set()
+    for reservation_id, attendee_id, title, format_name in rows:
+        # only the first format of each session is listed
+        if reservation_id not in reservation_ids:
+            reservation_ids.add(reservation_id)
+            reservations[attendee_id].append({"format": format_name, "title": title})
+    return reservations
+
+
+def check_in_attendees(event, scans):
+    """
+    Check in the attendees of the given event for the given scans and return
+    a result for every scan in the same order.
+
+    A scan is a dictionary with either a code, which is a check-in code or an
+    email address, or an attendee id and the verification of a QR code. The
+    optional scanned_at time of queued offline scans is used as check-in time.
+    An attendee scanned several times is checked in at the earliest scan.
+
+    The results are dictionaries with the status of the check-in, the id and
+    the email address of the attendee, their check-in time and the sessions
+    they have confirmed reservations for.
+    """
+    now = timezone.now()
+    results = []
+    params = {"ids": [], "codes": [], "emails": [], "times": [], "event": event.id}
+    for scan in scans:
+        attendee_id = code = email = None
+        code_or_email = scan.get("code", "").strip()
+        if "id" in scan:
+            if Attendee.objects.is_verification_valid(
+                scan["id"], scan.get("verification")
+            ):
+                attendee_id = int(scan["id"])
+        elif "@" in code_or_email:
+            email = code_or_email
+        elif code_or_email:
+            code = code_or_email
+        if attendee_id or code or email:
+            status = CHECKIN_NOT_FOUND
+        else:
+            status = CHECKIN_INVALID
+        results.append(
+            {
+                "status": status,
+                "attendee": None,
+                "email": None,
+                "checked_in": None,
+                "reservations": [],
+            }
+        )
+        params["ids"].append(attendee_id)
+        params["codes"].append(code)
+        params["emails"].append(email)
+        params["times"].append(scan.get("scanned_at") or now)
+    if not results:
+        return results
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            CHECK_IN_SQL.format(
+                attendee=Attendee._meta.db_table, user=DevDayUser._meta.db_table
+            ),
+            params,
+        )
+        rows = cursor.fetchall()
+
+    attendee_ids = set()
+    for position, attendee_id, event_id, email, checked_in, checked_in_now in rows:
+        result = results[position - 1]
+        if event_id != event.id:
+            result["status"] = CHECKIN_WRONG_EVENT
+            continue
+        result.update(
+            status=CHECKIN_OK if checked_in_now else CHECKIN_ALREADY,
+            attendee=attendee_id,
+            email=email,
+            checked_in=checked_in,
+        )
+        attendee_ids.add(attendee_id)
+    if attendee_ids:
+        reservations = get_confirmed_reservations(attendee_ids)
+        for result in results:
+            if result["attendee"] in attendee_ids:
+                result["reservations"] = reservations[result["attendee"]]
+    return results
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendee', '0013_devdayuser_favourite_talks'),
+    ]
+
+    operations = [
+        # Django 2.2 cannot declare expression indexes, the index supports
+        # the case-insensitive email lookups of the check-in
+        migrations.RunSQL(
+            'CREATE INDEX attendee_devdayuser_email_upper_idx'
+            ' ON attendee_devdayuser (UPPER(email::text))',
+            'DROP INDEX attendee_devdayuser_email_upper_idx',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0009_event_content_version'),
+        ('attendee', '0014_devdayuser_email_upper_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RosterSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('version', models.CharField(max_length=40, verbose_name='Version')),
+                ('entries', models.TextField(verbose_name='Entries')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='event.Event', verbose_name='Event')),
+            ],
+            options={
+                'verbose_name': 'Roster snapshot',
+                'verbose_name_plural': 'Roster snapshots',
+                'unique_together': {('event', 'version')},
+            },
+        ),
+    ]
@@ -7,8 +7,8 @@ import luhn
 from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
-from django.core.mail import send_mail
-from django.db import IntegrityError, models
+from django.core.mail import EmailMultiAlternatives
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q
 from django.urls import reverse
 from django.utils import timezone
@@ -16,6 +16,7 @@ from django.utils.translation import pgettext_lazy
 from django.utils.translation import ugettext_lazy as _
 from model_utils.models import TimeStampedModel
 
+from devday.utils.mail_queue import queue_mail
 from event.models import Event
 
 
@@ -98,11 +99,14 @@ class DevDayUser(AbstractBaseUser, PermissionsMixin):
         """
         return self.email
 
-    def email_user(self, subject, message, from_email=None, **kwargs):
+    def email_user(self, subject, message, from_email=None, html_message=None):
         """
-        Sends an email to this User.
+        Sends an email to this User via the mail queue.
         """
-        send_mail(subject, message, from_email, [self.email], **kwargs)
+        mail = EmailMultiAlternatives(subject, message, from_email, [self.email])
+        if html_message:
+            mail.attach_alternative(html_message, "text/html")
+        queue_mail(mail)
 
     def get_attendee(self, event):
         """
@@ -115,16 +119,78 @@ class DevDayUser(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+def generate_checkin_code():
+    """
+    Return a random check-in code of seven digits and a Luhn check digit.
+    """
+    return luhn.append(str(SystemRandom().randrange(1000000, 9999999)))
+
+
 class AttendeeManager(models.Manager):
     def get_by_checkin_code_or_email(self, key, event):
         """
         Returns the attendee with the given checkin code or email address. It
         is the responsibility of the caller to verify that the attendee matches
         the desired event, and that the attendee is not checked in already.
+
+        Check-in codes never contain an @, so only one of the indexed columns
+        is searched. Email addresses are compared case-insensitively.
         """
-        return self.filter(
-            Q(checkin_code=key) | Q(user__email=key), event=event
-        ).first()
+        if "@" in key:
+            lookup = Q(user__email__iexact=key)
+        else:
+            lookup = Q(checkin_code=key)
+        return self.filter(lookup, event=event).first()
+
+    def assign_checkin_codes(self, attendees):
+        """
+        Fill in unique check-in codes for the given attendees that do not have
+        one yet. Candidates are drawn in blocks and checked against the
+        existing codes with one query per block.
+        """
+        missing = [attendee for attendee in attendees if not attendee.checkin_code]
+        taken = {attendee.checkin_code for attendee in attendees}
+        while missing:
+            candidates = {generate_checkin_code() for _ in missing} - taken
+            candidates -= set(
+                self.filter(checkin_code__in=candidates).values_list(
+                    "checkin_code", flat=True
+                )
+            )
+            for attendee, code in zip(missing, candidates):
+                attendee.checkin_code = code
+            taken |= candidates
+            missing = missing[len(candidates) :]
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create the given attendees like QuerySet.bulk_create after assigning
+        their missing check-in codes.
+
+        A concurrent registration may take one of the assigned codes before
+        the attendees are inserted. The unique constraint of the column
+        detects this, in which case only the colliding codes are drawn again
+        and the insert is retried.
+        """
+        objs = list(objs)
+        generated = [obj for obj in objs if not obj.checkin_code]
+        attempts = settings.ATTENDEE_CHECKIN_CODE_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            self.assign_checkin_codes(objs)
+            try:
+                with transaction.atomic(using=self.db):
+                    return super().bulk_create(objs, *args, **kwargs)
+            except IntegrityError:
+                collisions = set(
+                    self.filter(
+                        checkin_code__in=[obj.checkin_code for obj in generated]
+                    ).values_list("checkin_code", flat=True)
+                )
+                if not collisions or attempt == attempts:
+                    raise
+                for obj in generated:
+                    if obj.checkin_code in collisions:
+                        obj.checkin_code = None
 
     def is_verification_valid(self, id, verification):
         return self.get_verification(id) == verification
@@ -181,14 +247,26 @@ class Attendee(models.Model):
     def save(self, *args, **kwargs):
         """
         Ensure that the checkin code is filled in correctly.
+
+        A random code is inserted right away and the unique constraint of the
+        column detects the rare collisions, in which case another code is
+        tried.
         """
-        if not self.checkin_code:
-            u = False
-            while not u:
-                r = str(SystemRandom().randrange(1000000, 9999999))
-                self.checkin_code = luhn.append(r)
-                u = Attendee.objects.filter(checkin_code=self.checkin_code).count() == 0
-        return super().save(*args, **kwargs)
+        if self.checkin_code:
+            return super().save(*args, **kwargs)
+        attempts = settings.ATTENDEE_CHECKIN_CODE_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            self.checkin_code = generate_checkin_code()
+            try:
+                with transaction.atomic(using=kwargs.get("using")):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                collision = Attendee.objects.filter(
+                    checkin_code=self.checkin_code
+                ).exists()
+                self.checkin_code = None
+                if not collision or attempt == attempts:
+                    raise
 
     def get_verification(self):
         return Attendee.objects.get_verification(self.id)
@@ -290,3 +368,20 @@ class AttendeeEventFeedback(TimeStampedModel):
             self.session_score,
             self.comment,
         )
+
+
+class RosterSnapshot(TimeStampedModel):
+    """
+    Entries of a check-in roster version of an event, the base of the delta
+    downloads of the door devices. Snapshots that have not been requested for
+    ATTENDEE_CHECKIN_ROSTER_SNAPSHOT_MAX_AGE seconds are pruned.
+    """
+
+    event = models.ForeignKey(Event, verbose_name=_("Event"), on_delete=models.CASCADE)
+    version = models.CharField(verbose_name=_("Version"), max_length=40)
+    entries = models.TextField(verbose_name=_("Entries"))
+
+    class Meta:
+        verbose_name = _("Roster snapshot")
+        verbose_name_plural = _("Roster snapshots")
+        unique_together = [("event", "version")]
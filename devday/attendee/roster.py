@@ -0,0 +1,175 @@
+"""
+Signed check-in rosters for offline door devices.
+
+A roster contains the id, the QR code verification and the check-in code of
+every attendee of an event together with their confirmed reservations, so a
+door device can check attendees in while the network is unavailable and sync
+the queued scans later.
+
+The roster is exported as a bundle of a HMAC-SHA256 signature followed by the
+zlib compressed JSON payload. The signature covers the compressed payload and
+is made with ATTENDEE_CHECKIN_ROSTER_KEY, which the door devices share with
+the web application. load_roster_bundle is the reference implementation of
+the verification.
+
+Every roster has a version derived from its content. Snapshots are stored in
+the database by version, so a device that sends the version it has receives
+only the changed and removed attendees since that version, whichever process
+answers its request. If the snapshot of its version has been pruned it
+receives the complete roster.
+
+"""
+import hmac
+import json
+import zlib
+from datetime import timedelta
+from hashlib import sha1, sha256
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from attendee.checkin import get_confirmed_reservations
+from attendee.models import Attendee, RosterSnapshot
+
+ROSTER_SIGNATURE_LENGTH = sha256().digest_size
+
+
+class InvalidRosterBundle(Exception):
+    pass
+
+
+def build_roster(event):
+    """
+    Return the roster entries of the given event keyed by attendee id.
+    """
+    attendees = list(
+        Attendee.objects.filter(event=event)
+        .order_by("id")
+        .values_list("id", "checkin_code")
+    )
+    reservations = get_confirmed_reservations(
+        [attendee_id for attendee_id, _ in attendees]
+    )
+    return {
+        attendee_id: {
+            "id": attendee_id,
+            "verification": Attendee.objects.get_verification(attendee_id),
+            "code": checkin_code,
+            "reservations": reservations[attendee_id],
+        }
+        for attendee_id, checkin_code in attendees
+    }
+
+
+def get_roster_version(roster):
+    return sha1(
+        json.dumps(sorted(roster.items()), separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def save_roster_snapshot(event, version, roster):
+    """
+    Store the given roster version of the given event as snapshot or mark its
+    existing snapshot as requested. Snapshots that have not been requested for
+    ATTENDEE_CHECKIN_ROSTER_SNAPSHOT_MAX_AGE seconds are pruned.
+    """
+    now = timezone.now()
+    if RosterSnapshot.objects.filter(event=event, version=version).update(
+        modified=now
+    ):
+        return
+    RosterSnapshot.objects.filter(
+        modified__lt=now
+        - timedelta(seconds=settings.ATTENDEE_CHECKIN_ROSTER_SNAPSHOT_MAX_AGE)
+    ).delete()
+    RosterSnapshot.objects.get_or_create(
+        event=event,
+        version=version,
+        defaults={
+            "entries": json.dumps(list(roster.values()), separators=(",", ":"))
+        },
+    )
+
+
+def load_roster_snapshot(event, version):
+    """
+    Return the entries of the snapshot of the given roster version of the
+    given event keyed by attendee id or None if there is no such snapshot.
+    """
+    entries = (
+        RosterSnapshot.objects.filter(event=event, version=version)
+        .values_list("entries", flat=True)
+        .first()
+    )
+    if entries is None:
+        return None
+    return {entry["id"]: entry for entry in json.loads(entries)}
+
+
+def get_roster(event):
+    """
+    Return the version and the entries of the current roster of the given
+    event. The roster is kept as a snapshot for later delta downloads.
+    """
+    roster = build_roster(event)
+    version = get_roster_version(roster)
+    save_roster_snapshot(event, version, roster)
+    return version, roster
+
+
+def get_roster_key():
+    if not settings.ATTENDEE_CHECKIN_ROSTER_KEY:
+        raise ImproperlyConfigured("ATTENDEE_CHECKIN_ROSTER_KEY is not set")
+    return settings.ATTENDEE_CHECKIN_ROSTER_KEY.encode("utf-8")
+
+
+def get_roster_payload(event, base=None):
+    """
+    Return the roster of the given event. If the snapshot of the base version
+    is available only the attendees that have been added or changed since and
+    the ids of the removed attendees are included.
+    """
+    version, roster = get_roster(event)
+    base_roster = None
+    if base:
+        base_roster = load_roster_snapshot(event, base)
+    if base_roster is None:
+        base, attendees, removed = None, list(roster.values()), []
+    else:
+        attendees = [
+            entry
+            for attendee_id, entry in roster.items()
+            if base_roster.get(attendee_id) != entry
+        ]
+        removed = sorted(set(base_roster) - set(roster))
+    return {
+        "event": event.slug,
+        "version": version,
+        "base": base,
+        "attendees": attendees,
+        "removed": removed,
+    }
+
+
+def get_roster_bundle(event, base=None):
+    """
+    Return the signed bundle of the roster of the given event as bytes.
+    """
+    payload = json.dumps(get_roster_payload(event, base), separators=(",", ":"))
+    payload = zlib.compress(payload.encode("utf-8"), 9)
+    return hmac.new(get_roster_key(), payload, sha256).digest() + payload
+
+
+def load_roster_bundle(bundle, key=None):
+    """
+    Verify the signature of the given roster bundle and return its payload.
+    Raise InvalidRosterBundle if the signature does not match.
+    """
+    if key is None:
+        key = get_roster_key()
+    signature = bundle[:ROSTER_SIGNATURE_LENGTH]
+    payload = bundle[ROSTER_SIGNATURE_LENGTH:]
+    if not hmac.compare_digest(signature, hmac.new(key, payload, sha256).digest()):
+        raise InvalidRosterBundle("invalid signature")
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
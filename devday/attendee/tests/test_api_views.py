@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from attendee.models import Attendee
+from attendee.roster import load_roster_bundle
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+
+
+class CheckInViewSetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = event_testutils.create_test_event()
+        cls.staff, cls.staff_password = attendee_testutils.create_test_user(
+            "staff@example.org", is_staff=True
+        )
+        cls.user, cls.password = attendee_testutils.create_test_user(
+            "test@example.org"
+        )
+        cls.attendee = Attendee.objects.create(user=cls.user, event=cls.event)
+        cls.url = "/api/events/{}/checkin/".format(cls.event.slug)
+        cls.batch_url = cls.url + "batch/"
+
+    def login(self):
+        self.client.login(username=self.staff.email, password=self.staff_password)
+
+    def test_requires_staff_user(self):
+        response = self.client.post(self.url, {"code": self.attendee.checkin_code})
+        self.assertIn(response.status_code, (401, 403))
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.client.post(self.url, {"code": self.attendee.checkin_code})
+        self.assertEqual(response.status_code, 403)
+
+    def test_check_in(self):
+        self.login()
+        response = self.client.post(self.url, {"code": self.attendee.checkin_code})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "OK")
+        self.assertEqual(data["attendee"], self.attendee.id)
+        self.assertEqual(data["email"], "test@example.org")
+        self.assertEqual(data["reservations"], [])
+        self.attendee.refresh_from_db()
+        self.assertIsNotNone(self.attendee.checked_in)
+        response = self.client.post(
+            self.url,
+            {"id": self.attendee.id, "verification": self.attendee.get_verification()},
+        )
+        self.assertEqual(response.json()["status"], "already")
+
+    def test_check_in_invalid_scan(self):
+        self.login()
+        response = self.client.post(self.url, {"verification": "something"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_in_unknown_event(self):
+        self.login()
+        response = self.client.post(
+            "/api/events/unknown/checkin/", {"code": self.attendee.checkin_code}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch(self):
+        self.login()
+        response = self.client.post(
+            self.batch_url,
+            {
+                "scans": [
+                    {
+                        "code": self.attendee.checkin_code,
+                        "scanned_at": "2026-10-18T09:15:00+02:00",
+                    },
+                    {"code": "unknown"},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["status"] for result in results], ["OK", "notfound"])
+        self.attendee.refresh_from_db()
+        self.assertEqual(
+            self.attendee.checked_in, datetime(2026, 10, 18, 7, 15, tzinfo=timezone.utc)
+        )
+
+    @override_settings(ATTENDEE_CHECKIN_BATCH_MAX_SCANS=1)
+    def test_batch_too_large(self):
+        self.login()
+        response = self.client.post(
+            self.batch_url,
+            {"scans": [{"code": "1"}, {"code": "2"}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("scans", response.json())
+
+    @override_settings(ATTENDEE_CHECKIN_ROSTER_KEY="roster key")
+    def test_roster(self):
+        response = self.client.get(self.url + "roster/")
+        self.assertIn(response.status_code, (401, 403))
+        self.login()
+        response = self.client.get(self.url + "roster/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        payload = load_roster_bundle(response.content)
+        self.assertEqual(
+            [entry["id"] for entry in payload["attendees"]], [self.attendee.id]
+        )
+        response = self.client.get(self.url + "roster/", {"base": payload["version"]})
+        self.assertEqual(load_roster_bundle(response.content)["attendees"], [])
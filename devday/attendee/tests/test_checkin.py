@@ -0,0 +1,225 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from attendee.checkin import (
+    CHECKIN_ALREADY,
+    CHECKIN_INVALID,
+    CHECKIN_NOT_FOUND,
+    CHECKIN_OK,
+    CHECKIN_WRONG_EVENT,
+    check_in_attendees,
+    get_checkin_statistics,
+    get_checkin_statistics_snapshot,
+    get_confirmed_reservations,
+)
+from attendee.models import Attendee
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.models import SessionReservation, TalkFormat
+from talk.tests import talk_testutils
+
+
+class CheckInStatisticsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = event_testutils.create_test_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        talk_testutils.create_test_talk(speaker, self.event, "Unlimited")
+        self.limited = talk_testutils.create_test_talk(
+            speaker, self.event, "Limited", spots=10
+        )
+        self.empty = talk_testutils.create_test_talk(
+            speaker, self.event, "No reservations", spots=5
+        )
+        self.attendees = []
+        for i in range(4):
+            user, _ = attendee_testutils.create_test_user(
+                "test{}@example.org".format(i)
+            )
+            self.attendees.append(Attendee.objects.create(user=user, event=self.event))
+        for attendee, confirmed in zip(self.attendees, (True, True, True, False)):
+            SessionReservation.objects.create(
+                attendee=attendee, talk=self.limited, is_confirmed=confirmed
+            )
+        for attendee in self.attendees[1:]:
+            attendee.check_in()
+            attendee.save()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_get_checkin_statistics(self):
+        with self.assertNumQueries(2):
+            statistics = get_checkin_statistics(self.event)
+        self.assertEqual(statistics["attendees_registered"], 4)
+        self.assertEqual(statistics["attendees_checked_in"], 3)
+        self.assertEqual(statistics["limited_sessions"], [self.limited, self.empty])
+        limited, empty = statistics["limited_sessions"]
+        self.assertEqual(limited.attendees_registered, 3)
+        self.assertEqual(limited.attendees_checked_in, 2)
+        self.assertEqual(empty.attendees_registered, 0)
+        self.assertEqual(empty.attendees_checked_in, 0)
+
+    def test_get_checkin_statistics_other_event(self):
+        other_event = event_testutils.create_test_event("Other event")
+        statistics = get_checkin_statistics(other_event)
+        self.assertEqual(
+            statistics,
+            {
+                "attendees_registered": 0,
+                "attendees_checked_in": 0,
+                "limited_sessions": [],
+            },
+        )
+
+    @mock.patch("devday.utils.caching.cache_enabled", return_value=True)
+    def test_get_checkin_statistics_snapshot(self, _):
+        statistics = get_checkin_statistics_snapshot(self.event)
+        self.attendees[0].check_in()
+        self.attendees[0].save()
+        with self.assertNumQueries(0):
+            snapshot = get_checkin_statistics_snapshot(self.event)
+        self.assertEqual(
+            snapshot["attendees_checked_in"], statistics["attendees_checked_in"]
+        )
+
+
+class CheckInAttendeesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = event_testutils.create_test_event()
+        cls.other_event = event_testutils.create_test_event("Other event")
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        cls.workshop = talk_testutils.create_test_talk(
+            speaker, cls.event, "Workshop", spots=10
+        )
+        cls.workshop.talkformat.set(
+            [
+                TalkFormat.objects.create(name="Workshop", duration=120),
+                TalkFormat.objects.create(name="Short Workshop", duration=60),
+            ]
+        )
+        user, _ = attendee_testutils.create_test_user("Test@Example.org")
+        cls.attendee = Attendee.objects.create(user=user, event=cls.event)
+        SessionReservation.objects.create(
+            attendee=cls.attendee, talk=cls.workshop, is_confirmed=True
+        )
+        user, _ = attendee_testutils.create_test_user("other@example.org")
+        cls.other_attendee = Attendee.objects.create(user=user, event=cls.event)
+        cls.wrong_event_attendee = Attendee.objects.create(
+            user=user, event=cls.other_event
+        )
+
+    def test_check_in_by_code(self):
+        with self.assertNumQueries(2):
+            (result,) = check_in_attendees(
+                self.event, [{"code": self.attendee.checkin_code}]
+            )
+        self.attendee.refresh_from_db()
+        self.assertEqual(result["status"], CHECKIN_OK)
+        self.assertEqual(result["attendee"], self.attendee.id)
+        self.assertEqual(result["email"], "Test@example.org")
+        self.assertEqual(result["checked_in"], self.attendee.checked_in)
+        self.assertEqual(
+            result["reservations"], [{"format": "Short Workshop", "title": "Workshop"}]
+        )
+
+    def test_check_in_by_email_ignores_case(self):
+        (result,) = check_in_attendees(self.event, [{"code": "test@example.ORG"}])
+        self.assertEqual(result["status"], CHECKIN_OK)
+        self.assertEqual(result["attendee"], self.attendee.id)
+
+    def test_check_in_by_verification(self):
+        scan = {"id": self.attendee.id, "verification": "wrong"}
+        (result,) = check_in_attendees(self.event, [scan])
+        self.assertEqual(result["status"], CHECKIN_INVALID)
+        scan["verification"] = self.attendee.get_verification()
+        with self.assertNumQueries(2):
+            (result,) = check_in_attendees(self.event, [scan])
+        self.assertEqual(result["status"], CHECKIN_OK)
+
+    def test_check_in_already_checked_in(self):
+        checked_in = timezone.now() - timedelta(hours=1)
+        Attendee.objects.filter(id=self.attendee.id).update(checked_in=checked_in)
+        with self.assertNumQueries(2):
+            (result,) = check_in_attendees(
+                self.event, [{"code": self.attendee.checkin_code}]
+            )
+        self.assertEqual(result["status"], CHECKIN_ALREADY)
+        self.assertEqual(result["checked_in"], checked_in)
+        self.assertEqual(len(result["reservations"]), 1)
+
+    def test_check_in_unknown_and_wrong_event(self):
+        with self.assertNumQueries(1):
+            results = check_in_attendees(
+                self.event,
+                [
+                    {"code": "unknown"},
+                    {"code": "unknown@example.org"},
+                    {"code": self.wrong_event_attendee.checkin_code},
+                    {"code": "   "},
+                ],
+            )
+        self.assertEqual(
+            [result["status"] for result in results],
+            [
+                CHECKIN_NOT_FOUND,
+                CHECKIN_NOT_FOUND,
+                CHECKIN_WRONG_EVENT,
+                CHECKIN_INVALID,
+            ],
+        )
+        self.assertIsNone(results[2]["attendee"])
+        self.wrong_event_attendee.refresh_from_db()
+        self.assertIsNone(self.wrong_event_attendee.checked_in)
+
+    def test_check_in_batch(self):
+        now = timezone.now()
+        scans = [
+            {"code": self.attendee.checkin_code, "scanned_at": now},
+            {"code": self.other_attendee.checkin_code, "scanned_at": now},
+            {
+                "code": self.attendee.user.email,
+                "scanned_at": now - timedelta(minutes=5),
+            },
+        ]
+        with self.assertNumQueries(2):
+            results = check_in_attendees(self.event, scans)
+        # the attendee is checked in at the earliest of the queued scans
+        self.assertEqual(
+            [result["status"] for result in results],
+            [CHECKIN_ALREADY, CHECKIN_OK, CHECKIN_OK],
+        )
+        self.attendee.refresh_from_db()
+        self.assertEqual(self.attendee.checked_in, now - timedelta(minutes=5))
+        self.assertEqual(results[0]["checked_in"], self.attendee.checked_in)
+        self.assertEqual(results[1]["reservations"], [])
+        results = check_in_attendees(self.event, scans)
+        self.assertEqual(
+            [result["status"] for result in results], [CHECKIN_ALREADY] * 3
+        )
+
+    def test_check_in_without_scans(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(check_in_attendees(self.event, []), [])
+
+    def test_get_confirmed_reservations(self):
+        SessionReservation.objects.create(
+            attendee=self.other_attendee, talk=self.workshop, is_confirmed=False
+        )
+        with self.assertNumQueries(1):
+            reservations = get_confirmed_reservations(
+                [self.attendee.id, self.other_attendee.id]
+            )
+        self.assertEqual(
+            reservations,
+            {
+                self.attendee.id: [{"format": "Short Workshop", "title": "Workshop"}],
+                self.other_attendee.id: [],
+            },
+        )
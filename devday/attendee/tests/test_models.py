@@ -1,12 +1,13 @@
 from base64 import urlsafe_b64decode, urlsafe_b64encode
 from hashlib import sha1
+from unittest import mock
 
 import luhn
 
 from django.conf import settings
 from django.core import mail
 from django.db import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.translation import ugettext as _
 
 from attendee.models import Attendee, AttendeeEventFeedback, BadgeData, DevDayUser
@@ -145,6 +146,35 @@ class AttendeeTest(TestCase):
         with self.assertRaises(IntegrityError):
             attendee.check_in()
 
+    def test_checkin_code_collision(self):
+        first = Attendee.objects.create(user=self.user, event=self.event)
+        user = DevDayUser.objects.create_user("another@example.com", "foo")
+        with mock.patch(
+            "attendee.models.generate_checkin_code",
+            side_effect=[first.checkin_code, "12345674"],
+        ):
+            attendee = Attendee.objects.create(user=user, event=self.event)
+        self.assertEqual(attendee.checkin_code, "12345674")
+
+    @override_settings(ATTENDEE_CHECKIN_CODE_ATTEMPTS=2)
+    def test_checkin_code_collisions_exhausted(self):
+        first = Attendee.objects.create(user=self.user, event=self.event)
+        user = DevDayUser.objects.create_user("another@example.com", "foo")
+        with mock.patch(
+            "attendee.models.generate_checkin_code", return_value=first.checkin_code
+        ):
+            with self.assertRaises(IntegrityError):
+                Attendee.objects.create(user=user, event=self.event)
+
+    def test_save_duplicate_attendee_is_not_retried(self):
+        Attendee.objects.create(user=self.user, event=self.event)
+        with mock.patch(
+            "attendee.models.generate_checkin_code", return_value="12345674"
+        ) as generate:
+            with self.assertRaises(IntegrityError):
+                Attendee.objects.create(user=self.user, event=self.event)
+        self.assertEqual(generate.call_count, 1)
+
     def test_get_verification(self):
         attendee = Attendee.objects.create(user=self.user, event=self.event)
         verification = attendee.get_verification()
@@ -184,6 +214,98 @@ class AttendeeManagerTest(TestCase):
             attendee,
         )
 
+    def test_get_checkin_code_or_email_ignores_email_case(self):
+        attendee = Attendee.objects.create(user=self.user, event=self.event)
+        self.assertEqual(
+            Attendee.objects.get_by_checkin_code_or_email(
+                "Test@Example.ORG", self.event
+            ),
+            attendee,
+        )
+
+    def test_bulk_create_assigns_checkin_codes(self):
+        existing = Attendee.objects.create(
+            user=self.user, event=self.event, checkin_code="12345674"
+        )
+        users = [
+            attendee_testutils.create_test_user("bulk{}@example.org".format(i))[0]
+            for i in range(3)
+        ]
+        attendees = [Attendee(user=user, event=self.event) for user in users]
+        attendees[0].checkin_code = "abcd"
+        with mock.patch(
+            "attendee.models.generate_checkin_code",
+            side_effect=[existing.checkin_code, "abcd", "1", "2"],
+        ):
+            # two blocks of candidates and the insert inside a savepoint
+            with self.assertNumQueries(5):
+                Attendee.objects.bulk_create(attendees)
+        self.assertEqual(attendees[0].checkin_code, "abcd")
+        self.assertEqual(
+            {attendee.checkin_code for attendee in attendees[1:]}, {"1", "2"}
+        )
+        self.assertEqual(
+            Attendee.objects.filter(checkin_code__in=["abcd", "1", "2"]).count(), 3
+        )
+
+    def test_bulk_create_retries_checkin_code_collisions(self):
+        users = [
+            attendee_testutils.create_test_user("bulk{}@example.org".format(i))[0]
+            for i in range(3)
+        ]
+        attendees = [Attendee(user=user, event=self.event) for user in users[1:]]
+        assign_checkin_codes = Attendee.objects.assign_checkin_codes
+
+        def register_concurrently(objs):
+            assign_checkin_codes(objs)
+            if not Attendee.objects.filter(user=users[0]).exists():
+                # a concurrent registration takes the first assigned code
+                Attendee.objects.create(
+                    user=users[0], event=self.event, checkin_code=objs[0].checkin_code
+                )
+
+        with mock.patch(
+            "attendee.models.generate_checkin_code", side_effect=["1", "2", "3"]
+        ), mock.patch.object(
+            Attendee.objects,
+            "assign_checkin_codes",
+            side_effect=register_concurrently,
+        ):
+            Attendee.objects.bulk_create(attendees)
+        concurrent = Attendee.objects.get(user=users[0]).checkin_code
+        codes = {attendee.checkin_code for attendee in attendees}
+        self.assertNotIn(concurrent, codes)
+        self.assertEqual(codes | {concurrent}, {"1", "2", "3"})
+        self.assertEqual(Attendee.objects.filter(checkin_code__in=codes).count(), 2)
+
+    @override_settings(ATTENDEE_CHECKIN_CODE_ATTEMPTS=1)
+    def test_bulk_create_checkin_code_collisions_exhausted(self):
+        existing = Attendee.objects.create(
+            user=self.user, event=self.event, checkin_code="12345674"
+        )
+        user, _ = attendee_testutils.create_test_user("bulk@example.org")
+        attendee = Attendee(user=user, event=self.event)
+        with mock.patch.object(
+            Attendee.objects,
+            "assign_checkin_codes",
+            side_effect=lambda objs: setattr(
+                objs[0], "checkin_code", existing.checkin_code
+            ),
+        ):
+            with self.assertRaises(IntegrityError):
+                Attendee.objects.bulk_create([attendee])
+
+    def test_bulk_create_duplicate_attendee_is_not_retried(self):
+        Attendee.objects.create(user=self.user, event=self.event)
+        with mock.patch(
+            "attendee.models.generate_checkin_code", return_value="12345674"
+        ) as generate:
+            with self.assertRaises(IntegrityError):
+                Attendee.objects.bulk_create(
+                    [Attendee(user=self.user, event=self.event)]
+                )
+        self.assertEqual(generate.call_count, 1)
+
     def test_is_verification_valid(self):
         attendee = Attendee.objects.create(user=self.user, event=self.event)
         m = sha1(settings.SECRET_KEY.encode())
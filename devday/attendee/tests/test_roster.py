@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from attendee.models import Attendee, RosterSnapshot
+from attendee.roster import (
+    InvalidRosterBundle,
+    build_roster,
+    get_roster,
+    get_roster_bundle,
+    get_roster_payload,
+    load_roster_bundle,
+    load_roster_snapshot,
+)
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.models import SessionReservation
+from talk.tests import talk_testutils
+
+
+@override_settings(ATTENDEE_CHECKIN_ROSTER_KEY="roster key")
+class RosterTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.workshop = talk_testutils.create_test_talk(
+            speaker, self.event, "Workshop", spots=10
+        )
+        self.attendees = []
+        for i in range(3):
+            user, _ = attendee_testutils.create_test_user(
+                "test{}@example.org".format(i)
+            )
+            self.attendees.append(Attendee.objects.create(user=user, event=self.event))
+        SessionReservation.objects.create(
+            attendee=self.attendees[0], talk=self.workshop, is_confirmed=True
+        )
+        other_event = event_testutils.create_test_event("Other event")
+        Attendee.objects.create(user=self.attendees[0].user, event=other_event)
+
+    def test_build_roster(self):
+        with self.assertNumQueries(2):
+            roster = build_roster(self.event)
+        attendee = self.attendees[0]
+        self.assertEqual(list(roster), [attendee.id for attendee in self.attendees])
+        self.assertEqual(
+            roster[attendee.id],
+            {
+                "id": attendee.id,
+                "verification": attendee.get_verification(),
+                "code": attendee.checkin_code,
+                "reservations": [{"format": None, "title": "Workshop"}],
+            },
+        )
+
+    def test_full_payload(self):
+        payload = get_roster_payload(self.event, base="unknown")
+        self.assertEqual(payload["event"], self.event.slug)
+        self.assertIsNone(payload["base"])
+        self.assertEqual(len(payload["attendees"]), 3)
+        self.assertEqual(payload["removed"], [])
+
+    def test_delta_payload(self):
+        version = get_roster_payload(self.event)["version"]
+        self.assertEqual(get_roster_payload(self.event)["version"], version)
+        self.assertEqual(get_roster_payload(self.event, base=version)["attendees"], [])
+        SessionReservation.objects.create(
+            attendee=self.attendees[1], talk=self.workshop, is_confirmed=True
+        )
+        removed = self.attendees[2].id
+        self.attendees[2].delete()
+        user, _ = attendee_testutils.create_test_user("new@example.org")
+        added = Attendee.objects.create(user=user, event=self.event)
+
+        payload = get_roster_payload(self.event, base=version)
+        self.assertNotEqual(payload["version"], version)
+        self.assertEqual(payload["base"], version)
+        self.assertEqual(
+            [entry["id"] for entry in payload["attendees"]],
+            [self.attendees[1].id, added.id],
+        )
+        self.assertEqual(payload["removed"], [removed])
+
+    def test_snapshot(self):
+        version, roster = get_roster(self.event)
+        self.assertEqual(load_roster_snapshot(self.event, version), roster)
+        self.assertIsNone(load_roster_snapshot(self.event, "unknown"))
+        with self.assertNumQueries(3):
+            self.assertEqual(get_roster(self.event), (version, roster))
+        self.assertEqual(RosterSnapshot.objects.count(), 1)
+
+    @override_settings(ATTENDEE_CHECKIN_ROSTER_SNAPSHOT_MAX_AGE=3600)
+    def test_snapshot_pruned(self):
+        old_version = get_roster_payload(self.event)["version"]
+        RosterSnapshot.objects.update(modified=timezone.now() - timedelta(hours=2))
+        self.attendees[2].delete()
+        version = get_roster_payload(self.event)["version"]
+        self.assertEqual(
+            list(RosterSnapshot.objects.values_list("version", flat=True)), [version]
+        )
+        self.assertIsNone(get_roster_payload(self.event, base=old_version)["base"])
+
+    def test_bundle(self):
+        bundle = get_roster_bundle(self.event)
+        self.assertIsInstance(bundle, bytes)
+        payload = load_roster_bundle(bundle, b"roster key")
+        self.assertEqual(len(payload["attendees"]), 3)
+        with self.assertRaises(InvalidRosterBundle):
+            load_roster_bundle(bundle, b"other key")
+        with self.assertRaises(InvalidRosterBundle):
+            load_roster_bundle(bundle[:-1] + b"x")
+
+    @override_settings(ATTENDEE_CHECKIN_ROSTER_KEY="")
+    def test_bundle_requires_key(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_roster_bundle(self.event)
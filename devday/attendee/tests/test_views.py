@@ -812,17 +812,34 @@ class CSVViewTest(TestCase):
         self.login()
         r = self.get_staff("admin_csv_attendees")
         self.assertIn(
-            self.user.email, r.content.decode(), "user should be listed in attendees"
+            self.user.email, r.getvalue().decode(), "user should be listed in attendees"
         )
 
         self.attendee.delete()
         r = self.get_staff("admin_csv_attendees")
         self.assertNotIn(
             self.user.email,
-            r.content.decode(),
+            r.getvalue().decode(),
             "user should not be listed in attendees",
         )
 
+    def test_get_attendees_rows(self):
+        self.user.contact_permission_date = self.user.date_joined
+        self.user.save()
+        r = self.get_staff("admin_csv_attendees")
+        self.assertTrue(r.streaming)
+        self.assertEqual(
+            r["Content-Disposition"], "attachment; filename=attendees.csv"
+        )
+        date_joined = self.user.date_joined.strftime("%Y-%m-%d %H:%M:%S")
+        self.assertEqual(
+            r.getvalue().decode().splitlines(),
+            [
+                "Email;Date joined;Contact permission date",
+                "{};{};{}".format(self.user.email, date_joined, date_joined),
+            ],
+        )
+
     def test_get_inactive_anonymous(self):
         self.get_anonymous("admin_csv_inactive")
 
@@ -833,14 +850,14 @@ class CSVViewTest(TestCase):
         self.user.save()
         r = self.get_staff("admin_csv_inactive")
         self.assertNotIn(
-            self.user.email, r.content.decode(), "user should not be listed in inactive"
+            self.user.email, r.getvalue().decode(), "user should not be listed in inactive"
         )
 
         self.user.is_active = False
         self.user.save()
         r = self.get_staff("admin_csv_inactive")
         self.assertIn(
-            self.user.email, r.content.decode(), "user should be listed in inactive"
+            self.user.email, r.getvalue().decode(), "user should be listed in inactive"
         )
 
     def test_get_maycontact_anonymous(self):
@@ -853,14 +870,14 @@ class CSVViewTest(TestCase):
         self.user.save()
         r = self.get_staff("admin_csv_maycontact")
         self.assertIn(
-            self.user.email, r.content.decode(), "user should be listed in maycontact"
+            self.user.email, r.getvalue().decode(), "user should be listed in maycontact"
         )
 
         self.user.contact_permission_date = None
         self.user.save()
         r = self.get_staff("admin_csv_maycontact")
         self.assertIn(
-            self.user.email, r.content.decode(), "user should be listed in maycontact"
+            self.user.email, r.getvalue().decode(), "user should be listed in maycontact"
         )
 
         self.user.contact_permission_date = timezone.now()
@@ -868,7 +885,7 @@ class CSVViewTest(TestCase):
         self.user.save()
         r = self.get_staff("admin_csv_maycontact")
         self.assertIn(
-            self.user.email, r.content.decode(), "user should be listed in maycontact"
+            self.user.email, r.getvalue().decode(), "user should be listed in maycontact"
         )
 
         self.user.contact_permission_date = None
@@ -876,7 +893,7 @@ class CSVViewTest(TestCase):
         r = self.get_staff("admin_csv_maycontact")
         self.assertNotIn(
             self.user.email,
-            r.content.decode(),
+            r.getvalue().decode(),
             "user should not be listed in maycontact",
         )
 
@@ -1,6 +1,3 @@
-import csv
-from io import StringIO
-
 from django.conf import settings
 from django.contrib.auth import get_user_model, logout
 from django.contrib.auth.mixins import (
@@ -11,19 +8,18 @@ from django.contrib.auth.mixins import (
 from django.contrib.auth.views import LoginView
 from django.contrib.messages.views import SuccessMessageMixin
 from django.core import signing
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError
 from django.db.models import Avg, Count, Prefetch, Q
 from django.db.transaction import atomic
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.utils.encoding import force_text
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import DeleteView, DetailView, TemplateView, UpdateView, View
 from django.views.generic.edit import FormView, ModelFormMixin
-from django.views.generic.list import BaseListView, ListView
+from django.views.generic.list import ListView
 from django_registration import signals
 from django_registration.backends.activation.views import (
     ActivationView,
@@ -31,6 +27,15 @@ from django_registration.backends.activation.views import (
 )
 from django_registration.exceptions import ActivationError
 
+from attendee.checkin import (
+    CHECKIN_ALREADY,
+    CHECKIN_INVALID,
+    CHECKIN_NOT_FOUND,
+    CHECKIN_WRONG_EVENT,
+    check_in_attendees,
+    get_checkin_statistics_snapshot,
+    get_confirmed_reservations,
+)
 from attendee.forms import (
     AttendeeEventFeedbackForm,
     AttendeeProfileForm,
@@ -42,6 +47,7 @@ from attendee.forms import (
     RegistrationAuthenticationForm,
 )
 from attendee.signals import attendence_cancelled
+from devday.utils.csv_export import StreamingCSVView, format_datetime
 from event.models import Event
 from talk.models import Attendee, SessionReservation, Talk
 
@@ -488,34 +494,25 @@ class StaffUserMixin(UserPassesTestMixin):
         return self.request.user.is_staff
 
 
-class InactiveAttendeeView(StaffUserMixin, BaseListView):
+class InactiveAttendeeView(StaffUserMixin, StreamingCSVView):
     model = User
+    csv_filename = "inactive.csv"
+    csv_header = ("Email", "Date joined")
+    csv_fields = ("email", "date_joined")
 
     def get_queryset(self):
         return super().get_queryset().filter(is_active=False).order_by("email")
 
-    def render_to_response(self, context):
-        output = StringIO()
-        try:
-            writer = csv.writer(output, delimiter=";")
-            writer.writerow(("Email", "Date joined"))
-            writer.writerows(
-                [
-                    (u.email, u.date_joined.strftime("%Y-%m-%d %H:%M:%S"))
-                    for u in context.get("object_list", [])
-                ]
-            )
-            response = HttpResponse(
-                output.getvalue(), content_type="txt/csv; charset=utf-8"
-            )
-            response["Content-Disposition"] = "attachment; filename=inactive.csv"
-            return response
-        finally:
-            output.close()
+    def format_row(self, row):
+        email, date_joined = row
+        return email, format_datetime(date_joined)
 
 
-class ContactableAttendeeView(StaffUserMixin, BaseListView):
+class ContactableAttendeeView(StaffUserMixin, StreamingCSVView):
     model = User
+    csv_filename = "contactable.csv"
+    csv_header = ("Email",)
+    csv_fields = ("email",)
 
     def get_queryset(self):
         qs = (
@@ -530,23 +527,12 @@ class ContactableAttendeeView(StaffUserMixin, BaseListView):
         )
         return qs
 
-    def render_to_response(self, context):
-        output = StringIO()
-        try:
-            writer = csv.writer(output, delimiter=";")
-            writer.writerow(("Email",))
-            writer.writerows([(u.email,) for u in context.get("object_list", [])])
-            response = HttpResponse(
-                output.getvalue(), content_type="txt/csv; charset=utf-8"
-            )
-            response["Content-Disposition"] = "attachment; filename=contactable.csv"
-            return response
-        finally:
-            output.close()
-
 
-class AttendeeListView(StaffUserMixin, BaseListView):
+class AttendeeListView(StaffUserMixin, StreamingCSVView):
     model = Attendee
+    csv_filename = "attendees.csv"
+    csv_header = ("Email", "Date joined", "Contact permission date")
+    csv_fields = ("user__email", "user__date_joined", "user__contact_permission_date")
 
     def get_queryset(self):
         return (
@@ -556,32 +542,13 @@ class AttendeeListView(StaffUserMixin, BaseListView):
             .order_by("user__email")
         )
 
-    def render_to_response(self, context):
-        output = StringIO()
-        try:
-            writer = csv.writer(output, delimiter=";")
-            writer.writerow(("Email", "Date joined", "Contact permission date"))
-            writer.writerows(
-                [
-                    (
-                        attendee.user.email,
-                        attendee.user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
-                        attendee.user.contact_permission_date.strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                        if attendee.user.contact_permission_date
-                        else "",
-                    )
-                    for attendee in context.get("object_list", [])
-                ]
-            )
-            response = HttpResponse(
-                output.getvalue(), content_type="txt/csv; charset=utf-8"
-            )
-            response["Content-Disposition"] = "attachment; filename=attendees.csv"
-            return response
-        finally:
-            output.close()
+    def format_row(self, row):
+        email, date_joined, contact_permission_date = row
+        return (
+            email,
+            format_datetime(date_joined),
+            format_datetime(contact_permission_date),
+        )
 
 
 class DevDayUserDeleteView(LoginRequiredMixin, DeleteView):
@@ -608,15 +575,12 @@ class DevDayUserDeleteView(LoginRequiredMixin, DeleteView):
         return reverse("pages-root")
 
 
-def get_reservation_list(attendee):
+def get_reservation_list(reservations):
     msg = ""
-    reservations = attendee.sessionreservation_set.filter(is_confirmed=True)
     if len(reservations) > 0:
         msg += "<h4>{}</h4><ul>".format(_("Attendee has confirmed place for"))
         for res in reservations:
-            msg += "<li>{} <b>{}</b></li>".format(
-                res.talk.talkformat.first().name, res.talk.title
-            )
+            msg += "<li>{} <b>{}</b></li>".format(res["format"] or "", res["title"])
         msg += "</ul>"
     else:
         msg += "<p>{}</p>".format(_("Attendee has no reservations."))
@@ -640,7 +604,9 @@ class CheckInAttendeeView(StaffUserMixin, SuccessMessageMixin, FormView):
         context = self.get_form_kwargs()
         context["form"] = form
         context["checkin_message"] = self.get_success_message(form.cleaned_data)
-        context["checkin_reservations"] = get_reservation_list(attendee)
+        context["checkin_reservations"] = get_reservation_list(
+            get_confirmed_reservations([attendee.id])[attendee.id]
+        )
         return self.render_to_response(context)
 
     def form_invalid(self, form):
@@ -671,64 +637,62 @@ class CheckInAttendeeUrlView(StaffUserMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["event"] = Event.objects.get(slug=self.kwargs.get("event"))
-        id = self.kwargs["id"]
-        verification = self.kwargs["verification"]
-        if not Attendee.objects.is_verification_valid(id, verification):
+        (result,) = check_in_attendees(
+            context["event"],
+            [{"id": self.kwargs["id"], "verification": self.kwargs["verification"]}],
+        )
+        status = result["status"]
+        context["checkin_code"] = status
+        if status == CHECKIN_INVALID:
             context.update(
                 {
-                    "checkin_code": "invalid",
                     "checkin_result": _("Invalid verification URL"),
                     "checkin_message": _("Try again scanning the QR code."),
                 }
             )
-            return context
-        try:
-            attendee = Attendee.objects.get(id=id)
-        except ObjectDoesNotExist:
+        elif status == CHECKIN_NOT_FOUND:
             context.update(
                 {
-                    "checkin_code": "notfound",
                     "checkin_result": _("Attendee not found"),
                     "checkin_message": _("The attendee is (no longer) registered."),
                 }
             )
-            return context
-        if attendee.event != context["event"]:
+        elif status == CHECKIN_WRONG_EVENT:
             context.update(
                 {
-                    "checkin_code": "wrongevent",
                     "checkin_result": _("Code is for the wrong event"),
                     "checkin_message": _("This checkin code is for another event."),
                 }
             )
-            return context
-        try:
-            attendee.check_in()
-            attendee.save()
-        except IntegrityError:
+        elif status == CHECKIN_ALREADY:
+            # the time is unknown if another door checked the attendee in
+            # while this scan was processed
+            checked_in = result["checked_in"] or timezone.now()
             context.update(
                 {
-                    "checkin_code": "already",
                     "checkin_result": _("Already checked in"),
                     "checkin_message": _(
                         "Attendee <b>{}</b> has checked in at {}."
                     ).format(
-                        attendee.user, attendee.checked_in.strftime("%H:%M %d.%m.%y")
+                        result["email"], checked_in.strftime("%H:%M %d.%m.%y")
+                    ),
+                    "checkin_reservations": get_reservation_list(
+                        result["reservations"]
+                    ),
+                }
+            )
+        else:
+            context.update(
+                {
+                    "checkin_result": _("Welcome!"),
+                    "checkin_message": _(
+                        "Attendee <b>{}</b> was successfully checked in."
+                    ).format(result["email"]),
+                    "checkin_reservations": get_reservation_list(
+                        result["reservations"]
                     ),
-                    "checkin_reservations": get_reservation_list(attendee),
                 }
             )
-            return context
-        context.update(
-            {
-                "checkin_code": "OK",
-                "checkin_result": _("Welcome!"),
-                "checkin_message": _(
-                    "Attendee <b>{}</b> was successfully checked in."
-                ).format(attendee.user),
-                "checkin_reservations": get_reservation_list(attendee),
-            }
-        )
         return context
 
 
@@ -739,24 +703,7 @@ class CheckInAttendeeSummaryView(StaffUserMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        event = context["event"]
-        attendees_for_event = Attendee.objects.filter(event=event)
-        context["attendees_registered"] = attendees_for_event.count()
-        context["attendees_checked_in"] = attendees_for_event.filter(
-            checked_in__isnull=False
-        ).count()
-        limited_sessions = Talk.objects.filter(event=event, spots__gt=0)
-        for talk in limited_sessions:
-            talk_reservations = SessionReservation.objects.filter(
-                is_confirmed=True, talk=talk
-            )
-            setattr(talk, "attendees_registered", talk_reservations.count())
-            setattr(
-                talk,
-                "attendees_checked_in",
-                talk_reservations.filter(attendee__checked_in__isnull=False).count(),
-            )
-        context["limited_sessions"] = limited_sessions
+        context.update(get_checkin_statistics_snapshot(context["event"]))
         return context
 
 
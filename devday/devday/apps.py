@@ -3,6 +3,7 @@ import os
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from django.apps import AppConfig
+from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
 _scheduler = None
@@ -25,7 +26,16 @@ class DevDayApp(AppConfig):
         super().__init__(app_name, app_module)
 
     def ready(self):
+        # noinspection PyUnresolvedReferences
+        # This import is needed for signal handling
+        import devday.signals
+
         if "VAULT_URL" in os.environ and not self.job_scheduled:
             from .vault_integration import update_token_scheduler
             update_token_scheduler()
             self.job_scheduled = True
+
+        if settings.MAIL_QUEUE_ENABLED and settings.RUN_SCHEDULED_JOBS:
+            from .utils.mail_queue import schedule_mail_queue
+
+            schedule_mail_queue()
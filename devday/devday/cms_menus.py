@@ -1,15 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models import Exists, OuterRef
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from attendee.models import Attendee
 from event.models import Event
 from menus.base import Menu, Modifier, NavigationNode
 from menus.menu_pool import menu_pool
+from speaker.models import Speaker
 from talk import COMMITTEE_GROUP
 
 CAN_CHECK_IN = "can_check_in"
 CHILDREN = "children"
 EVENT = "event"
+EVENT_PUBLIC = "event_public"
+IS_ATTENDEE = "is_attendee"
 IS_SPEAKER = "is_speaker"
 IS_COMMITTEE_MEMBER = "is_committee_member"
 SUBMISSION_OPEN = "submission_open"
@@ -18,6 +25,45 @@ SESSIONS_PUBLISHED = "sessions_published"
 USER_CAN_REGISTER = "user_can_register"
 
 
+def get_user_flags(request, event):
+    """
+    Determine whether the user is an attendee of the given event, a
+    speaker and a member of the program committee with a single query. The
+    result is remembered on the request because the modifier runs for every
+    menu that is rendered.
+    """
+    flags = getattr(request, "_devday_menu_user_flags", None)
+    if flags is not None:
+        return flags
+    user = request.user
+    if user.is_authenticated:
+        flags = (
+            get_user_model()
+            .objects.filter(pk=user.pk)
+            .annotate(
+                **{
+                    IS_ATTENDEE: Exists(
+                        Attendee.objects.filter(user=OuterRef("pk"), event=event)
+                    ),
+                    IS_SPEAKER: Exists(
+                        Speaker.objects.filter(user=OuterRef("pk"))
+                    ),
+                    IS_COMMITTEE_MEMBER: Exists(
+                        Group.objects.filter(
+                            user=OuterRef("pk"), name=COMMITTEE_GROUP
+                        )
+                    ),
+                }
+            )
+            .values(IS_ATTENDEE, IS_SPEAKER, IS_COMMITTEE_MEMBER)
+            .first()
+        )
+    if flags is None:
+        flags = {IS_ATTENDEE: False, IS_SPEAKER: False, IS_COMMITTEE_MEMBER: False}
+    request._devday_menu_user_flags = flags
+    return flags
+
+
 @menu_pool.register_menu
 class DevDayMenu(Menu):
     """
@@ -73,7 +119,15 @@ class DevDayMenu(Menu):
         )
         for e in events.order_by("start_time"):
             archive.children.append(
-                NavigationNode(e.title, e.get_absolute_url(), e.id, attr={EVENT: True})
+                NavigationNode(
+                    e.title,
+                    e.get_absolute_url(),
+                    e.id,
+                    attr={
+                        EVENT: True,
+                        EVENT_PUBLIC: e.published and e.sessions_published,
+                    },
+                )
             )
         entries.append(archive)
 
@@ -133,39 +187,28 @@ class DevDayModifier(Modifier):
     entries are rendered before ours.
     """
 
-    def user_can_register(self, request, event):
+    def user_can_register(self, request, event, flags):
         return (
             event
             and event.published
             and event.registration_open
-            and (
-                not request.user.is_authenticated
-                or request.user.get_attendee(event) is None
-            )
+            and (not request.user.is_authenticated or not flags[IS_ATTENDEE])
         )
 
-    def user_can_check_in(self, request, event):
+    def user_can_check_in(self, request, event, flags):
         return (
             request.user.is_authenticated
             and event.published
             and not event.online_event
-            and request.user.get_attendee(event) is not None
-        )
-
-    def user_is_committee_member(self, request):
-        return (
-            request.user.is_authenticated
-            and request.user.groups.filter(name=COMMITTEE_GROUP).exists()
+            and flags[IS_ATTENDEE]
         )
 
     def prune_nodes_with_events(self, nodes, request):
+        if request.user.is_staff:
+            return
         for node in nodes[:]:
-            if EVENT in node.attr:
-                e = Event.objects.get(id=node.id)
-                if not request.user.is_staff and (
-                    not e.published or not e.sessions_published
-                ):
-                    nodes.remove(node)
+            if EVENT in node.attr and not node.attr.get(EVENT_PUBLIC):
+                nodes.remove(node)
 
     def prune_nodes(self, nodes, attr, fn):
         affected_nodes = list(filter(lambda n: attr in n.attr, nodes))
@@ -177,14 +220,26 @@ class DevDayModifier(Modifier):
 
     def prune_all_nodes(self, nodes, request, event):
         self.prune_nodes(
-            nodes, CAN_CHECK_IN, lambda: self.user_can_check_in(request, event)
+            nodes,
+            CAN_CHECK_IN,
+            lambda: self.user_can_check_in(
+                request, event, get_user_flags(request, event)
+            ),
         )
-        self.prune_nodes(nodes, IS_SPEAKER, lambda: hasattr(request.user, "speaker"))
         self.prune_nodes(
-            nodes, IS_COMMITTEE_MEMBER, lambda: self.user_is_committee_member(request)
+            nodes, IS_SPEAKER, lambda: get_user_flags(request, event)[IS_SPEAKER]
         )
         self.prune_nodes(
-            nodes, USER_CAN_REGISTER, lambda: self.user_can_register(request, event)
+            nodes,
+            IS_COMMITTEE_MEMBER,
+            lambda: get_user_flags(request, event)[IS_COMMITTEE_MEMBER],
+        )
+        self.prune_nodes(
+            nodes,
+            USER_CAN_REGISTER,
+            lambda: self.user_can_register(
+                request, event, get_user_flags(request, event)
+            ),
         )
         self.prune_nodes(nodes, SUBMISSION_OPEN, lambda: event.submission_open)
         self.prune_nodes(nodes, VOTING_OPEN, lambda: event.voting_open)
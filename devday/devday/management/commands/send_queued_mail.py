@@ -0,0 +1,108 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from devday.models import BulkMailing
+from devday.utils.bulk_mail import get_bulk_mailing_progress, send_bulk_mailing
+from devday.utils.mail_queue import (
+    get_queue_statistics,
+    purge_sent_mail,
+    send_queued_mail,
+)
+
+
+class Command(BaseCommand):
+    help = "Send the mails waiting in the mail queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.MAIL_QUEUE_BATCH_SIZE,
+            help="Maximum number of mails sent via one connection",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and send new mails every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=settings.MAIL_QUEUE_INTERVAL,
+            help="Seconds to wait between two runs in --loop mode",
+        )
+        parser.add_argument(
+            "--mailing",
+            type=int,
+            metavar="ID",
+            help="Send the remaining chunks of the given bulk mailing",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print the mail queue statistics instead of sending mails",
+        )
+        parser.add_argument(
+            "--purge",
+            type=int,
+            metavar="DAYS",
+            help="Delete mails that have been sent more than DAYS days ago",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        if options["stats"]:
+            for key, value in get_queue_statistics().items():
+                self.stdout.write("{}: {}".format(key, value))
+            return
+        if options["mailing"] is not None:
+            self.send_mailing(options["mailing"])
+            return
+        if options["purge"] is not None:
+            deleted = purge_sent_mail(options["purge"])
+            self.stdout.write("Deleted {} sent mails".format(deleted))
+            return
+        while True:
+            self.send_all(options["batch_size"])
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def send_all(self, batch_size):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_queued_mail(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < batch_size:
+                break
+        if total_sent or total_failed or self.verbosity > 1:
+            self.stdout.write(
+                "Sent {} mails, {} mails failed".format(total_sent, total_failed)
+            )
+
+    def send_mailing(self, mailing_id):
+        try:
+            mailing = BulkMailing.objects.get(pk=mailing_id)
+        except BulkMailing.DoesNotExist:
+            raise CommandError("Bulk mailing {} does not exist".format(mailing_id))
+        report = send_bulk_mailing(mailing)
+        progress = get_bulk_mailing_progress(mailing)
+        self.stdout.write(
+            "Sent {} recipients in {:.1f} seconds ({:.1f}/s), {} chunks failed".format(
+                report["recipients_sent"],
+                report["seconds"],
+                report["recipients_per_second"],
+                report["chunks_failed"],
+            )
+        )
+        self.stdout.write(
+            "{} of {} chunks sent, {} of {} recipients".format(
+                progress["chunks_sent"],
+                progress["chunks"],
+                progress["recipients_sent"],
+                mailing.recipient_count,
+            )
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('subject', models.CharField(blank=True, max_length=255, verbose_name='Subject')),
+                ('recipient_count', models.PositiveIntegerField(default=0, verbose_name='Number of recipients')),
+                ('from_email', models.CharField(blank=True, max_length=255, verbose_name='Envelope sender')),
+                ('recipients', models.TextField(blank=True, help_text='One address per line', verbose_name='Envelope recipients')),
+                ('message', models.BinaryField(verbose_name='Message')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Next attempt')),
+                ('sent', models.DateTimeField(blank=True, null=True, verbose_name='Sent')),
+                ('failed', models.BooleanField(default=False, verbose_name='Failed')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last error')),
+            ],
+            options={
+                'verbose_name': 'Queued email',
+                'verbose_name_plural': 'Queued emails',
+                'ordering': ['next_attempt'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devday', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkMailing',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('subject', models.CharField(blank=True, max_length=255, verbose_name='Subject')),
+                ('recipient_count', models.PositiveIntegerField(default=0, verbose_name='Number of recipients')),
+                ('chunk_size', models.PositiveIntegerField(verbose_name='Chunk size')),
+            ],
+            options={
+                'verbose_name': 'Bulk mailing',
+                'verbose_name_plural': 'Bulk mailings',
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.AddField(
+            model_name='queuedemail',
+            name='mailing',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='devday.BulkMailing', verbose_name='Bulk mailing'),
+        ),
+    ]
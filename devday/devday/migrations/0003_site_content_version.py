@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_site_content_version(apps, schema_editor):
+    SiteContentVersion = apps.get_model('devday', 'SiteContentVersion')
+
+    db_alias = schema_editor.connection.alias
+    SiteContentVersion.objects.using(db_alias).create()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('devday', '0002_bulkmailing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteContentVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Version')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Modified')),
+            ],
+            options={
+                'verbose_name': 'Site content version',
+                'verbose_name_plural': 'Site content versions',
+            },
+        ),
+        migrations.RunPython(
+            create_site_content_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,106 @@
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from model_utils.models import TimeStampedModel
+
+
+class BulkMailing(TimeStampedModel):
+    """
+    A mail to many recipients that is sent in chunks of queued emails.
+    """
+
+    subject = models.CharField(verbose_name=_("Subject"), max_length=255, blank=True)
+    recipient_count = models.PositiveIntegerField(
+        verbose_name=_("Number of recipients"), default=0
+    )
+    chunk_size = models.PositiveIntegerField(verbose_name=_("Chunk size"))
+
+    class Meta:
+        verbose_name = _("Bulk mailing")
+        verbose_name_plural = _("Bulk mailings")
+        ordering = ["-created"]
+
+    def __str__(self):
+        return self.subject
+
+
+class QueuedEmail(TimeStampedModel):
+    """
+    An email message waiting to be sent by the mail queue.
+    """
+
+    subject = models.CharField(verbose_name=_("Subject"), max_length=255, blank=True)
+    recipient_count = models.PositiveIntegerField(
+        verbose_name=_("Number of recipients"), default=0
+    )
+    from_email = models.CharField(
+        verbose_name=_("Envelope sender"), max_length=255, blank=True
+    )
+    recipients = models.TextField(
+        verbose_name=_("Envelope recipients"),
+        blank=True,
+        help_text=_("One address per line"),
+    )
+    message = models.BinaryField(verbose_name=_("Message"))
+    attempts = models.PositiveSmallIntegerField(verbose_name=_("Attempts"), default=0)
+    next_attempt = models.DateTimeField(
+        verbose_name=_("Next attempt"), default=timezone.now, db_index=True
+    )
+    sent = models.DateTimeField(verbose_name=_("Sent"), null=True, blank=True)
+    failed = models.BooleanField(verbose_name=_("Failed"), default=False)
+    last_error = models.TextField(verbose_name=_("Last error"), blank=True)
+    mailing = models.ForeignKey(
+        BulkMailing,
+        verbose_name=_("Bulk mailing"),
+        related_name="chunks",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _("Queued email")
+        verbose_name_plural = _("Queued emails")
+        ordering = ["next_attempt"]
+
+    def __str__(self):
+        return self.subject
+
+
+class SiteContentVersionManager(models.Manager):
+    def bump(self):
+        """
+        Increment the site content version.
+        """
+        if not self.filter(pk=1).update(
+            version=F("version") + 1, modified=timezone.now()
+        ):
+            self.get_current()
+
+    def get_current(self):
+        """
+        Return the site content version.
+        """
+        return self.get_or_create(pk=1)[0]
+
+
+class SiteContentVersion(models.Model):
+    """
+    Version of the CMS content that is shown on every page, like the
+    navigation menu and the sponsors. There is only one instance, its version
+    is incremented whenever pages or static placeholders are published or
+    events change.
+    """
+
+    version = models.PositiveIntegerField(verbose_name=_("Version"), default=1)
+    modified = models.DateTimeField(verbose_name=_("Modified"), default=timezone.now)
+
+    objects = SiteContentVersionManager()
+
+    class Meta:
+        verbose_name = _("Site content version")
+        verbose_name_plural = _("Site content versions")
+
+    def __str__(self):
+        return str(self.version)
@@ -192,6 +192,33 @@ DEVDAY_XING_URL = "https://www.xing.com/events/dev-day-2018-1897927"
 
 DEFAULT_EMAIL_SENDER = "info-bounce@devday.de"
 
+# Seconds a snapshot of the check-in statistics of an event is reused
+ATTENDEE_CHECKIN_SUMMARY_CACHE_TIMEOUT = 5
+
+# Number of random check-in codes tried when an attendee is saved before the
+# collisions with existing codes are reported as an error
+ATTENDEE_CHECKIN_CODE_ATTEMPTS = 10
+
+# Maximum number of queued scans a door tablet may sync in one request
+ATTENDEE_CHECKIN_BATCH_MAX_SCANS = 500
+
+# Key that signs the check-in rosters for the offline door devices, it is
+# shared with the devices and must therefore differ from the SECRET_KEY
+ATTENDEE_CHECKIN_ROSTER_KEY = get_setting(
+    "ATTENDEE_CHECKIN_ROSTER_KEY", default_value=""
+)
+
+# Seconds a roster snapshot remains available as base of delta downloads after
+# it has last been requested
+ATTENDEE_CHECKIN_ROSTER_SNAPSHOT_MAX_AGE = 86400
+
+# Seconds the current event is cached in each process, changes to events only
+# invalidate it in the process that made the change
+EVENT_CURRENT_EVENT_CACHE_TIMEOUT = 60
+
+# Seconds a reverse proxy may serve public event pages without revalidating
+EVENT_CONTENT_CACHE_MAX_AGE = 60
+
 INSTALLED_APPS = [
     "ckeditor",
     "corsheaders",
@@ -303,6 +330,37 @@ CONFIRMATION_SALT = get_setting("CONFIRMATION_SALT")
 TALK_PUBLIC_SPEAKER_IMAGE_HEIGHT = 960
 TALK_PUBLIC_SPEAKER_IMAGE_WIDTH = 636
 TALK_THUMBNAIL_HEIGHT = 320
+# Widths of the responsive variants of speaker thumbnails (keeping the aspect
+# ratio of the portrait) and public speaker images (cropped like the public
+# image). Every variant is stored as WebP and in the format of the portrait.
+SPEAKER_IMAGE_VARIANT_WIDTHS = {
+    "thumbnail": (100, 200, 280, 560),
+    "public": (318, 636, 1272),
+}
+# Number of background threads that derive speaker images from portraits, 0
+# derives the images while saving the speaker
+SPEAKER_IMAGE_WORKERS = 2
+
+# Seconds the session grid of an event is cached in each process, its cache key
+# contains the content version of the event
+TALK_SCHEDULE_CACHE_TIMEOUT = 600
+
+# Seconds the rendered schedule feeds are cached, their cache keys contain the
+# content version of the event
+TALK_SCHEDULE_FEED_CACHE_TIMEOUT = 86400
+# Maximum number of hours the offsethours parameter of the schedule feeds moves
+# the schedule, larger offsets are clamped to keep the number of cached feeds
+# small
+TALK_SCHEDULE_FEED_MAX_OFFSET_HOURS = 48
+
+# Seconds the attendee vote leaderboard of an event is shared between requests
+TALK_ATTENDEE_VOTE_LEADERBOARD_CACHE_TIMEOUT = 30
+
+# Maximum number of votes that can be submitted in one batch
+TALK_VOTE_BATCH_SIZE = 500
+
+# Maximum number of sessions per page of the sessions API
+TALK_API_SESSION_MAX_PAGE_SIZE = 100
 
 # Feedback for talks is allowed when that many minutes passed since the talk started
 TALK_FEEDBACK_ALLOWED_MINUTES = 30
@@ -379,6 +437,33 @@ DEFAULT_FROM_EMAIL = get_setting("DEFAULT_FROM_EMAIL", default_value="info@devda
 EMAIL_HOST = get_setting("EMAIL_HOST", default_value="mail")
 EMAIL_SUBJECT_PREFIX = get_setting("EMAIL_SUBJECT_PREFIX", default_value="[Dev Day] ")
 
+# Store outgoing mails in the database and send them from a background job
+# instead of the web request
+MAIL_QUEUE_ENABLED = get_setting(
+    "MAIL_QUEUE_ENABLED", value_type=bool, default_value=False
+)
+# Seconds between two runs of the mail queue job
+MAIL_QUEUE_INTERVAL = 15
+# Maximum number of mails sent via one SMTP connection
+MAIL_QUEUE_BATCH_SIZE = 50
+# Seconds a sender claims a batch of mails for, this must exceed the time it
+# needs to send a batch or mails may be sent twice
+MAIL_QUEUE_CLAIM_TIMEOUT = 600
+# Failed mails are retried after MAIL_QUEUE_RETRY_DELAY seconds, the delay is
+# doubled for every further attempt
+MAIL_QUEUE_RETRY_DELAY = 60
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+# Maximum number of recipients of one message sent by a bulk mailing
+MAIL_BULK_CHUNK_SIZE = 50
+# Maximum number of recipients per second for queued and bulk mails, 0 disables
+# the limit
+MAIL_RATE_LIMIT = get_setting("MAIL_RATE_LIMIT", value_type=float, default_value=0)
+# Images of HTML mails: seconds fetched images are cached, timeout in seconds
+# for fetching an image and number of images fetched concurrently
+MAIL_IMAGE_CACHE_TIMEOUT = 3600
+MAIL_IMAGE_FETCH_TIMEOUT = 10
+MAIL_IMAGE_FETCH_WORKERS = 4
+
 _local_log_names = [
     "django",
     "django.request",
@@ -0,0 +1,58 @@
+"""
+Signal handlers of the devday app.
+
+"""
+from cms import operations
+from cms.models import Page, StaticPlaceholder
+from cms.signals import post_obj_operation, post_publish, post_unpublish
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from event.models import Event
+from menus.menu_pool import menu_pool
+
+from devday.models import SiteContentVersion
+
+
+@receiver(post_save, sender=Event, dispatch_uid="devday_clear_menu_cache")
+@receiver(post_delete, sender=Event, dispatch_uid="devday_clear_menu_cache_delete")
+def clear_menu_cache(sender, **kwargs):
+    # the cached CMS navigation contains the current event and the archive
+    menu_pool.clear(all=True)
+    transaction.on_commit(lambda: menu_pool.clear(all=True))
+
+
+@receiver(post_save, sender=Event, dispatch_uid="devday_bump_site_content_event")
+@receiver(
+    post_delete, sender=Event, dispatch_uid="devday_bump_site_content_event_delete"
+)
+@receiver(post_publish, dispatch_uid="devday_bump_site_content_publish")
+@receiver(post_unpublish, dispatch_uid="devday_bump_site_content_unpublish")
+@receiver(post_delete, sender=Page, dispatch_uid="devday_bump_site_content_page")
+@receiver(
+    post_delete,
+    sender=StaticPlaceholder,
+    dispatch_uid="devday_bump_site_content_static_placeholder_delete",
+)
+def bump_site_content_version(sender, **kwargs):
+    # the navigation and the static placeholders are part of every page
+    SiteContentVersion.objects.bump()
+
+
+@receiver(
+    post_save,
+    sender=StaticPlaceholder,
+    dispatch_uid="devday_bump_site_content_static_placeholder",
+)
+def bump_site_content_version_for_static_placeholder(sender, created, **kwargs):
+    # the static_placeholder tag creates missing placeholders without content
+    # while rendering, they change when their content is published
+    if not created:
+        SiteContentVersion.objects.bump()
+
+
+@receiver(post_obj_operation, dispatch_uid="devday_bump_site_content_operation")
+def bump_site_content_version_for_operation(sender, operation, **kwargs):
+    # moving pages changes the navigation without any other signal
+    if operation in operations.PAGE_OPERATIONS:
+        SiteContentVersion.objects.bump()
@@ -1,6 +1,7 @@
 from unittest.mock import patch
 
-from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.urls import reverse
@@ -9,8 +10,12 @@ from attendee.models import Attendee
 from attendee.tests.attendee_testutils import create_test_user
 from devday import cms_menus
 from devday.utils.devdata import DevData
-from event.models import Event
+from event.models import Event, end_current_event_memo, start_current_event_memo
 from menus.menu_pool import menu_pool
+from speaker.models import Speaker
+from talk import COMMITTEE_GROUP
+
+User = get_user_model()
 
 CLASS_UNDER_TEST = "DevDayMenu"
 
@@ -27,7 +32,7 @@ def get_nodes(user=None):
     request.user = user if user else AnonymousUser()
     with patch("menus.menu_pool.use_draft", return_value=False):
         renderer = menu_pool.get_renderer(request)
-    nodes = renderer.get_nodes()
+        nodes = renderer.get_nodes()
     # There are other menu entries (CMSMenu etc.) and they would confuse these
     # tests, so filter them out.
     filter_nodes_by_namespace(nodes, CLASS_UNDER_TEST)
@@ -119,3 +124,78 @@ class DevDayMenuTest(TestCase):
         self.assertEqual(len(children), 2, "profile menu should have two entries")
         self.assertEqual(children[0].url, reverse("user_profile"))
         self.assertEqual(children[1].url, reverse("auth_logout"))
+
+    def test_archive_hides_unpublished_events(self):
+        archived = Event.objects.exclude(id=self.event.id).order_by("start_time")
+        hidden = archived.first()
+        hidden.sessions_published = False
+        hidden.save()
+        entries = get_nodes()
+        self.assertEqual(
+            [n.id for n in entries[3].children],
+            list(archived.exclude(id=hidden.id).values_list("id", flat=True)),
+        )
+        admin = self.devdata.user
+        entries = get_nodes(user=admin)
+        self.assertIn(hidden.id, [n.id for n in entries[3].children])
+
+    def test_menu_cache_cleared_on_event_change(self):
+        get_nodes()
+        self.event.title = "Renamed event"
+        self.event.save()
+        entries = get_nodes()
+        self.assertEqual(entries[0].title, "Register now for Renamed event")
+
+    def test_modifier_queries(self):
+        (user, _) = create_test_user()
+        get_nodes(user=user)
+        request = RequestFactory().get("/")
+        request.user = user
+        with patch("menus.menu_pool.use_draft", return_value=False):
+            renderer = menu_pool.get_renderer(request)
+        nodes = renderer._build_nodes()
+        start_current_event_memo(sender=None)
+        try:
+            Event.objects.current_event()
+            with self.assertNumQueries(1):
+                renderer.apply_modifiers(nodes)
+            with self.assertNumQueries(0):
+                renderer.apply_modifiers(renderer._build_nodes())
+        finally:
+            end_current_event_memo(sender=None)
+
+    def test_user_flags(self):
+        (user, _) = create_test_user()
+        Attendee.objects.filter(user=user).delete()
+        request = RequestFactory().get("/")
+        request.user = user
+        self.assertEqual(
+            cms_menus.get_user_flags(request, self.event),
+            {
+                cms_menus.IS_ATTENDEE: False,
+                cms_menus.IS_SPEAKER: False,
+                cms_menus.IS_COMMITTEE_MEMBER: False,
+            },
+        )
+        Attendee.objects.create(user=user, event=self.event)
+        Speaker.objects.create(
+            user=user, name="Speaker", video_permission=True, shirt_size=1
+        )
+        user.groups.add(Group.objects.get(name=COMMITTEE_GROUP))
+        request = RequestFactory().get("/")
+        request.user = user
+        self.assertEqual(
+            cms_menus.get_user_flags(request, self.event),
+            {
+                cms_menus.IS_ATTENDEE: True,
+                cms_menus.IS_SPEAKER: True,
+                cms_menus.IS_COMMITTEE_MEMBER: True,
+            },
+        )
+
+    def test_user_flags_anonymous(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            flags = cms_menus.get_user_flags(request, self.event)
+        self.assertFalse(any(flags.values()))
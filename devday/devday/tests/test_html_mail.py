@@ -1,13 +1,31 @@
+import os
+import shutil
+import tempfile
+from urllib.error import URLError
+
 from bs4 import BeautifulSoup
 
 from django.core import mail
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
 from devday.utils.html_mail import create_html_mail
 from mock import Mock, patch
 
+MINI_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04"
+    b"\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D"
+    b"\x01\x00;"
+)
+
 
 class CreateHtmlMailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
     def find_attachment_by_content_id(self, msg, name):
         for a in msg.attachments:
             for (k, v) in a._headers:
@@ -52,3 +70,59 @@ class CreateHtmlMailTests(TestCase):
             cid = img["src"].split(":")[1]
             att = self.find_attachment_by_content_id(msg, cid)
             self.assertIsNotNone(att, "image tag has a matching attachment")
+
+    def mock_response(self, mock_urlopen):
+        mock_httpresponse = Mock()
+        mock_httpresponse.getheader.return_value = "image/gif"
+        mock_httpresponse.read.return_value = MINI_GIF
+        mock_urlopen.return_value.__enter__.return_value = mock_httpresponse
+
+    @patch("devday.utils.html_mail.urlopen")
+    def test_create_html_email_same_image_twice(self, mock_urlopen):
+        self.mock_response(mock_urlopen)
+        html = """<p><img src='http://localhost/image.gif'></p>
+<p><img src='http://localhost/image.gif'></p>"""
+        msg = create_html_mail("A test mail", html)
+        mock_urlopen.assert_called_once()
+        self.assertEqual(len(msg.attachments), 1)
+        soup = BeautifulSoup(msg.alternatives[0][0], "lxml")
+        self.assertEqual(
+            [img["src"] for img in soup.findAll("img")], ["cid:image-0"] * 2
+        )
+
+    @patch("devday.utils.html_mail.urlopen")
+    def test_create_html_email_cached_image(self, mock_urlopen):
+        self.mock_response(mock_urlopen)
+        html = "<p><img src='http://localhost/image.gif'></p>"
+        create_html_mail("Preview", html)
+        msg = create_html_mail("Real mail", html)
+        mock_urlopen.assert_called_once()
+        self.assertEqual(msg.attachments[0].get_payload(decode=True), MINI_GIF)
+
+    @patch("devday.utils.html_mail.urlopen")
+    def test_create_html_email_unavailable_image(self, mock_urlopen):
+        mock_urlopen.side_effect = URLError("timed out")
+        msg = create_html_mail(
+            "A test mail", "<p><img src='http://localhost/image.gif'></p>"
+        )
+        self.assertEqual(len(msg.attachments), 0)
+        self.assertIn("http://localhost/image.gif", msg.alternatives[0][0])
+
+    @patch("devday.utils.html_mail.urlopen")
+    def test_create_html_email_local_image(self, mock_urlopen):
+        mock_urlopen.side_effect = ValueError("unknown url type")
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, "filer_public"))
+        with open(os.path.join(media_root, "filer_public", "image.gif"), "wb") as f:
+            f.write(MINI_GIF)
+        with override_settings(MEDIA_ROOT=media_root):
+            msg = create_html_mail(
+                "A test mail",
+                "<p><img src='/media/filer_public/image.gif'></p>"
+                "<p><img src='/media/../image.gif'></p>",
+            )
+        mock_urlopen.assert_called_once()
+        self.assertEqual(len(msg.attachments), 1)
+        self.assertEqual(msg.attachments[0].get_content_type(), "image/gif")
+        self.assertEqual(msg.attachments[0].get_payload(decode=True), MINI_GIF)
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from devday.models import QueuedEmail
+from devday.utils.bulk_mail import create_bulk_mailing
+from devday.utils.html_mail import create_html_mail
+from devday.utils.mail_queue import queue_mail
+
+
+@override_settings(MAIL_QUEUE_ENABLED=True)
+class CommandTest(TestCase):
+    def setUp(self):
+        for number in range(3):
+            queue_mail(
+                EmailMessage(
+                    "Subject", "Body", None, ["test{}@example.org".format(number)]
+                )
+            )
+
+    def test_send_queued_mail(self):
+        out = StringIO()
+        call_command("send_queued_mail", batch_size=2, stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(out.getvalue(), "Sent 3 mails, 0 mails failed\n")
+        self.assertFalse(QueuedEmail.objects.filter(sent__isnull=True).exists())
+
+    def test_send_queued_mail_stats(self):
+        out = StringIO()
+        call_command("send_queued_mail", stats=True, stdout=out)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIn("queued: 3\n", out.getvalue())
+
+    def test_send_queued_mail_mailing(self):
+        mailing = create_bulk_mailing(
+            create_html_mail("Bulk mail", "<p>Hello</p>"),
+            ["test{}@example.org".format(number) for number in range(5)],
+            chunk_size=2,
+        )
+        out = StringIO()
+        call_command("send_queued_mail", mailing=mailing.id, stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("3 of 3 chunks sent, 5 of 5 recipients", out.getvalue())
+        self.assertEqual(QueuedEmail.objects.filter(sent__isnull=True).count(), 3)
+
+    def test_send_queued_mail_unknown_mailing(self):
+        with self.assertRaises(CommandError):
+            call_command("send_queued_mail", mailing=0, stdout=StringIO())
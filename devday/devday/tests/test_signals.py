@@ -0,0 +1,57 @@
+from cms import api, operations
+from cms.models import StaticPlaceholder
+from cms.signals import post_obj_operation
+from django.test import TestCase
+
+from devday.models import SiteContentVersion
+from event.tests import event_testutils
+
+
+class SiteContentVersionTest(TestCase):
+    def assertBumped(self, version):
+        current = SiteContentVersion.objects.get_current()
+        self.assertGreater(current.version, version.version)
+        self.assertGreaterEqual(current.modified, version.modified)
+
+    def test_get_current(self):
+        version = SiteContentVersion.objects.get_current()
+        self.assertEqual(SiteContentVersion.objects.get_current(), version)
+        self.assertEqual(SiteContentVersion.objects.count(), 1)
+
+    def test_bump_without_version(self):
+        SiteContentVersion.objects.all().delete()
+        SiteContentVersion.objects.bump()
+        self.assertEqual(SiteContentVersion.objects.count(), 1)
+
+    def test_bumped_by_page_publish(self):
+        page = api.create_page("Test", "devday_no_cta.html", "de")
+        version = SiteContentVersion.objects.get_current()
+        page.publish("de")
+        self.assertBumped(version)
+        version = SiteContentVersion.objects.get_current()
+        page.unpublish("de")
+        self.assertBumped(version)
+
+    def test_bumped_by_page_move(self):
+        page = api.create_page("Test", "devday_no_cta.html", "de")
+        version = SiteContentVersion.objects.get_current()
+        post_obj_operation.send(
+            sender=self.__class__,
+            operation=operations.MOVE_PAGE,
+            request=None,
+            token="token",
+            obj=page,
+        )
+        self.assertBumped(version)
+
+    def test_bumped_by_static_placeholder(self):
+        version = SiteContentVersion.objects.get_current()
+        static_placeholder = StaticPlaceholder.objects.create(code="sponsors")
+        self.assertEqual(SiteContentVersion.objects.get_current(), version)
+        static_placeholder.publish(None, "de", force=True)
+        self.assertBumped(version)
+
+    def test_bumped_by_event(self):
+        version = SiteContentVersion.objects.get_current()
+        event_testutils.create_test_event()
+        self.assertBumped(version)
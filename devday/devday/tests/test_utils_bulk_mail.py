@@ -0,0 +1,114 @@
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+from devday.models import QueuedEmail
+from devday.utils.bulk_mail import (
+    create_bulk_mailing,
+    get_bulk_mailing_progress,
+    send_bulk_mailing,
+)
+from devday.utils.html_mail import create_html_mail
+from devday.utils.mail_queue import RateLimiter
+
+RECIPIENTS = ["test{}@example.org".format(number) for number in range(5)]
+
+
+class CountingEmailBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class RejectingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        for message in messages:
+            if "test2@example.org" in message.recipients():
+                raise SMTPRecipientsRefused({"test2@example.org": (550, b"unknown")})
+        return super().send_messages(messages)
+
+
+class BulkMailTest(TestCase):
+    def setUp(self):
+        self.message = create_html_mail("Bulk mail", "<p>Hello</p>")
+
+    def test_create_bulk_mailing(self):
+        mailing = create_bulk_mailing(self.message, RECIPIENTS, chunk_size=2)
+        self.assertEqual(mailing.subject, "Bulk mail")
+        self.assertEqual(mailing.recipient_count, 5)
+        chunks = mailing.chunks.order_by("id")
+        self.assertEqual(
+            list(chunks.values_list("recipient_count", flat=True)), [2, 2, 1]
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(
+        EMAIL_BACKEND="devday.tests.test_utils_bulk_mail.CountingEmailBackend"
+    )
+    def test_send_bulk_mailing(self):
+        CountingEmailBackend.opened = 0
+        mailing = create_bulk_mailing(self.message, RECIPIENTS, chunk_size=2)
+        report = send_bulk_mailing(mailing)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(
+            [m.recipients() for m in mail.outbox],
+            [RECIPIENTS[0:2], RECIPIENTS[2:4], RECIPIENTS[4:]],
+        )
+        self.assertEqual(report["chunks_sent"], 3)
+        self.assertEqual(report["chunks_failed"], 0)
+        self.assertEqual(report["recipients_sent"], 5)
+        self.assertGreaterEqual(report["seconds"], 0)
+        self.assertEqual(
+            get_bulk_mailing_progress(mailing),
+            {"chunks": 3, "chunks_sent": 3, "chunks_failed": 0, "recipients_sent": 5},
+        )
+
+    def test_send_bulk_mailing_resume(self):
+        mailing = create_bulk_mailing(self.message, RECIPIENTS, chunk_size=2)
+        first_chunk = mailing.chunks.order_by("id").first()
+        first_chunk.sent = first_chunk.created
+        first_chunk.save()
+        report = send_bulk_mailing(mailing)
+        self.assertEqual(report["chunks_sent"], 2)
+        self.assertEqual(report["recipients_sent"], 3)
+        self.assertEqual(
+            [m.recipients() for m in mail.outbox], [RECIPIENTS[2:4], RECIPIENTS[4:]]
+        )
+        self.assertEqual(send_bulk_mailing(mailing)["chunks_sent"], 0)
+
+    @override_settings(
+        EMAIL_BACKEND="devday.tests.test_utils_bulk_mail.RejectingEmailBackend"
+    )
+    def test_send_bulk_mailing_rejected_chunk(self):
+        mailing = create_bulk_mailing(self.message, RECIPIENTS, chunk_size=2)
+        report = send_bulk_mailing(mailing)
+        self.assertEqual(report["chunks_sent"], 2)
+        self.assertEqual(report["chunks_failed"], 1)
+        self.assertEqual(
+            [m.recipients() for m in mail.outbox], [RECIPIENTS[0:2], RECIPIENTS[4:]]
+        )
+        failed_chunk = QueuedEmail.objects.get(mailing=mailing, sent__isnull=True)
+        self.assertEqual(failed_chunk.attempts, 1)
+        self.assertIn("test2@example.org", failed_chunk.last_error)
+
+    @mock.patch("devday.utils.mail_queue.time")
+    def test_rate_limiter(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        rate_limiter = RateLimiter(10)
+        rate_limiter.wait(5)
+        mock_time.sleep.assert_called_once_with(0.5)
+        mock_time.sleep.reset_mock()
+        mock_time.monotonic.return_value = 102
+        rate_limiter.wait(5)
+        mock_time.sleep.assert_not_called()
+
+    @mock.patch("devday.utils.mail_queue.time")
+    def test_rate_limiter_disabled(self, mock_time):
+        mock_time.monotonic.return_value = 100
+        RateLimiter(0).wait(1000)
+        mock_time.sleep.assert_not_called()
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from devday.utils import caching
+
+
+@mock.patch("devday.utils.caching.cache_enabled", return_value=True)
+class CachingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_get_version_is_stable(self, _):
+        version = caching.get_version("test")
+        self.assertIsNotNone(version)
+        self.assertEqual(caching.get_version("test"), version)
+        self.assertNotEqual(caching.get_version("other"), version)
+
+    def test_invalidate_changes_version(self, _):
+        version = caching.get_version("test")
+        other_version = caching.get_version("other")
+        caching.invalidate("test")
+        self.assertNotEqual(caching.get_version("test"), version)
+        self.assertEqual(caching.get_version("other"), other_version)
+
+    def test_get_or_build_caches_value(self, _):
+        builder = mock.Mock(return_value={"value": 42})
+        self.assertEqual(caching.get_or_build("test", builder, 60), {"value": 42})
+        self.assertEqual(caching.get_or_build("test", builder, 60), {"value": 42})
+        builder.assert_called_once_with()
+
+    def test_get_or_build_caches_none(self, _):
+        builder = mock.Mock(return_value=None)
+        self.assertIsNone(caching.get_or_build("test", builder, 60))
+        self.assertIsNone(caching.get_or_build("test", builder, 60))
+        builder.assert_called_once_with()
+
+    def test_get_or_build_uses_name(self, _):
+        caching.get_or_build("test", lambda: 1, 60, name="one")
+        self.assertEqual(caching.get_or_build("test", lambda: 2, 60, name="two"), 2)
+        self.assertEqual(caching.get_or_build("test", lambda: 3, 60, name="one"), 1)
+
+    def test_get_or_build_rebuilds_after_invalidate(self, _):
+        builder = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(caching.get_or_build("test", builder, 60), 1)
+        caching.invalidate("test")
+        self.assertEqual(caching.get_or_build("test", builder, 60), 2)
+
+
+class CachingInTransactionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cache_disabled_in_transaction(self):
+        self.assertFalse(caching.cache_enabled())
+
+    def test_get_or_build_does_not_cache_in_transaction(self):
+        builder = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(caching.get_or_build("test", builder, 60), 1)
+        self.assertEqual(caching.get_or_build("test", builder, 60), 2)
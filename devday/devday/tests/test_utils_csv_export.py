@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.test import SimpleTestCase
+
+from devday.utils.csv_export import format_datetime, stream_csv
+
+
+class StreamCSVTest(SimpleTestCase):
+    def test_stream_csv(self):
+        lines = stream_csv([("a", 1), ("b;c", None)], header=("Name", "Value"))
+        self.assertEqual(list(lines), ["Name;Value\r\n", "a;1\r\n", '"b;c";\r\n'])
+
+    def test_stream_csv_is_lazy(self):
+        def rows():
+            yield ("a",)
+            raise AssertionError("should not be consumed")
+
+        lines = stream_csv(rows(), header=("Name",))
+        self.assertEqual(next(lines), "Name\r\n")
+        self.assertEqual(next(lines), "a\r\n")
+
+    def test_stream_csv_without_header(self):
+        self.assertEqual(list(stream_csv([("a",)])), ["a\r\n"])
+
+    def test_format_datetime(self):
+        self.assertEqual(
+            format_datetime(datetime(2020, 1, 2, 3, 4, 5)), "2020-01-02 03:04:05"
+        )
+        self.assertEqual(format_datetime(None), "")
@@ -0,0 +1,212 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from devday.models import QueuedEmail
+from devday.utils.html_mail import create_html_mail
+from devday.utils.mail_queue import (
+    claim_queued_emails,
+    get_queue_statistics,
+    get_retry_delay,
+    purge_sent_mail,
+    queue_mail,
+    send_queued_mail,
+)
+
+FAILING_BACKEND = "devday.tests.test_utils_mail_queue.FailingEmailBackend"
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException("mail server unavailable")
+
+
+class CountingEmailBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+def create_message(number=1):
+    return EmailMessage(
+        "Subject {}".format(number),
+        "Body",
+        "info@devday.de",
+        ["test{}@example.org".format(number)],
+    )
+
+
+class QueueMailTest(TestCase):
+    def test_queue_mail_disabled(self):
+        self.assertIsNone(queue_mail(create_message()))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_queue_mail(self):
+        queued_email = queue_mail(create_message())
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(queued_email.subject, "Subject 1")
+        self.assertEqual(queued_email.recipient_count, 1)
+        self.assertIsNone(queued_email.sent)
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_send_queued_mail(self):
+        queue_mail(create_message(1))
+        queue_mail(create_message(2))
+        self.assertEqual(send_queued_mail(), (2, 0))
+        self.assertEqual(
+            [m.recipients() for m in mail.outbox],
+            [["test1@example.org"], ["test2@example.org"]],
+        )
+        self.assertEqual(mail.outbox[0].message()["To"], "test1@example.org")
+        self.assertFalse(QueuedEmail.objects.filter(sent__isnull=True).exists())
+        self.assertEqual(send_queued_mail(), (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_send_queued_html_mail(self):
+        msg = create_html_mail("HTML mail", "<p>Hello</p>")
+        msg.recipientlist = ["test1@example.org", "test2@example.org"]
+        queued_email = queue_mail(msg)
+        self.assertEqual(queued_email.recipient_count, 2)
+        send_queued_mail()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            mail.outbox[0].recipients(), ["test1@example.org", "test2@example.org"]
+        )
+        message = mail.outbox[0].message()
+        self.assertEqual(message["Subject"], "HTML mail")
+        self.assertEqual(
+            [part.get_content_type() for part in message.walk()],
+            ["multipart/alternative", "text/plain", "text/html"],
+        )
+
+    @override_settings(
+        MAIL_QUEUE_ENABLED=True,
+        EMAIL_BACKEND="devday.tests.test_utils_mail_queue.CountingEmailBackend",
+    )
+    def test_send_queued_mail_batches(self):
+        CountingEmailBackend.opened = 0
+        for number in range(5):
+            queue_mail(create_message(number))
+        self.assertEqual(send_queued_mail(batch_size=3), (3, 0))
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(send_queued_mail(batch_size=3), (2, 0))
+        self.assertEqual(CountingEmailBackend.opened, 2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(MAIL_QUEUE_ENABLED=True, MAIL_QUEUE_CLAIM_TIMEOUT=600)
+    def test_send_queued_mail_skips_claimed(self):
+        queue_mail(create_message(1))
+        queue_mail(create_message(2))
+        before = timezone.now()
+        claimed = claim_queued_emails(QueuedEmail.objects.all(), 1)
+        self.assertEqual([m.subject for m in claimed], ["Subject 1"])
+        claimed[0].refresh_from_db()
+        self.assertGreaterEqual(
+            claimed[0].next_attempt, before + timedelta(seconds=600)
+        )
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual([m.subject for m in mail.outbox], ["Subject 2"])
+
+        # the claim of a crashed sender expires
+        QueuedEmail.objects.filter(sent__isnull=True).update(
+            next_attempt=timezone.now()
+        )
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(mail.outbox[1].subject, "Subject 1")
+
+    @override_settings(
+        MAIL_QUEUE_ENABLED=True,
+        MAIL_QUEUE_RETRY_DELAY=60,
+        EMAIL_BACKEND=FAILING_BACKEND,
+    )
+    def test_send_queued_mail_retry(self):
+        queued_email = queue_mail(create_message())
+        before = timezone.now()
+        self.assertEqual(send_queued_mail(), (0, 1))
+        queued_email.refresh_from_db()
+        self.assertEqual(queued_email.attempts, 1)
+        self.assertFalse(queued_email.failed)
+        self.assertEqual(queued_email.last_error, "mail server unavailable")
+        self.assertGreaterEqual(
+            queued_email.next_attempt, before + timedelta(seconds=60)
+        )
+        self.assertEqual(send_queued_mail(), (0, 0), "retry is not due yet")
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_queue_mail_stores_mime_message(self):
+        message = create_message()
+        message.bcc = ["hidden@example.org"]
+        queued_email = queue_mail(message)
+        self.assertEqual(queued_email.from_email, "info@devday.de")
+        self.assertEqual(
+            queued_email.recipients.split(), ["test1@example.org", "hidden@example.org"]
+        )
+        self.assertIn(b"Subject: Subject 1", bytes(queued_email.message))
+        self.assertNotIn(b"hidden@example.org", bytes(queued_email.message))
+
+    def test_get_retry_delay(self):
+        with override_settings(MAIL_QUEUE_RETRY_DELAY=60):
+            self.assertEqual(
+                [get_retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)],
+                [60, 120, 240],
+            )
+
+    @override_settings(
+        MAIL_QUEUE_ENABLED=True,
+        MAIL_QUEUE_MAX_ATTEMPTS=2,
+        EMAIL_BACKEND=FAILING_BACKEND,
+    )
+    def test_send_queued_mail_gives_up(self):
+        queued_email = queue_mail(create_message())
+        send_queued_mail()
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        send_queued_mail()
+        queued_email.refresh_from_db()
+        self.assertEqual(queued_email.attempts, 2)
+        self.assertTrue(queued_email.failed)
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_get_queue_statistics(self):
+        first = queue_mail(create_message(1))
+        queue_mail(create_message(2))
+        send_queued_mail(batch_size=1)
+        queue_mail(create_message(3))
+        QueuedEmail.objects.filter(subject="Subject 3").update(
+            next_attempt=timezone.now() + timedelta(minutes=5), attempts=1
+        )
+        statistics = get_queue_statistics()
+        oldest = statistics.pop("oldest_queued")
+        self.assertEqual(
+            statistics,
+            {"queued": 2, "due": 1, "retrying": 1, "given_up": 0, "delivered": 1},
+        )
+        self.assertGreaterEqual(oldest, first.created)
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_purge_sent_mail(self):
+        queue_mail(create_message(1))
+        queue_mail(create_message(2))
+        send_queued_mail()
+        queue_mail(create_message(3))
+        QueuedEmail.objects.filter(subject="Subject 1").update(
+            sent=timezone.now() - timedelta(days=10)
+        )
+        self.assertEqual(purge_sent_mail(7), 1)
+        self.assertEqual(
+            list(
+                QueuedEmail.objects.order_by("id").values_list("subject", flat=True)
+            ),
+            ["Subject 2", "Subject 3"],
+        )
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from devday.utils.storage import ContentAddressedFileSystemStorage
+
+
+class ContentAddressedFileSystemStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedFileSystemStorage(location=self.location)
+
+    def content_files(self):
+        return [
+            filename
+            for _, _, filenames in os.walk(
+                self.storage.path(self.storage.CONTENT_DIRECTORY)
+            )
+            for filename in filenames
+        ]
+
+    def test_save_identical_files(self):
+        first = self.storage.save("a/image.png", ContentFile(b"image data"))
+        second = self.storage.save("b/image.png", ContentFile(b"image data"))
+        self.assertEqual((first, second), ("a/image.png", "b/image.png"))
+        self.assertTrue(
+            os.path.samefile(self.storage.path(first), self.storage.path(second))
+        )
+        self.assertEqual(len(self.content_files()), 1)
+        with self.storage.open(second) as f:
+            self.assertEqual(f.read(), b"image data")
+
+    def test_save_available_name(self):
+        self.storage.save("image.png", ContentFile(b"first"))
+        name = self.storage.save("image.png", ContentFile(b"second"))
+        self.assertNotEqual(name, "image.png")
+        with self.storage.open("image.png") as f:
+            self.assertEqual(f.read(), b"first")
+
+    def test_copy(self):
+        source = self.storage.save("source.png", ContentFile(b"image data"))
+        name = self.storage.copy(self.storage, source, "event/copy.png")
+        self.assertEqual(name, "event/copy.png")
+        self.assertTrue(
+            os.path.samefile(self.storage.path(source), self.storage.path(name))
+        )
+
+    def test_copy_from_other_storage(self):
+        other = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, other.location)
+        source = other.save("source.png", ContentFile(b"image data"))
+        name = self.storage.copy(other, source, "copy.png")
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b"image data")
+
+    def test_deduplicate(self):
+        for name in ("a.png", "b.png"):
+            with open(os.path.join(self.location, name), "wb") as f:
+                f.write(b"image data")
+        self.assertEqual(self.storage.deduplicate("a.png"), 0)
+        self.assertEqual(self.storage.deduplicate("b.png"), len(b"image data"))
+        self.assertEqual(self.storage.deduplicate("b.png"), 0)
+        self.assertTrue(
+            os.path.samefile(self.storage.path("a.png"), self.storage.path("b.png"))
+        )
+        self.assertEqual(len(self.content_files()), 1)
+
+    def test_purge_content(self):
+        name = self.storage.save("image.png", ContentFile(b"image data"))
+        self.assertEqual(self.storage.purge_content(), 0)
+        self.storage.delete(name)
+        self.assertEqual(self.storage.purge_content(), len(b"image data"))
+        self.assertEqual(self.content_files(), [])
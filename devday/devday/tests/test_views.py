@@ -4,13 +4,14 @@ from django.contrib.auth.models import Group
 from django.core import mail
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.timezone import datetime
 
 from attendee.models import Attendee
 from attendee.tests import attendee_testutils
+from devday.models import QueuedEmail
 from devday.utils.devdata import DevData
 from devday.utils.html_mail import DevDayEmailMessage
 from devday.views import DevDayEmailRecipients, get_recipient_list_from_file
@@ -402,3 +403,63 @@ class SendEmailViewTest(TestCase):
         self.assertListEqual(
             msg.recipients(), test_recipients + [settings.DEFAULT_FROM_EMAIL]
         )
+
+    @override_settings(MAIL_BULK_CHUNK_SIZE=2)
+    def test_send_email_in_chunks(self):
+        mail.outbox = []
+        self.client.login(username=settings.ADMINUSER_EMAIL, password="admin")
+
+        test_recipients = [
+            "recipient_{}@example.org".format(number) for number in range(4)
+        ]
+        upload_file = SimpleUploadedFile(
+            "recipients.txt", "\n".join(test_recipients).encode("UTF-8")
+        )
+
+        r = self.client.post(
+            self.url,
+            data={
+                "recipients": "users",
+                "subject": "a message to all users",
+                "body": "<p>a single sentence as the <b>message</b>.",
+                "sendreal": "",
+                "recipients_file": upload_file,
+            },
+            follow=True,
+        )
+
+        self.assertEqual(len(mail.outbox), 3, "should have three messages")
+        self.assertListEqual(
+            [msg.recipients() for msg in mail.outbox],
+            [
+                test_recipients[0:2],
+                test_recipients[2:4],
+                [settings.DEFAULT_FROM_EMAIL],
+            ],
+        )
+        self.assertContains(r, "Successfully sent message to 5")
+
+    @override_settings(MAIL_QUEUE_ENABLED=True)
+    def test_send_email_queued(self):
+        mail.outbox = []
+        self.client.login(username=settings.ADMINUSER_EMAIL, password="admin")
+
+        upload_file = SimpleUploadedFile(
+            "recipients.txt", "recipient_a@example.org".encode("UTF-8")
+        )
+
+        r = self.client.post(
+            self.url,
+            data={
+                "recipients": "users",
+                "subject": "a message to all users",
+                "body": "<p>a single sentence as the <b>message</b>.",
+                "sendreal": "",
+                "recipients_file": upload_file,
+            },
+            follow=True,
+        )
+
+        self.assertEqual(len(mail.outbox), 0, "should not send mail directly")
+        self.assertEqual(QueuedEmail.objects.filter(mailing__isnull=False).count(), 1)
+        self.assertContains(r, "Successfully queued message to 2")
@@ -17,6 +17,7 @@ from devday.views import SendEmailView, exception_test_view
 from rest_framework import routers
 from rest_framework.authtoken import views
 
+from attendee.api_views import CheckInViewSet
 from event.api_views import EventDetailViewSet
 from speaker.api_views import SpeakerViewSet
 from talk.api_views import SessionViewSet
@@ -27,6 +28,9 @@ router = routers.DefaultRouter()
 router.register(r"sessions", SessionViewSet)
 router.register(r"speakers", SpeakerViewSet)
 router.register(r"events", EventDetailViewSet)
+router.register(
+    r"events/(?P<event>[^/.]+)/checkin", CheckInViewSet, basename="checkin"
+)
 
 urlpatterns = [
     url(r"^api/", include(router.urls)),
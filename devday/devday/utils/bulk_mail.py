@@ -0,0 +1,113 @@
+"""
+Send a mail to many recipients in chunks.
+
+A bulk mailing splits the recipients into chunks of MAIL_BULK_CHUNK_SIZE
+addresses and stores every chunk as a queued email. A chunk that is rejected
+by the mail server does not affect the other chunks, and an interrupted
+mailing is resumed by sending the chunks that have not been sent yet.
+
+"""
+import copy
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from devday.models import BulkMailing, QueuedEmail
+from devday.utils.mail_queue import (
+    RateLimiter,
+    claim_queued_emails,
+    deliver_queued_email,
+    get_queued_email_fields,
+    wake_mail_queue,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_bulk_mailing(message, recipients, chunk_size=None):
+    """
+    Create a bulk mailing that sends copies of the given DevDayEmailMessage
+    to the given recipients. The chunks are picked up by the mail queue job if
+    the mail queue is enabled, use send_bulk_mailing to send them directly.
+    """
+    if chunk_size is None:
+        chunk_size = settings.MAIL_BULK_CHUNK_SIZE
+    with transaction.atomic():
+        mailing = BulkMailing.objects.create(
+            subject=str(message.subject)[:255],
+            recipient_count=len(recipients),
+            chunk_size=chunk_size,
+        )
+        chunks = []
+        for start in range(0, len(recipients), chunk_size):
+            chunk = copy.copy(message)
+            chunk.recipientlist = list(recipients[start : start + chunk_size])
+            chunks.append(
+                QueuedEmail(mailing=mailing, **get_queued_email_fields(chunk))
+            )
+        QueuedEmail.objects.bulk_create(chunks)
+        if settings.MAIL_QUEUE_ENABLED:
+            wake_mail_queue()
+    return mailing
+
+
+def get_bulk_mailing_progress(mailing):
+    """
+    Return the number of chunks of the given bulk mailing, the number of sent
+    and failed chunks and the number of recipients of the sent chunks.
+    """
+    progress = QueuedEmail.objects.filter(mailing=mailing).aggregate(
+        chunks=Count("id"),
+        chunks_sent=Count("id", filter=Q(sent__isnull=False)),
+        chunks_failed=Count("id", filter=Q(failed=True)),
+        recipients_sent=Sum("recipient_count", filter=Q(sent__isnull=False)),
+    )
+    progress["recipients_sent"] = progress["recipients_sent"] or 0
+    return progress
+
+
+def send_bulk_mailing(mailing, rate_limit=None):
+    """
+    Send the pending chunks of the given bulk mailing via one connection.
+    The chunks are claimed in batches like those of the mail queue and the
+    result of every chunk is recorded right after it has been sent, calling
+    this function again after an interruption sends the remaining chunks.
+    Failed chunks are retried by later calls once their retry is due.
+
+    Return a dictionary with the number of chunks and recipients sent by this
+    call, the number of chunks that could not be sent, the elapsed seconds and
+    the throughput in recipients per second.
+    """
+    if rate_limit is None:
+        rate_limit = settings.MAIL_RATE_LIMIT
+    report = {"chunks_sent": 0, "chunks_failed": 0, "recipients_sent": 0}
+    rate_limiter = RateLimiter(rate_limit)
+    pending = QueuedEmail.objects.filter(mailing=mailing)
+    with get_connection() as connection:
+        while True:
+            chunks = claim_queued_emails(pending, settings.MAIL_QUEUE_BATCH_SIZE)
+            if not chunks:
+                break
+            for chunk in chunks:
+                if deliver_queued_email(chunk, connection, rate_limiter):
+                    report["chunks_sent"] += 1
+                    report["recipients_sent"] += chunk.recipient_count
+                else:
+                    report["chunks_failed"] += 1
+    report["seconds"] = time.monotonic() - rate_limiter.started
+    report["recipients_per_second"] = (
+        report["recipients_sent"] / report["seconds"] if report["seconds"] else 0
+    )
+    logger.info(
+        "sent %d of %d recipients of bulk mailing %d in %.1f seconds (%.1f/s)",
+        report["recipients_sent"],
+        mailing.recipient_count,
+        mailing.id,
+        report["seconds"],
+        report["recipients_per_second"],
+    )
+    return report
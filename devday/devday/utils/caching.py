@@ -0,0 +1,68 @@
+"""Keep derived data in the Django cache under versioned keys
+
+Every cached value belongs to a namespace. The namespace has a version token
+that is part of the cache key of all its values. Invalidating a namespace
+drops the version token, so stale values are never read again and expire on
+their own.
+
+Values computed inside a transaction might never be committed. They are
+therefore neither read from nor written to the shared cache.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+_missing = object()
+
+
+def cache_enabled(using=None):
+    """
+    Return whether the shared cache may be used on the given database
+    connection.
+    """
+    return not transaction.get_connection(using).in_atomic_block
+
+
+def _version_key(namespace):
+    return "{}:version".format(namespace)
+
+
+def get_version(namespace):
+    """
+    Return the current version token of the given namespace, creating a new
+    one if there is none.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(namespace, using=None):
+    """
+    Invalidate all values of the given namespace. The version token is dropped
+    immediately and once more when the current transaction is committed to
+    avoid caching data that has been read before the commit.
+    """
+    key = _version_key(namespace)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=using)
+
+
+def get_or_build(namespace, builder, timeout, name="value"):
+    """
+    Return the cached value with the given name from the given namespace. If
+    the value is not cached yet it is computed by calling builder.
+    """
+    if not cache_enabled():
+        return builder()
+    key = "{}:{}:{}".format(namespace, get_version(namespace), name)
+    # None is a valid value that is cached like any other
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
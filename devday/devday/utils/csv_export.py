@@ -0,0 +1,72 @@
+"""
+Streaming CSV exports.
+
+The rows of an export are written one at a time while the response is sent to
+the client. The queryset is read in chunks, so neither the query result nor the
+CSV file is ever held completely in memory.
+
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from django.views.generic.list import BaseListView
+
+CSV_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_datetime(value):
+    return value.strftime(CSV_DATE_FORMAT) if value else ""
+
+
+class Echo:
+    """
+    File like object that returns written values instead of storing them.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header=None, delimiter=";"):
+    """
+    Generate the CSV encoded lines of the given header and rows.
+    """
+    writer = csv.writer(Echo(), delimiter=delimiter)
+    if header is not None:
+        yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+class StreamingCSVView(BaseListView):
+    """
+    Base view for CSV exports of the objects returned by get_queryset.
+
+    Subclasses define the csv_filename, the csv_header and the csv_fields that
+    are fetched from the database via values_list. Rows can be converted before
+    they are written by overriding format_row.
+    """
+
+    csv_filename = None
+    csv_header = ()
+    csv_fields = ()
+    chunk_size = 2000
+
+    def get_rows(self, queryset):
+        return queryset.values_list(*self.csv_fields).iterator(
+            chunk_size=self.chunk_size
+        )
+
+    def format_row(self, row):
+        return row
+
+    def render_to_response(self, context):
+        rows = map(self.format_row, self.get_rows(context["object_list"]))
+        response = StreamingHttpResponse(
+            stream_csv(rows, header=self.csv_header),
+            content_type="txt/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = "attachment; filename={}".format(
+            self.csv_filename
+        )
+        return response
@@ -403,6 +403,7 @@ wir unterstützen gern. Denn wir freuen uns über vielfältige Einreichungen!</p
         if length > amount:
             length = amount
         self.write_action("{:d} attendees".format(length))
+        attendees = []
         for first_name in FIRST_NAMES:
             for last_name in LAST_NAMES:
                 user = User.objects.create_user(
@@ -412,10 +413,13 @@ wir unterstützen gern. Denn wir freuen uns über vielfältige Einreichungen!</p
                 )
                 for e in events:
                     if self.rng.random() < 0.8:
-                        Attendee.objects.create(user=user, event=e)
+                        attendees.append(Attendee(user=user, event=e))
                 amount -= 1
                 if amount <= 0:
-                    return
+                    break
+            if amount <= 0:
+                break
+        Attendee.objects.bulk_create(attendees)
 
     def get_name_from_email(self, email):
         m = re.match(r"^([^.]+)\.([^@]+)@.*$", email)
@@ -3,17 +3,121 @@
 In addition to creating a text-only version and using multipart/alternative,
 find img tags and convert the URL src to an embedded base64 representation of
 the image.
+
+Images below MEDIA_URL and STATIC_URL (including filer files) are read from
+disk, other images are fetched concurrently. Fetched images are cached by
+their content hash for MAIL_IMAGE_CACHE_TIMEOUT seconds, so previews and real
+sends of the same mail do not fetch them again.
 """
 
+import logging
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.image import MIMEImage
+from hashlib import sha256
+from urllib.parse import unquote, urlparse
 from urllib.request import urlopen
 
 from bs4 import BeautifulSoup
 from django.conf import settings
+from django.contrib.sites.models import Site
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
 from django.core.mail import EmailMultiAlternatives
 from django.utils.translation import ugettext_lazy as _
 from html2text import HTML2Text
 
+IMAGE_CACHE_PREFIX = 'html_mail_image'
+
+logger = logging.getLogger(__name__)
+
+
+def _url_cache_key(url):
+    return '{}_url_{}'.format(
+        IMAGE_CACHE_PREFIX, sha256(url.encode('utf-8')).hexdigest())
+
+
+def _content_cache_key(digest):
+    return '{}_content_{}'.format(IMAGE_CACHE_PREFIX, digest)
+
+
+def _local_image_path(url):
+    parsed = urlparse(url)
+    if parsed.netloc and parsed.netloc != Site.objects.get_current().domain:
+        return None
+    path = unquote(parsed.path)
+    if path.startswith(settings.MEDIA_URL):
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        name = os.path.abspath(
+            os.path.join(root, path[len(settings.MEDIA_URL):]))
+        if name.startswith(root + os.sep) and os.path.isfile(name):
+            return name
+    elif path.startswith(settings.STATIC_URL):
+        return finders.find(path[len(settings.STATIC_URL):])
+    return None
+
+
+def _read_local_image(path):
+    content_type, _ = mimetypes.guess_type(path)
+    if content_type is None or not content_type.startswith('image/'):
+        return None
+    with open(path, 'rb') as f:
+        return content_type.split('/')[1], f.read()
+
+
+def _get_cached_image(url):
+    digest = cache.get(_url_cache_key(url))
+    if digest is None:
+        return None
+    return cache.get(_content_cache_key(digest))
+
+
+def _cache_image(url, image):
+    digest = sha256(image[1]).hexdigest()
+    cache.set_many({
+        _url_cache_key(url): digest,
+        _content_cache_key(digest): image,
+    }, settings.MAIL_IMAGE_CACHE_TIMEOUT)
+
+
+def _fetch_remote_image(url):
+    try:
+        with urlopen(
+                url, timeout=settings.MAIL_IMAGE_FETCH_TIMEOUT) as response:
+            subtype = response.getheader('Content-type').split('/')[1]
+            return subtype, response.read()
+    except Exception as e:
+        logger.warning('could not fetch image %s for HTML mail: %s', url, e)
+        return None
+
+
+def load_images(urls):
+    """
+    Return a dictionary mapping the given image URLs to tuples of the image
+    subtype and data. Images that cannot be loaded are mapped to None.
+    """
+    images = {}
+    remote_urls = []
+    for url in urls:
+        path = _local_image_path(url)
+        if path is not None:
+            images[url] = _read_local_image(path)
+            continue
+        images[url] = _get_cached_image(url)
+        if images[url] is None:
+            remote_urls.append(url)
+    if remote_urls:
+        with ThreadPoolExecutor(max_workers=min(
+                len(remote_urls),
+                settings.MAIL_IMAGE_FETCH_WORKERS)) as executor:
+            for url, image in zip(
+                    remote_urls, executor.map(_fetch_remote_image, remote_urls)):
+                images[url] = image
+                if image is not None:
+                    _cache_image(url, image)
+    return images
+
 
 class DevDayEmailMessage(EmailMultiAlternatives):
     def __init__(self, *args, **kwargs):
@@ -25,16 +129,22 @@ class DevDayEmailMessage(EmailMultiAlternatives):
 
     def attach_html(self, html):
         soup = BeautifulSoup(html, 'lxml')
-        i = 0
-        for tag in soup.findAll('img'):
-            url = tag['src']
-            with urlopen(url) as response:
-                subtype = response.getheader('Content-type').split('/')[1]
-                img = MIMEImage(response.read(), subtype)
-                img.add_header('Content-ID', f'image-{i}')
-                self.attach(img)
-                tag['src'] = f'cid:image-{i}'
-                i += 1
+        tags = [tag for tag in soup.findAll('img') if tag.get('src')]
+        urls = list(dict.fromkeys(tag['src'] for tag in tags))
+        images = load_images(urls)
+        content_ids = {}
+        for url in urls:
+            if images[url] is None:
+                continue
+            subtype, data = images[url]
+            content_id = f'image-{len(content_ids)}'
+            img = MIMEImage(data, subtype)
+            img.add_header('Content-ID', content_id)
+            self.attach(img)
+            content_ids[url] = content_id
+        for tag in tags:
+            if tag['src'] in content_ids:
+                tag['src'] = f'cid:{content_ids[tag["src"]]}'
         self.attach_alternative(str(soup), 'text/html')
 
 
@@ -0,0 +1,283 @@
+"""
+Queue outgoing mail in the database and send it from a background job.
+
+Mails are queued in the same transaction as the changes that cause them and
+are therefore only sent if that transaction is committed. The sender delivers
+up to MAIL_QUEUE_BATCH_SIZE mails via one SMTP connection and retries mails
+that could not be sent with an exponentially growing delay.
+
+A batch is claimed in a short transaction that moves the next attempt of its
+mails MAIL_QUEUE_CLAIM_TIMEOUT seconds ahead, so no transaction or row lock
+is held while talking to the mail server. The result of every mail is
+recorded right after it has been sent. If the sender crashes, the mails whose
+result has not been recorded are sent again once their claim has expired.
+
+Queued mails are stored as their MIME representation together with the
+envelope sender and recipients and are sent exactly as they were rendered
+when they were queued.
+
+If MAIL_QUEUE_ENABLED is not set mails are sent immediately.
+"""
+import email
+import logging
+import time
+from datetime import timedelta
+from email.message import Message
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.message import MIMEMixin
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from devday.apps import get_scheduler
+from devday.models import QueuedEmail
+
+MAIL_QUEUE_JOB_ID = "send_queued_mail"
+
+logger = logging.getLogger(__name__)
+
+_mail_queue_job = None
+
+
+class QueuedMIMEMessage(MIMEMixin, Message):
+    pass
+
+
+class QueuedEmailMessage(EmailMessage):
+    """
+    An email message that sends the stored MIME representation of a queued
+    email to its stored envelope recipients.
+    """
+
+    def __init__(self, queued_email, connection=None):
+        super().__init__(
+            subject=queued_email.subject,
+            from_email=queued_email.from_email,
+            connection=connection,
+        )
+        self.data = bytes(queued_email.message)
+        self.envelope_recipients = queued_email.recipients.split()
+
+    def recipients(self):
+        return self.envelope_recipients
+
+    def message(self):
+        return email.message_from_bytes(self.data, _class=QueuedMIMEMessage)
+
+
+def get_queued_email_fields(message):
+    """
+    Return the envelope and MIME representation of the given email message as
+    QueuedEmail field values.
+    """
+    recipients = message.recipients()
+    return {
+        "subject": str(message.subject)[:255],
+        "from_email": message.from_email,
+        "recipients": "\n".join(recipients),
+        "recipient_count": len(recipients),
+        "message": message.message().as_bytes(),
+    }
+
+
+def queue_mail(message):
+    """
+    Queue the given email message. Return the QueuedEmail instance or None if
+    the mail queue is disabled and the message has been sent immediately.
+    """
+    if not settings.MAIL_QUEUE_ENABLED:
+        message.send()
+        return None
+    queued_email = QueuedEmail.objects.create(**get_queued_email_fields(message))
+    wake_mail_queue()
+    return queued_email
+
+
+def wake_mail_queue():
+    """
+    Run the mail queue job of this process as soon as the current transaction
+    has been committed.
+    """
+    if _mail_queue_job is not None:
+        transaction.on_commit(
+            lambda: _mail_queue_job.modify(next_run_time=timezone.now())
+        )
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _record_failure(queued_email, error, now):
+    queued_email.attempts += 1
+    queued_email.last_error = str(error)
+    if queued_email.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        queued_email.failed = True
+        logger.error(
+            "giving up sending queued email %d after %d attempts: %s",
+            queued_email.id,
+            queued_email.attempts,
+            error,
+        )
+    else:
+        queued_email.next_attempt = now + get_retry_delay(queued_email.attempts)
+        logger.warning(
+            "could not send queued email %d, retrying at %s: %s",
+            queued_email.id,
+            queued_email.next_attempt,
+            error,
+        )
+    queued_email.save(
+        update_fields=["attempts", "last_error", "failed", "next_attempt", "modified"]
+    )
+
+
+class RateLimiter:
+    """
+    Keep the number of recipients per second below the given rate. A rate of
+    0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.recipients = 0
+        self.started = time.monotonic()
+
+    def wait(self, recipients):
+        self.recipients += recipients
+        if not self.rate:
+            return
+        delay = self.recipients / self.rate - (time.monotonic() - self.started)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def claim_queued_emails(queued_emails, limit):
+    """
+    Claim up to limit of the due, unsent mails of the given queryset for
+    sending and return them. Mails that are claimed or locked by a concurrent
+    sender are skipped.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        claimed = list(
+            queued_emails.select_for_update(skip_locked=True)
+            .filter(sent__isnull=True, failed=False, next_attempt__lte=now)
+            .order_by("next_attempt", "id")[:limit]
+        )
+        if claimed:
+            claimed_until = now + timedelta(seconds=settings.MAIL_QUEUE_CLAIM_TIMEOUT)
+            QueuedEmail.objects.filter(
+                pk__in=[queued_email.pk for queued_email in claimed]
+            ).update(next_attempt=claimed_until)
+            for queued_email in claimed:
+                queued_email.next_attempt = claimed_until
+    return claimed
+
+
+def deliver_queued_email(queued_email, connection, rate_limiter=None):
+    """
+    Send the given queued email via the given connection and record the
+    result. The email must have been claimed by claim_queued_emails. Return
+    True if the email has been sent.
+    """
+    if rate_limiter is not None:
+        rate_limiter.wait(queued_email.recipient_count)
+    try:
+        QueuedEmailMessage(queued_email, connection).send()
+    except Exception as e:
+        _record_failure(queued_email, e, timezone.now())
+        return False
+    queued_email.attempts += 1
+    queued_email.sent = timezone.now()
+    queued_email.save(update_fields=["attempts", "sent", "modified"])
+    return True
+
+
+def send_queued_mail(batch_size=None):
+    """
+    Send the queued mails that are due via one connection of the configured
+    email backend. Mails that are claimed by a concurrent run are skipped.
+
+    Return a tuple of the number of sent mails and the number of mails that
+    could not be sent.
+    """
+    if batch_size is None:
+        batch_size = settings.MAIL_QUEUE_BATCH_SIZE
+    sent = failed = 0
+    queued_emails = claim_queued_emails(QueuedEmail.objects.all(), batch_size)
+    if not queued_emails:
+        return sent, failed
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        now = timezone.now()
+        for queued_email in queued_emails:
+            _record_failure(queued_email, e, now)
+        return sent, len(queued_emails)
+    rate_limiter = RateLimiter(settings.MAIL_RATE_LIMIT)
+    try:
+        for queued_email in queued_emails:
+            if deliver_queued_email(queued_email, connection, rate_limiter):
+                sent += 1
+            else:
+                failed += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def get_queue_statistics():
+    """
+    Return the number of queued, due, retried, given up and delivered mails
+    and the creation time of the oldest queued mail.
+    """
+    waiting = Q(sent__isnull=True, failed=False)
+    return QueuedEmail.objects.aggregate(
+        queued=Count("id", filter=waiting),
+        due=Count("id", filter=waiting & Q(next_attempt__lte=timezone.now())),
+        retrying=Count("id", filter=waiting & Q(attempts__gt=0)),
+        given_up=Count("id", filter=Q(failed=True)),
+        delivered=Count("id", filter=Q(sent__isnull=False)),
+        oldest_queued=Min("created", filter=waiting),
+    )
+
+
+def purge_sent_mail(days):
+    """
+    Delete mails that have been sent more than the given number of days ago.
+    Return the number of deleted mails.
+    """
+    deleted, _ = QueuedEmail.objects.filter(
+        sent__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
+
+
+def run_mail_queue_job():
+    close_old_connections()
+    try:
+        while True:
+            sent, failed = send_queued_mail()
+            if sent + failed < settings.MAIL_QUEUE_BATCH_SIZE:
+                break
+    except Exception:
+        logger.exception("mail queue job failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_mail_queue():
+    global _mail_queue_job
+    _mail_queue_job = get_scheduler().add_job(
+        run_mail_queue_job,
+        "interval",
+        seconds=settings.MAIL_QUEUE_INTERVAL,
+        id=MAIL_QUEUE_JOB_ID,
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
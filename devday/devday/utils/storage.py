@@ -0,0 +1,107 @@
+"""
+File system storage that keeps one copy of identical files.
+
+"""
+import os
+from hashlib import sha256
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedFileSystemStorage(FileSystemStorage):
+    """
+    Store the content of files below CONTENT_DIRECTORY named by their SHA-256
+    hash. The names used by models are hard links to the content files, so
+    saving or copying a file with known content does not write its bytes
+    again. If hard links are not supported files are stored as copies.
+    """
+
+    CONTENT_DIRECTORY = ".content"
+
+    def content_name(self, digest):
+        return os.path.join(self.CONTENT_DIRECTORY, digest[:2], digest)
+
+    def _link(self, source_path, name):
+        """
+        Create a hard link to source_path at an available name based on name
+        and return that name.
+        """
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        while True:
+            try:
+                os.link(source_path, self.path(name))
+                return name
+            except FileExistsError:
+                name = self.get_available_name(name)
+
+    def _save(self, name, content):
+        digest = sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content_name = self.content_name(digest.hexdigest())
+        if not self.exists(content_name):
+            content.seek(0)
+            content_name = super()._save(content_name, content)
+        try:
+            return self._link(self.path(content_name), name)
+        except OSError:
+            content.seek(0)
+            return super()._save(name, content)
+
+    def copy(self, source_storage, source_name, name):
+        """
+        Copy the file source_name of source_storage to an available name based
+        on name. Files in the same file system are linked instead of copied.
+        Return the name of the new file.
+        """
+        name = self.get_available_name(name)
+        try:
+            return self._link(source_storage.path(source_name), name)
+        except (NotImplementedError, OSError):
+            with source_storage.open(source_name) as source:
+                return self.save(name, source)
+
+    def deduplicate(self, name):
+        """
+        Replace the file name by a link to the content file with the same
+        content. Return the number of bytes that have been freed.
+        """
+        path = self.path(name)
+        digest = sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+        content_path = self.path(self.content_name(digest.hexdigest()))
+        if not os.path.exists(content_path):
+            os.makedirs(os.path.dirname(content_path), exist_ok=True)
+            os.link(path, content_path)
+            return 0
+        if os.path.samefile(path, content_path):
+            return 0
+        stat = os.stat(path)
+        temp_path = "{}.dedup".format(path)
+        os.link(content_path, temp_path)
+        os.replace(temp_path, path)
+        return stat.st_size if stat.st_nlink == 1 else 0
+
+    def purge_content(self):
+        """
+        Delete content files that are not linked by any name. Return the number
+        of bytes that have been freed.
+        """
+        freed = 0
+        content_root = self.path(self.CONTENT_DIRECTORY)
+        for directory, _, filenames in os.walk(content_root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                if stat.st_nlink == 1:
+                    os.remove(path)
+                    freed += stat.st_size
+        return freed
+
+
+content_addressed_storage = ContentAddressedFileSystemStorage()
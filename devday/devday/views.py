@@ -10,7 +10,9 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic.edit import FormView
 
 from attendee.views import StaffUserMixin
+from devday.utils.bulk_mail import create_bulk_mailing, send_bulk_mailing
 from devday.utils.html_mail import create_html_mail
+from devday.utils.mail_queue import queue_mail
 from event.models import Event
 from speaker.models import PublishedSpeaker, Speaker
 from talk.models import Attendee
@@ -160,16 +162,30 @@ class SendEmailView(StaffUserMixin, SuccessMessageMixin, FormView):
             label = self.choices.get_choice_label(recipients)
         if form.cleaned_data.get("sendreal"):
             if form.cleaned_data["recipients_file"]:
-                msg.recipientlist = get_recipient_list_from_file(
+                recipient_list = get_recipient_list_from_file(
                     form.cleaned_data["recipients_file"]
                 )
             else:
-                msg.recipientlist = self.choices.get_email_addresses(recipients)
-            msg.recipientlist += [settings.DEFAULT_FROM_EMAIL]
+                recipient_list = self.choices.get_email_addresses(recipients)
+            recipient_list += [settings.DEFAULT_FROM_EMAIL]
+            mailing = create_bulk_mailing(msg, recipient_list)
+            if settings.MAIL_QUEUE_ENABLED:
+                self.success_message = _(
+                    "Successfully queued message to {} {} recipients"
+                ).format(len(recipient_list), label)
+                return super().form_valid(form)
+            report = send_bulk_mailing(mailing)
             self.success_message = _(
                 "Successfully sent message to {} {} recipients"
-            ).format(len(msg.recipientlist), label)
-            msg.send()
+            ).format(report["recipients_sent"], label)
+            if report["chunks_failed"]:
+                messages.warning(
+                    self.request,
+                    _(
+                        "{} messages could not be sent, use the send_queued_mail"
+                        " command to retry them"
+                    ).format(report["chunks_failed"]),
+                )
             return super().form_valid(form)
         else:
             msg.recipientlist = (self.request.user.email,)
@@ -177,5 +193,5 @@ class SendEmailView(StaffUserMixin, SuccessMessageMixin, FormView):
                 "Successfully sent message for {} to yourself"
             ).format(label)
             messages.success(self.request, self.success_message)
-            msg.send()
+            queue_mail(msg)
             return self.render_to_response(self.get_context_data(form=form))
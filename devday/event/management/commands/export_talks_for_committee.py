@@ -7,9 +7,9 @@ import argparse
 import csv
 
 from django.core.management import BaseCommand
-from django.db.models import Avg, Count
 
 from event.models import Event
+from talk.export import get_session_summary
 
 
 class Command(BaseCommand):
@@ -24,13 +24,9 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        talks = (
-            Event.objects.current_event()
-            .talk_set.all()
-            .prefetch_related("talkcomment_set")
-            .annotate(num_votes=Count("vote"), avg_votes=Avg("vote__score"))
-            .order_by("-avg_votes", "title")
-        )
+        talks = get_session_summary(
+            Event.objects.current_event(), comment_order="created"
+        ).order_by("-avg_score", "title")
 
         if not talks.exists():
             self.stderr.write("No talks found for current event")
@@ -50,11 +46,11 @@ class Command(BaseCommand):
                 t.title,
                 t.abstract,
                 t.num_votes,
-                t.avg_votes,
+                t.avg_score,
                 "\n".join(
                     [
                         f"{v.created} {v.commenter.email}: {v.comment}"
-                        for v in t.talkcomment_set.order_by("created").all()
+                        for v in t.summary_comments
                     ]
                 ),
             )
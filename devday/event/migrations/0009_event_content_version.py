@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_event_content_versions(apps, schema_editor):
+    Event = apps.get_model('event', 'Event')
+    EventContentVersion = apps.get_model('event', 'EventContentVersion')
+
+    db_alias = schema_editor.connection.alias
+    EventContentVersion.objects.using(db_alias).bulk_create(
+        EventContentVersion(event_id=event_id) for event_id in
+        Event.objects.using(db_alias).values_list('id', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0008_event_online_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventContentVersion',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content_version', serialize=False, to='event.Event', verbose_name='Event')),
+                ('version', models.PositiveIntegerField(default=1, verbose_name='Version')),
+                ('modified', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Modified')),
+            ],
+            options={
+                'verbose_name': 'Event content version',
+                'verbose_name_plural': 'Event content versions',
+            },
+        ),
+        migrations.RunPython(
+            create_event_content_versions, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,60 @@
+import threading
+
 from django.apps import apps
+from django.conf import settings
+from django.core.signals import request_finished, request_started
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
+from devday.utils import caching
+
+CURRENT_EVENT_CACHE_NAMESPACE = "event:current"
+
+# the current event is remembered for the duration of a request
+_request_memo = threading.local()
+
+
+@receiver(request_started, dispatch_uid="event_start_current_event_memo")
+def start_current_event_memo(sender, **kwargs):
+    _request_memo.events = {}
+
+
+@receiver(request_finished, dispatch_uid="event_end_current_event_memo")
+def end_current_event_memo(sender, **kwargs):
+    _request_memo.events = None
+
 
 class EventManager(models.Manager):
-    def current_event(self):
+    def _find_current_event(self):
         return self.filter(published=True).order_by("-start_time").first()
 
+    def current_event(self):
+        """
+        Return the published event with the latest start time.
+
+        The event is remembered until the end of the current request and is
+        kept in the cache of the process for a short time. Changes to any
+        event invalidate both in the process that made the change, other
+        processes see the change when their cached event expires.
+        """
+        memo = getattr(_request_memo, "events", None)
+        if memo is not None and "current" in memo:
+            return memo["current"]
+        event = caching.get_or_build(
+            CURRENT_EVENT_CACHE_NAMESPACE,
+            self._find_current_event,
+            settings.EVENT_CURRENT_EVENT_CACHE_TIMEOUT,
+        )
+        if memo is not None:
+            memo["current"] = event
+        return event
+
     def current_event_id(self):
         e = self.current_event()
         if e:
@@ -113,3 +158,69 @@ class Event(models.Model):
 
     def __str__(self):
         return self.title
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_current_event(sender, **kwargs):
+    memo = getattr(_request_memo, "events", None)
+    if memo is not None:
+        memo.clear()
+    caching.invalidate(CURRENT_EVENT_CACHE_NAMESPACE)
+
+
+class EventContentVersionManager(models.Manager):
+    def bump(self, event_ids):
+        """
+        Increment the content versions of the events with the given ids.
+        """
+        event_ids = {event_id for event_id in event_ids if event_id is not None}
+        if event_ids:
+            self.filter(event_id__in=event_ids).update(
+                version=F("version") + 1, modified=timezone.now()
+            )
+
+    def get_for_event(self, event_id):
+        """
+        Return the content version of the event with the given id.
+        """
+        try:
+            return self.get(event_id=event_id)
+        except self.model.DoesNotExist:
+            return self.get_or_create(event_id=event_id)[0]
+
+
+class EventContentVersion(models.Model):
+    """
+    Version of the public content of an event. The version is incremented
+    whenever the event, its sessions, their speakers or its schedule change,
+    so clients can find out whether their copy is still current without
+    loading the content.
+    """
+
+    event = models.OneToOneField(
+        Event,
+        verbose_name=_("Event"),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="content_version",
+    )
+    version = models.PositiveIntegerField(verbose_name=_("Version"), default=1)
+    modified = models.DateTimeField(verbose_name=_("Modified"), default=timezone.now)
+
+    objects = EventContentVersionManager()
+
+    class Meta:
+        verbose_name = _("Event content version")
+        verbose_name_plural = _("Event content versions")
+
+    def __str__(self):
+        return "{} ({})".format(self.event, self.version)
+
+
+@receiver(post_save, sender=Event)
+def update_event_content_version(sender, instance, created, **kwargs):
+    if created:
+        EventContentVersion.objects.get_or_create(event=instance)
+    else:
+        EventContentVersion.objects.bump([instance.pk])
@@ -1,13 +1,20 @@
 from datetime import timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.utils import timezone
 
 from attendee.models import Attendee
 from devday.utils.devdata import DevData
-from event.models import Event
+from event.models import (
+    Event,
+    EventContentVersion,
+    end_current_event_memo,
+    start_current_event_memo,
+)
 from event.tests import event_testutils
 
 from .event_testutils import unpublish_all_events
@@ -89,6 +96,70 @@ class EventManagerTest(TestCase):
         self.assertFalse(event.feedback_open)
 
 
+class CurrentEventCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        unpublish_all_events()
+        event_testutils.create_test_event("Current event")
+
+    def tearDown(self):
+        end_current_event_memo(sender=None)
+        cache.clear()
+
+    def test_current_event_memoized_per_request(self):
+        start_current_event_memo(sender=None)
+        event = Event.objects.current_event()
+        with self.assertNumQueries(0):
+            self.assertIs(Event.objects.current_event(), event)
+            self.assertEqual(Event.objects.current_event_id(), event.id)
+        end_current_event_memo(sender=None)
+        with self.assertNumQueries(1):
+            self.assertEqual(Event.objects.current_event(), event)
+
+    def test_current_event_not_memoized_outside_request(self):
+        Event.objects.current_event()
+        with self.assertNumQueries(1):
+            Event.objects.current_event()
+
+    def test_memo_cleared_on_event_save(self):
+        start_current_event_memo(sender=None)
+        event = Event.objects.current_event()
+        new_event = event_testutils.create_test_event(
+            "Newer event", start_time=event.start_time + timedelta(days=1)
+        )
+        self.assertEqual(Event.objects.current_event(), new_event)
+
+    def test_memo_cleared_on_event_delete(self):
+        start_current_event_memo(sender=None)
+        event = Event.objects.current_event()
+        new_event = event_testutils.create_test_event(
+            "Newer event", start_time=event.start_time + timedelta(days=1)
+        )
+        self.assertEqual(Event.objects.current_event(), new_event)
+        new_event.delete()
+        self.assertEqual(Event.objects.current_event(), event)
+
+    @mock.patch("devday.utils.caching.cache_enabled", return_value=True)
+    def test_current_event_shared_via_cache(self, _):
+        event = Event.objects.current_event()
+        with self.assertNumQueries(0):
+            self.assertEqual(Event.objects.current_event(), event)
+
+    @mock.patch("devday.utils.caching.cache_enabled", return_value=True)
+    def test_cache_invalidated_on_event_save(self, _):
+        event = Event.objects.current_event()
+        event.title = "Changed title"
+        event.save()
+        self.assertEqual(Event.objects.current_event().title, "Changed title")
+
+    @mock.patch("devday.utils.caching.cache_enabled", return_value=True)
+    def test_cache_with_no_current_event(self, _):
+        unpublish_all_events()
+        self.assertIsNone(Event.objects.current_event())
+        with self.assertNumQueries(0):
+            self.assertIsNone(Event.objects.current_event())
+
+
 class EventTest(TestCase):
     def test_without_slug(self):
         event = Event(
@@ -192,3 +263,43 @@ class EventTest(TestCase):
             end_time=now - timedelta(hours=1),
         )
         self.assertFalse(event.is_raffle_available())
+
+
+class EventContentVersionTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event("Test event")
+
+    def test_created_with_event(self):
+        version = EventContentVersion.objects.get(event=self.event)
+        self.assertEqual(version.version, 1)
+        self.assertEqual(str(version), "Test event (1)")
+
+    def test_bumped_on_event_save(self):
+        modified = EventContentVersion.objects.get(event=self.event).modified
+        self.event.save()
+        version = EventContentVersion.objects.get(event=self.event)
+        self.assertEqual(version.version, 2)
+        self.assertGreaterEqual(version.modified, modified)
+
+    def test_bump(self):
+        other = event_testutils.create_test_event("Other event")
+        with self.assertNumQueries(1):
+            EventContentVersion.objects.bump([self.event.id, other.id, None])
+        EventContentVersion.objects.bump([])
+        self.assertEqual(
+            dict(
+                EventContentVersion.objects.filter(
+                    event__in=[self.event, other]
+                ).values_list("event_id", "version")
+            ),
+            {self.event.id: 2, other.id: 2},
+        )
+
+    def test_get_for_event_creates_missing_version(self):
+        EventContentVersion.objects.filter(event=self.event).delete()
+        version = EventContentVersion.objects.get_for_event(self.event.id)
+        self.assertEqual(version.version, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                EventContentVersion.objects.get_for_event(self.event.id), version
+            )
@@ -0,0 +1,124 @@
+"""
+Conditional GET for the public pages of an event.
+
+Pages for anonymous users only change when the content version of their
+event is bumped, when the CMS content shown on every page like the navigation
+and the sponsors changes, when another event becomes the current event or
+when the event starts or ends. The ETag and Last-Modified headers are derived from
+these, so repeated requests and revalidations by a reverse proxy are answered
+with a 304 response without rendering the page.
+
+"""
+from hashlib import sha1
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from devday.models import SiteContentVersion
+from event.models import Event, EventContentVersion
+
+
+class EventContentConditionalMixin(object):
+    """
+    Mixin for views of the public content of the event in self.event that
+    answers conditional GET requests of anonymous users and marks their
+    responses as cacheable. Responses for authenticated users are personal
+    and private. Views that render no CMS content set
+    content_includes_site_content to False.
+    """
+
+    content_etag_weak = True
+    content_includes_site_content = True
+    content_versions = None
+    site_content_version = None
+
+    def get_content_versions(self):
+        event_ids = [self.event.id]
+        current_event = Event.objects.current_event()
+        if current_event is not None and current_event.id != self.event.id:
+            event_ids.append(current_event.id)
+        return [
+            EventContentVersion.objects.get_for_event(event_id)
+            for event_id in event_ids
+        ]
+
+    def get_site_content_version(self):
+        if self.site_content_version is None:
+            self.site_content_version = SiteContentVersion.objects.get_current()
+        return self.site_content_version
+
+    def get_content_etag_parts(self):
+        """
+        Return the values that the content of the page depends on apart from
+        the content versions.
+        """
+        current_event = Event.objects.current_event()
+        parts = [
+            current_event and (current_event.id, current_event.feedback_open),
+            self.event.is_started(),
+            self.event.has_ended(),
+            self.request.LANGUAGE_CODE,
+            self.request.get_full_path(),
+        ]
+        if self.content_includes_site_content:
+            parts.append(self.get_site_content_version().version)
+        return parts
+
+    def get_content_timestamps(self):
+        """
+        Return the times at which the content of the page changed apart from
+        the times of the content versions.
+        """
+        now = timezone.now()
+        timestamps = [
+            timestamp
+            for timestamp in (self.event.start_time, self.event.end_time)
+            if timestamp <= now
+        ]
+        if self.content_includes_site_content:
+            timestamps.append(self.get_site_content_version().modified)
+        return timestamps
+
+    def get_content_etag(self, versions):
+        etag = sha1(
+            repr(
+                (
+                    [(version.event_id, version.version) for version in versions],
+                    self.get_content_etag_parts(),
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+        if self.content_etag_weak:
+            return 'W/"{}"'.format(etag)
+        return etag
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated or self.event is None:
+            response = super().get(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            return response
+
+        self.content_versions = versions = self.get_content_versions()
+        etag = self.get_content_etag(versions)
+        last_modified = max(
+            [version.modified for version in versions]
+            + self.get_content_timestamps()
+        )
+
+        # noinspection PyUnusedLocal
+        def render(request, *args, **kwargs):
+            return super(EventContentConditionalMixin, self).get(
+                request, *args, **kwargs
+            )
+
+        response = condition(
+            etag_func=lambda *args, **kwargs: etag,
+            last_modified_func=lambda *args, **kwargs: last_modified,
+        )(render)(request, *args, **kwargs)
+        patch_cache_control(
+            response, public=True, max_age=settings.EVENT_CONTENT_CACHE_MAX_AGE
+        )
+        patch_vary_headers(response, ["Cookie"])
+        return response
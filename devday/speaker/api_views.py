@@ -3,18 +3,30 @@ from rest_framework import serializers, viewsets
 from speaker.models import Speaker
 
 
+def get_image_variant_urls(instance, shape, request=None):
+    variants = instance.get_image_variants(shape)
+    if request is not None:
+        for variant in variants:
+            variant["url"] = request.build_absolute_uri(variant["url"])
+    return variants
+
+
 class SpeakerSerializer(serializers.HyperlinkedModelSerializer):
     id = serializers.CharField(source="slug")
     image = serializers.ImageField(source="public_image", use_url=True, allow_null=False, allow_empty_file=False)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Speaker
-        fields = ["id", "url", "name", "short_biography", "position", "image"]
+        fields = ["id", "url", "name", "short_biography", "position", "image", "image_variants"]
         lookup_field = "slug"
         extra_kwargs = {
             "url": {'lookup_field': 'slug'}
         }
 
+    def get_image_variants(self, instance):
+        return get_image_variant_urls(instance, "public", self.context.get("request"))
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
 
@@ -0,0 +1,147 @@
+"""
+Derive the thumbnail and the public image of speakers from their portrait.
+
+Portraits are named by their content hash (see ValidatedImageField). The name
+of the portrait that the derived images have been created from is stored in
+derived_images_source, so saving a speaker only derives new images when the
+portrait changes. The responsive image variants are named by the SHA-256 hash
+of the portrait content that is stored in portrait_digest, because copies of
+a portrait may be stored under other names.
+
+The images are derived by a pool of SPEAKER_IMAGE_WORKERS background threads
+after the transaction that saved the speaker has been committed. If
+SPEAKER_IMAGE_WORKERS is 0 the images are derived while saving. Other image
+work, like copying the images of speakers that have been published in bulk,
+is run in the same pool by run_in_background.
+
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.SPEAKER_IMAGE_WORKERS,
+            thread_name_prefix="speaker-images",
+        )
+    return _executor
+
+
+def needs_derived_images(instance):
+    return bool(instance.portrait) and (
+        instance.derived_images_source != instance.portrait.name
+        or not instance.portrait_digest
+        or not instance.thumbnail
+        or not instance.public_image
+    )
+
+
+def derive_images_in_background(model, pk, source):
+    """
+    Derive the images of the speaker instance of the given model with the
+    given primary key if its portrait is still the given source.
+    """
+    close_old_connections()
+    try:
+        instance = model._default_manager.filter(pk=pk, portrait=source).first()
+        if instance is None or not needs_derived_images(instance):
+            return
+        instance.derive_images()
+        with transaction.atomic():
+            current = (
+                model._default_manager.select_for_update()
+                .filter(pk=pk, portrait=source)
+                .first()
+            )
+            if current is not None:
+                current.thumbnail = instance.thumbnail.name
+                current.public_image = instance.public_image.name
+                current.derived_images_source = source
+                current.portrait_digest = instance.portrait_digest
+                # saving sends post_save, so cached schedules and content
+                # versions see the new images
+                current.save(
+                    update_fields=[
+                        "thumbnail",
+                        "public_image",
+                        "derived_images_source",
+                        "portrait_digest",
+                    ]
+                )
+        if current is None:
+            # the portrait has been changed meanwhile
+            instance.thumbnail.delete(save=False)
+            instance.public_image.delete(save=False)
+    except Exception:
+        logger.exception("could not derive images for %s %s", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def _run_with_connection(function, *args):
+    close_old_connections()
+    try:
+        function(*args)
+    except Exception:
+        logger.exception("background job %s failed", function.__name__)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(function, *args):
+    """
+    Call function with the given arguments in the image worker pool after the
+    current transaction has been committed. If SPEAKER_IMAGE_WORKERS is 0 the
+    function is called immediately.
+    """
+    if not settings.SPEAKER_IMAGE_WORKERS:
+        function(*args)
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_with_connection, function, *args)
+    )
+
+
+def update_derived_images(instance):
+    """
+    Bring the derived images of the given speaker instance up to date with
+    its portrait. This is called before the instance is saved. Images that
+    are derived in the background are scheduled by schedule_derived_images
+    once the instance has been saved.
+    """
+    if not instance.portrait:
+        if instance.public_image:
+            instance.public_image.delete(save=False)
+        if instance.thumbnail:
+            instance.thumbnail.delete(save=False)
+        instance.derived_images_source = ""
+        instance.portrait_digest = ""
+        return
+    if not needs_derived_images(instance):
+        return
+    if not settings.SPEAKER_IMAGE_WORKERS:
+        instance.derive_images()
+
+
+def schedule_derived_images(instance):
+    """
+    Derive the images of the given speaker instance in the background after
+    the current transaction has been committed if they are not up to date with
+    its portrait. This is called after the instance has been saved, so a new
+    instance already has its primary key.
+    """
+    if not settings.SPEAKER_IMAGE_WORKERS or not needs_derived_images(instance):
+        return
+    model, pk, source = type(instance), instance.pk, instance.portrait.name
+    transaction.on_commit(
+        lambda: get_executor().submit(derive_images_in_background, model, pk, source)
+    )
@@ -0,0 +1,31 @@
+"""
+Implement a management command to replace identical speaker image files by
+links to one file in the content addressed storage.
+"""
+from django.core.management import BaseCommand
+
+from devday.utils.storage import content_addressed_storage
+from speaker.models import PublishedSpeaker, Speaker
+
+IMAGE_FIELDS = ("portrait", "thumbnail", "public_image")
+
+
+class Command(BaseCommand):
+    help = "Deduplicate the image files of speakers and published speakers"
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (Speaker, PublishedSpeaker):
+            for row in model.objects.values_list(*IMAGE_FIELDS):
+                names.update(name for name in row if name)
+
+        freed = files = 0
+        for name in sorted(names):
+            if not content_addressed_storage.exists(name):
+                self.stderr.write("missing file {}".format(name))
+                continue
+            freed += content_addressed_storage.deduplicate(name)
+            files += 1
+        freed += content_addressed_storage.purge_content()
+
+        self.stdout.write("Deduplicated {} files, freed {} bytes".format(files, freed))
@@ -0,0 +1,38 @@
+"""
+Implement a management command to create the derived images and the
+responsive image variants of all speakers that are missing them.
+"""
+from django.core.management import BaseCommand
+
+from speaker.images import needs_derived_images
+from speaker.models import PublishedSpeaker, Speaker, create_image_variants
+
+
+class Command(BaseCommand):
+    help = "Create missing derived images and image variants of speakers"
+
+    def handle(self, *args, **options):
+        for model in (Speaker, PublishedSpeaker):
+            for instance in model.objects.exclude(portrait="").iterator():
+                try:
+                    if needs_derived_images(instance):
+                        instance.derive_images()
+                        model.objects.filter(pk=instance.pk).update(
+                            thumbnail=instance.thumbnail.name,
+                            public_image=instance.public_image.name,
+                            derived_images_source=instance.derived_images_source,
+                            portrait_digest=instance.portrait_digest,
+                        )
+                    else:
+                        create_image_variants(instance.portrait)
+                except (OSError, ValueError) as e:
+                    self.stderr.write(
+                        "could not derive images for {} {}: {}".format(
+                            model.__name__, instance.pk, e
+                        )
+                    )
+                    continue
+                if options["verbosity"] > 1:
+                    self.stdout.write(
+                        "derived images for {} {}".format(model.__name__, instance.pk)
+                    )
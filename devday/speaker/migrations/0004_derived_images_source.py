@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:03
+
+from django.db import migrations, models
+from django.db.models import F, Q
+
+
+def set_derived_images_source(apps, schema_editor):
+    """
+    Mark the existing derived images as up to date.
+    """
+    for model_name in ('Speaker', 'PublishedSpeaker'):
+        model = apps.get_model('speaker', model_name)
+        model.objects.exclude(
+            Q(portrait='') | Q(thumbnail='') | Q(thumbnail__isnull=True)
+            | Q(public_image='') | Q(public_image__isnull=True)
+        ).update(derived_images_source=F('portrait'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speaker', '0003_auto_20181019_0948'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedspeaker',
+            name='derived_images_source',
+            field=models.CharField(blank=True, editable=False, max_length=500, verbose_name='Source of the derived images'),
+        ),
+        migrations.AddField(
+            model_name='speaker',
+            name='derived_images_source',
+            field=models.CharField(blank=True, editable=False, max_length=500, verbose_name='Source of the derived images'),
+        ),
+        migrations.RunPython(
+            set_derived_images_source, migrations.RunPython.noop),
+    ]
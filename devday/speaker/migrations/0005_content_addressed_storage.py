@@ -0,0 +1,46 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:10
+
+import devday.extras
+import devday.utils.storage
+from django.db import migrations, models
+import speaker.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speaker', '0004_derived_images_source'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publishedspeaker',
+            name='portrait',
+            field=devday.extras.ValidatedImageField(storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to=speaker.models.event_speaker_image_directory, verbose_name='Speaker image'),
+        ),
+        migrations.AlterField(
+            model_name='publishedspeaker',
+            name='public_image',
+            field=models.ImageField(blank=True, max_length=500, null=True, storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to=speaker.models.event_public_speaker_image_directory, verbose_name='Public speaker image'),
+        ),
+        migrations.AlterField(
+            model_name='publishedspeaker',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=500, null=True, storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to=speaker.models.event_speaker_thumbnail_directory, verbose_name='Speaker image thumbnail'),
+        ),
+        migrations.AlterField(
+            model_name='speaker',
+            name='portrait',
+            field=devday.extras.ValidatedImageField(storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to='speaker_original', verbose_name='Speaker image'),
+        ),
+        migrations.AlterField(
+            model_name='speaker',
+            name='public_image',
+            field=models.ImageField(blank=True, max_length=500, null=True, storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to='speaker_public', verbose_name='Public speaker image'),
+        ),
+        migrations.AlterField(
+            model_name='speaker',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=500, null=True, storage=devday.utils.storage.ContentAddressedFileSystemStorage(), upload_to='speaker_thumbs', verbose_name='Speaker image thumbnail'),
+        ),
+    ]
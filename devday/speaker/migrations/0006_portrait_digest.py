@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speaker', '0005_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishedspeaker',
+            name='portrait_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Content hash of the source of the derived images'),
+        ),
+        migrations.AddField(
+            model_name='speaker',
+            name='portrait_digest',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Content hash of the source of the derived images'),
+        ),
+    ]
@@ -1,8 +1,10 @@
 import os
+from hashlib import sha256
 from io import BytesIO
 from mimetypes import MimeTypes
 
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.db import models
 from django.dispatch import receiver
 from django.utils import timezone
@@ -10,7 +12,13 @@ from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
 from devday.extras import ValidatedImageField
+from devday.utils.storage import content_addressed_storage
 from event.models import Event
+from speaker.images import (
+    needs_derived_images,
+    schedule_derived_images,
+    update_derived_images,
+)
 from PIL import Image, ImageOps
 
 T_SHIRT_SIZES = (
@@ -53,6 +61,52 @@ class SpeakerBase(models.Model):
             self.slug = slugify(self.name)
         super(SpeakerBase, self).save(**kwargs)
 
+    def derive_images(self):
+        create_public_image(self.portrait, self.public_image)
+        create_thumbnail(self.portrait, self.thumbnail)
+        self.portrait_digest = create_image_variants(self.portrait)
+        self.derived_images_source = self.portrait.name
+
+    def get_image_variants(self, shape):
+        """
+        Return the responsive variants of the given shape ("thumbnail" or
+        "public") as a list of dictionaries with width, type and url. The list
+        is empty if the images have not been derived from the current portrait
+        yet.
+        """
+        if (
+            not self.portrait
+            or self.derived_images_source != self.portrait.name
+            or not self.portrait_digest
+        ):
+            return []
+        return get_image_variants(self.portrait.name, self.portrait_digest, shape)
+
+    def _get_srcsets(self, shape):
+        variants = self.get_image_variants(shape)
+        if not variants:
+            return None
+        return {
+            "webp": ", ".join(
+                "{url} {width}w".format(**v)
+                for v in variants
+                if v["type"] == "image/webp"
+            ),
+            "fallback": ", ".join(
+                "{url} {width}w".format(**v)
+                for v in variants
+                if v["type"] != "image/webp"
+            ),
+        }
+
+    @property
+    def thumbnail_srcsets(self):
+        return self._get_srcsets("thumbnail")
+
+    @property
+    def public_image_srcsets(self):
+        return self._get_srcsets("public")
+
 
 class Speaker(SpeakerBase):
     user = models.OneToOneField(
@@ -62,11 +116,14 @@ class Speaker(SpeakerBase):
         _("registered as speaker"), default=timezone.now
     )
     portrait = ValidatedImageField(
-        verbose_name=_("Speaker image"), upload_to="speaker_original"
+        verbose_name=_("Speaker image"),
+        upload_to="speaker_original",
+        storage=content_addressed_storage,
     )
     thumbnail = models.ImageField(
         verbose_name=_("Speaker image thumbnail"),
         upload_to="speaker_thumbs",
+        storage=content_addressed_storage,
         max_length=500,
         null=True,
         blank=True,
@@ -74,10 +131,23 @@ class Speaker(SpeakerBase):
     public_image = models.ImageField(
         verbose_name=_("Public speaker image"),
         upload_to="speaker_public",
+        storage=content_addressed_storage,
         max_length=500,
         null=True,
         blank=True,
     )
+    derived_images_source = models.CharField(
+        verbose_name=_("Source of the derived images"),
+        max_length=500,
+        blank=True,
+        editable=False,
+    )
+    portrait_digest = models.CharField(
+        verbose_name=_("Content hash of the source of the derived images"),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
     shirt_size = models.PositiveSmallIntegerField(
         verbose_name=_("T-shirt size"), choices=T_SHIRT_SIZES
     )
@@ -163,24 +233,125 @@ def create_thumbnail(portrait, thumbnail):
     temp_handle.close()
 
 
+def image_variant_name(portrait_digest, shape, width, extension):
+    """
+    Return the storage name of an image variant. Variants are named after the
+    SHA-256 hash of the portrait content, so speakers published for several
+    events share their variants whatever their portraits are named.
+    """
+    return "speaker_variants/{0}/{1}-{2}.{3}".format(
+        portrait_digest, shape, width, extension
+    )
+
+
+def get_image_variants(portrait_name, portrait_digest, shape):
+    pil_type, fallback_extension = get_pil_type_and_extension(portrait_name)
+    fallback_type = "image/{0}".format(pil_type)
+    variants = []
+    for image_type, extension in (
+        ("image/webp", "webp"),
+        (fallback_type, fallback_extension),
+    ):
+        for width in settings.SPEAKER_IMAGE_VARIANT_WIDTHS[shape]:
+            variants.append(
+                {
+                    "width": width,
+                    "type": image_type,
+                    "url": content_addressed_storage.url(
+                        image_variant_name(portrait_digest, shape, width, extension)
+                    ),
+                }
+            )
+    return variants
+
+
+def scale_image_variant(image, shape, width):
+    width = min(width, image.width)
+    if shape == "public":
+        height = round(
+            width
+            * settings.TALK_PUBLIC_SPEAKER_IMAGE_HEIGHT
+            / settings.TALK_PUBLIC_SPEAKER_IMAGE_WIDTH
+        )
+        return ImageOps.fit(image, (width, height))
+    scaled = image.copy()
+    scaled.thumbnail((width, image.height), Image.ANTIALIAS)
+    return scaled
+
+
+def create_image_variants(portrait):
+    """
+    Create the missing WebP and fallback variants of the given portrait and
+    return the content hash of the portrait that names them.
+    """
+    if not portrait:
+        return ""
+
+    pil_type, file_extension = get_pil_type_and_extension(portrait.name)
+    digest = sha256()
+    for chunk in portrait.chunks():
+        digest.update(chunk)
+    digest = digest.hexdigest()
+
+    portrait.seek(0)
+    image = Image.open(portrait.file)
+    image.load()
+    for shape, widths in settings.SPEAKER_IMAGE_VARIANT_WIDTHS.items():
+        for width in widths:
+            formats = [
+                (image_variant_name(digest, shape, width, extension), pil)
+                for pil, extension in (("webp", "webp"), (pil_type, file_extension))
+            ]
+            formats = [
+                (name, pil)
+                for name, pil in formats
+                if not content_addressed_storage.exists(name)
+            ]
+            if not formats:
+                continue
+            scaled = scale_image_variant(image, shape, width)
+            for name, pil in formats:
+                variant = scaled
+                if pil == "webp" and variant.mode not in ("RGB", "RGBA"):
+                    variant = variant.convert("RGBA")
+                temp_handle = BytesIO()
+                variant.save(temp_handle, pil)
+                content_addressed_storage.save(
+                    name, ContentFile(temp_handle.getvalue())
+                )
+                temp_handle.close()
+    return digest
+
+
 @receiver(models.signals.pre_save, sender=Speaker)
 def create_derived_speaker_images(sender, instance, **kwargs):
-    if not instance.pk:
-        return False
+    update_derived_images(instance)
+
 
-    if instance.portrait:
-        create_public_image(instance.portrait, instance.public_image)
-        create_thumbnail(instance.portrait, instance.thumbnail)
-    else:
-        if instance.public_image:
-            instance.public_image.delete()
-        if instance.thumbnail:
-            instance.thumbnail.delete()
+@receiver(models.signals.post_save, sender=Speaker)
+def schedule_derived_speaker_images(sender, instance, **kwargs):
+    schedule_derived_images(instance)
+
+
+def copy_image(source, target):
+    """
+    Copy the file of the image field file source to the storage of the image
+    field file target and return the new file name. The content addressed
+    storage links the file instead of copying its bytes.
+    """
+    name = target.field.generate_filename(
+        target.instance, os.path.basename(source.name)
+    )
+    return target.storage.copy(source.storage, source.name, name)
 
 
 class PublishedSpeakerManager(models.Manager):
-    def copy_from_speaker(self, speaker, event):
-        published_speaker = self.model(
+    def build_from_speaker(self, speaker, event):
+        """
+        Return an unsaved published speaker for the given speaker and event
+        without images.
+        """
+        return self.model(
             speaker=speaker,
             date_published=timezone.now(),
             event=event,
@@ -194,27 +365,50 @@ class PublishedSpeakerManager(models.Manager):
             email=speaker.user.email,
             slug=speaker.slug,
         )
-        if speaker.portrait:
-            published_speaker.portrait.save(
-                os.path.basename(speaker.portrait.name),
-                speaker.portrait.file,
-                save=False,
-            )
-        if speaker.thumbnail:
-            published_speaker.thumbnail.save(
-                os.path.basename(speaker.thumbnail.name),
-                speaker.thumbnail.file,
-                save=False,
-            )
-        if speaker.public_image:
-            published_speaker.public_image.save(
-                os.path.basename(speaker.public_image.name),
-                speaker.public_image.file,
-                save=False,
-            )
+
+    @staticmethod
+    def copy_images(published_speaker, speaker):
+        for field_name in ("portrait", "thumbnail", "public_image"):
+            source = getattr(speaker, field_name)
+            if source:
+                setattr(
+                    published_speaker,
+                    field_name,
+                    copy_image(source, getattr(published_speaker, field_name)),
+                )
+        if speaker.portrait and not needs_derived_images(speaker):
+            published_speaker.derived_images_source = published_speaker.portrait.name
+            published_speaker.portrait_digest = speaker.portrait_digest
+
+    def copy_from_speaker(self, speaker, event):
+        published_speaker = self.build_from_speaker(speaker, event)
+        self.copy_images(published_speaker, speaker)
         published_speaker.save()
         return published_speaker
 
+    def copy_images_from_speakers(self, published_speaker_ids):
+        """
+        Copy the images of the speakers of the given published speakers that
+        have been created without images by build_from_speaker.
+        """
+        for published_speaker in self.filter(
+            id__in=published_speaker_ids, portrait=""
+        ).select_related("speaker", "event"):
+            if published_speaker.speaker is None or not (
+                published_speaker.speaker.portrait
+            ):
+                continue
+            self.copy_images(published_speaker, published_speaker.speaker)
+            published_speaker.save(
+                update_fields=[
+                    "portrait",
+                    "thumbnail",
+                    "public_image",
+                    "derived_images_source",
+                    "portrait_digest",
+                ]
+            )
+
 
 def event_speaker_image_directory(instance, filename):
     return "speaker/{0}/original/{1}".format(instance.event.slug, filename)
@@ -237,11 +431,14 @@ class PublishedSpeaker(SpeakerBase):
     )
     event = models.ForeignKey(Event, null=False, on_delete=models.CASCADE)
     portrait = ValidatedImageField(
-        verbose_name=_("Speaker image"), upload_to=event_speaker_image_directory
+        verbose_name=_("Speaker image"),
+        upload_to=event_speaker_image_directory,
+        storage=content_addressed_storage,
     )
     thumbnail = models.ImageField(
         verbose_name=_("Speaker image thumbnail"),
         upload_to=event_speaker_thumbnail_directory,
+        storage=content_addressed_storage,
         max_length=500,
         null=True,
         blank=True,
@@ -249,10 +446,23 @@ class PublishedSpeaker(SpeakerBase):
     public_image = models.ImageField(
         verbose_name=_("Public speaker image"),
         upload_to=event_public_speaker_image_directory,
+        storage=content_addressed_storage,
         max_length=500,
         null=True,
         blank=True,
     )
+    derived_images_source = models.CharField(
+        verbose_name=_("Source of the derived images"),
+        max_length=500,
+        blank=True,
+        editable=False,
+    )
+    portrait_digest = models.CharField(
+        verbose_name=_("Content hash of the source of the derived images"),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
     email = models.EmailField(_("email address"), blank=False)
 
     objects = PublishedSpeakerManager()
@@ -269,14 +479,9 @@ class PublishedSpeaker(SpeakerBase):
 
 @receiver(models.signals.pre_save, sender=PublishedSpeaker)
 def create_derived_published_speaker_images(sender, instance, **kwargs):
-    if not instance.pk:
-        return False
-
-    if instance.portrait:
-        create_public_image(instance.portrait, instance.public_image)
-        create_thumbnail(instance.portrait, instance.thumbnail)
-    else:
-        if instance.public_image:
-            instance.public_image.delete()
-        if instance.thumbnail:
-            instance.thumbnail.delete()
+    update_derived_images(instance)
+
+
+@receiver(models.signals.post_save, sender=PublishedSpeaker)
+def schedule_derived_published_speaker_images(sender, instance, **kwargs):
+    schedule_derived_images(instance)
@@ -17,7 +17,7 @@ def create_test_speaker(
     return speaker, user, password
 
 
-@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), SPEAKER_IMAGE_WORKERS=0)
 class TemporaryMediaTestCase(TestCase):
     @classmethod
     def tearDownClass(cls):
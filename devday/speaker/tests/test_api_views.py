@@ -0,0 +1,25 @@
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from speaker.api_views import SpeakerSerializer
+from speaker.tests.speaker_testutils import (
+    TemporaryMediaTestCase, create_test_speaker)
+from speaker.tests.test_models import copy_speaker_image
+
+
+@override_settings(SPEAKER_IMAGE_VARIANT_WIDTHS={
+    'thumbnail': (100,), 'public': (318, 636)})
+class SpeakerSerializerTest(TemporaryMediaTestCase):
+    def test_image_variants(self):
+        speaker, _, _ = create_test_speaker()
+        copy_speaker_image(speaker.portrait)
+        speaker.save()
+        request = APIRequestFactory().get('/api/speakers/')
+        data = SpeakerSerializer(speaker, context={'request': request}).data
+        self.assertEqual(
+            [(v['width'], v['type']) for v in data['image_variants']],
+            [(318, 'image/webp'), (636, 'image/webp'),
+             (318, 'image/png'), (636, 'image/png')])
+        self.assertTrue(
+            data['image_variants'][0]['url'].startswith(
+                'http://testserver/media/speaker_variants/'))
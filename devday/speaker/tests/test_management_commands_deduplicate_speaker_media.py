@@ -0,0 +1,44 @@
+import os
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+
+from event.tests import event_testutils
+from speaker.models import PublishedSpeaker, Speaker
+from speaker.tests.speaker_testutils import (
+    TemporaryMediaTestCase, create_test_speaker)
+
+
+class CommandTest(TemporaryMediaTestCase):
+    def write_file(self, name, content):
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def test_deduplicate_speaker_media(self):
+        speaker, _, _ = create_test_speaker()
+        published = PublishedSpeaker.objects.copy_from_speaker(
+            speaker, event_testutils.create_test_event())
+        self.write_file('speaker_original/portrait.png', b'portrait')
+        self.write_file('speaker/test-event/original/portrait.png', b'portrait')
+        Speaker.objects.filter(pk=speaker.pk).update(
+            portrait='speaker_original/portrait.png',
+            derived_images_source='speaker_original/portrait.png')
+        PublishedSpeaker.objects.filter(pk=published.pk).update(
+            portrait='speaker/test-event/original/portrait.png',
+            thumbnail='speaker/test-event/thumbs/missing.png')
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            'deduplicate_speaker_media', stdout=out, stderr=err)
+
+        self.assertEqual(
+            out.getvalue(), 'Deduplicated 2 files, freed 8 bytes\n')
+        self.assertIn('speaker/test-event/thumbs/missing.png', err.getvalue())
+        self.assertTrue(os.path.samefile(
+            os.path.join(settings.MEDIA_ROOT, 'speaker_original/portrait.png'),
+            os.path.join(
+                settings.MEDIA_ROOT,
+                'speaker/test-event/original/portrait.png')))
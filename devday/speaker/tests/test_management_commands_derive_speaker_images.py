@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from speaker.models import Speaker
+from speaker.tests.speaker_testutils import (
+    TemporaryMediaTestCase, create_test_speaker)
+from speaker.tests.test_models import copy_speaker_image
+
+
+class CommandTest(TemporaryMediaTestCase):
+    def test_derive_speaker_images(self):
+        speaker, _, _ = create_test_speaker()
+        copy_speaker_image(speaker.portrait)
+        Speaker.objects.filter(pk=speaker.pk).update(
+            portrait=speaker.portrait.name)
+
+        call_command('derive_speaker_images', stdout=StringIO())
+
+        speaker.refresh_from_db()
+        self.assertTrue(speaker.thumbnail)
+        self.assertTrue(speaker.public_image)
+        self.assertEqual(speaker.derived_images_source, speaker.portrait.name)
+        self.assertTrue(speaker.thumbnail_srcsets)
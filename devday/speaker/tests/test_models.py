@@ -1,16 +1,22 @@
 import os
 from datetime import timedelta
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.staticfiles import finders
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.utils.text import slugify
 
 from attendee.tests import attendee_testutils
+from event.models import EventContentVersion
 from event.tests import event_testutils
 from speaker.models import (
     PublishedSpeaker, Speaker, get_pil_type_and_extension, create_public_image,
-    create_thumbnail)
+    create_thumbnail, image_variant_name)
+from devday.utils.storage import content_addressed_storage
+from speaker.images import derive_images_in_background
 from speaker.tests.speaker_testutils import TemporaryMediaTestCase
 
 
@@ -132,6 +138,10 @@ class TestPublishedSpeakerManager(TemporaryMediaTestCase):
             'speaker/test-event/thumbs'))
         self.assertTrue(os.path.dirname(published.public_image.path).endswith(
             'speaker/test-event/public'))
+        for field_name in ('portrait', 'thumbnail', 'public_image'):
+            self.assertTrue(os.path.samefile(
+                getattr(published, field_name).path,
+                getattr(speaker, field_name).path))
 
     def test_copy_from_speaker_without_images(self):
         user, _ = attendee_testutils.create_test_user()
@@ -245,6 +255,181 @@ class TestCreateDerivedSpeakerImages(TemporaryMediaTestCase):
         self.assertFalse(self.speaker.thumbnail)
 
 
+    def test_unchanged_portrait_is_not_processed_again(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        self.assertEqual(
+            self.speaker.derived_images_source, self.speaker.portrait.name)
+        with mock.patch('speaker.models.create_thumbnail') as create_thumbnail:
+            self.speaker.name = 'Renamed speaker'
+            self.speaker.save()
+        create_thumbnail.assert_not_called()
+
+    def test_changed_portrait_is_processed(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        copy_speaker_image(self.speaker.portrait)
+        with mock.patch('speaker.models.create_thumbnail') as create_thumbnail:
+            self.speaker.save()
+        create_thumbnail.assert_called_once()
+
+    def test_copy_from_speaker_keeps_derived_images(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        event = event_testutils.create_test_event()
+        with mock.patch('speaker.models.create_thumbnail') as create_thumbnail:
+            published = self.speaker.publish(event)
+        create_thumbnail.assert_not_called()
+        self.assertEqual(
+            published.derived_images_source, published.portrait.name)
+
+
+@override_settings(SPEAKER_IMAGE_VARIANT_WIDTHS={
+    'thumbnail': (100, 200), 'public': (318,)})
+class TestImageVariants(TemporaryMediaTestCase):
+    def setUp(self):
+        user, _ = attendee_testutils.create_test_user()
+        self.speaker = Speaker.objects.create(
+            user=user,
+            name='Test speaker',
+            shirt_size=3,
+            video_permission=False,
+        )
+
+    def test_no_variants_without_portrait(self):
+        self.assertEqual(self.speaker.get_image_variants('thumbnail'), [])
+        self.assertIsNone(self.speaker.thumbnail_srcsets)
+        self.assertIsNone(self.speaker.public_image_srcsets)
+
+    def test_variants_are_created(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        variants = self.speaker.get_image_variants('thumbnail')
+        self.assertEqual(
+            [(v['width'], v['type']) for v in variants],
+            [(100, 'image/webp'), (200, 'image/webp'),
+             (100, 'image/png'), (200, 'image/png')])
+        for shape, width, extension in (
+                ('thumbnail', 100, 'webp'), ('thumbnail', 200, 'png'),
+                ('public', 318, 'webp'), ('public', 318, 'png')):
+            name = image_variant_name(
+                self.speaker.portrait_digest, shape, width, extension)
+            self.assertTrue(os.path.exists(
+                os.path.join(settings.MEDIA_ROOT, name)), name)
+        self.assertEqual(
+            self.speaker.public_image_srcsets['webp'],
+            '{} 318w'.format(self.speaker.get_image_variants('public')[0]['url']))
+        self.assertEqual(self.speaker.thumbnail_srcsets['fallback'].count('w, '), 1)
+
+    def test_variants_are_shared_by_published_speakers(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        published = self.speaker.publish(event_testutils.create_test_event())
+        self.assertEqual(
+            published.get_image_variants('public'),
+            self.speaker.get_image_variants('public'))
+
+    def test_variants_of_renamed_published_portrait(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        event = event_testutils.create_test_event()
+        content_addressed_storage.save(
+            'speaker/{}/original/speaker-dummy.png'.format(event.slug),
+            ContentFile(b'other portrait'))
+        published = self.speaker.publish(event)
+        self.assertNotEqual(
+            os.path.basename(published.portrait.name), 'speaker-dummy.png')
+        variants = published.get_image_variants('public')
+        self.assertEqual(variants, self.speaker.get_image_variants('public'))
+        for variant in variants:
+            self.assertTrue(os.path.exists(os.path.join(
+                settings.MEDIA_ROOT,
+                variant['url'][len(settings.MEDIA_URL):])), variant['url'])
+
+    def test_no_variants_before_derivation(self):
+        copy_speaker_image(self.speaker.portrait)
+        self.assertEqual(self.speaker.get_image_variants('public'), [])
+
+
+@override_settings(SPEAKER_IMAGE_WORKERS=2)
+class TestDeriveImagesInBackground(TemporaryMediaTestCase):
+    def setUp(self):
+        user, _ = attendee_testutils.create_test_user()
+        self.speaker = Speaker.objects.create(
+            user=user,
+            name='Test speaker',
+            shirt_size=3,
+            video_permission=False,
+        )
+
+    @mock.patch('speaker.images.get_executor')
+    @mock.patch('speaker.images.transaction.on_commit')
+    def test_save_schedules_derivation(self, on_commit, get_executor):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        self.assertFalse(self.speaker.thumbnail)
+        self.assertFalse(self.speaker.public_image)
+        on_commit.assert_called_once()
+        on_commit.call_args[0][0]()
+        get_executor.return_value.submit.assert_called_once_with(
+            derive_images_in_background, Speaker, self.speaker.pk,
+            self.speaker.portrait.name)
+
+    @mock.patch('speaker.images.get_executor')
+    @mock.patch('speaker.images.transaction.on_commit')
+    def test_save_new_speaker_schedules_derivation(self, on_commit, get_executor):
+        # outside of a transaction the function is called right away
+        on_commit.side_effect = lambda function: function()
+        user, _ = attendee_testutils.create_test_user('new@example.org')
+        speaker = Speaker(
+            user=user, name='New speaker', shirt_size=3, video_permission=False)
+        copy_speaker_image(speaker.portrait)
+        speaker.save()
+        get_executor.return_value.submit.assert_called_once_with(
+            derive_images_in_background, Speaker, speaker.pk,
+            speaker.portrait.name)
+        self.assertIsNotNone(speaker.pk)
+
+    @mock.patch('speaker.images.close_old_connections')
+    def test_derive_images_in_background(self, _):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        derive_images_in_background(
+            Speaker, self.speaker.pk, self.speaker.portrait.name)
+        self.speaker.refresh_from_db()
+        self.assertTrue(self.speaker.thumbnail)
+        self.assertTrue(self.speaker.public_image)
+        self.assertEqual(
+            self.speaker.derived_images_source, self.speaker.portrait.name)
+
+    @mock.patch('speaker.images.close_old_connections')
+    def test_derive_published_speaker_images_in_background(self, _):
+        event = event_testutils.create_test_event()
+        published = self.speaker.publish(event)
+        copy_speaker_image(published.portrait)
+        published.save()
+        version = EventContentVersion.objects.get_for_event(event.id).version
+        with mock.patch(
+                'talk.signals.invalidate_schedule') as invalidate_schedule:
+            derive_images_in_background(
+                PublishedSpeaker, published.pk, published.portrait.name)
+        published.refresh_from_db()
+        self.assertTrue(published.thumbnail)
+        invalidate_schedule.assert_called_with(event.id)
+        self.assertGreater(
+            EventContentVersion.objects.get_for_event(event.id).version,
+            version)
+
+    @mock.patch('speaker.images.close_old_connections')
+    def test_derive_images_in_background_portrait_changed(self, _):
+        copy_speaker_image(self.speaker.portrait)
+        self.speaker.save()
+        derive_images_in_background(Speaker, self.speaker.pk, 'other.png')
+        self.speaker.refresh_from_db()
+        self.assertFalse(self.speaker.thumbnail)
+        self.assertEqual(self.speaker.derived_images_source, '')
+
+
 class TestCreateDerivedPublishedSpeakerImages(TemporaryMediaTestCase):
     def setUp(self):
         user, _ = attendee_testutils.create_test_user()
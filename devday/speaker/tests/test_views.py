@@ -412,6 +412,16 @@ class TestPublishedSpeakerListView(TestCase):
             )
         self.url = "/{}/speaker/".format(self.event.slug)
 
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.speakers[0].name = "Renamed Speaker"
+        self.speakers[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
     def test_get_queryset_no_talks(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
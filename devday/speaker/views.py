@@ -13,6 +13,7 @@ from django.views.generic import (
 from django.views.generic.edit import ModelFormMixin, ProcessFormView
 
 from event.models import Event
+from event.views import EventContentConditionalMixin
 from speaker.forms import CreateSpeakerForm, EditSpeakerForm, UserSpeakerPortraitForm
 from speaker.models import PublishedSpeaker, Speaker
 from talk.models import Talk
@@ -144,7 +145,7 @@ class UserSpeakerPortraitDeleteView(
         return redirect(self.success_url)
 
 
-class PublishedSpeakerDetailView(DetailView):
+class PublishedSpeakerDetailView(EventContentConditionalMixin, DetailView):
     model = PublishedSpeaker
 
     def dispatch(self, request, *args, **kwargs):
@@ -190,7 +191,7 @@ class PublishedSpeakerDetailView(DetailView):
         return context
 
 
-class PublishedSpeakerListView(ListView):
+class PublishedSpeakerListView(EventContentConditionalMixin, ListView):
     model = PublishedSpeaker
     event = None
 
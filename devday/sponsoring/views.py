@@ -6,6 +6,7 @@ from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
 from django.views.generic import FormView, TemplateView, RedirectView
 
+from devday.utils.mail_queue import queue_mail
 from event.models import Event
 from sponsoring.forms import SponsoringContactForm
 from sponsoring.models import SponsoringPackage
@@ -59,7 +60,7 @@ class SponsoringView(FormView):
             reply_to=[context['contact_email']],
             headers={'From': settings.SPONSORING_FROM_EMAIL},
         )
-        email.send(fail_silently=False)
+        queue_mail(email)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
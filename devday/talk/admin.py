@@ -18,6 +18,8 @@ from talk.forms import (
     SessionReservationForm,
     TalkSlotForm,
 )
+from talk.publish import publish_talks
+from talk.reservation import promote_waiting_reservations
 from talk.signals import send_reservation_confirmation_mail
 
 from .models import (
@@ -122,7 +124,7 @@ class TalkAdmin(PrefetchAdmin, admin.ModelAdmin):
     }
 
     def draft_speakers_joined(self, obj):
-        return ", ".join([speaker.name for speaker in obj.draft_speakers.all()])
+        return obj.draft_speaker_label
 
     draft_speakers_joined.name = _("Draft speakers")
 
@@ -136,13 +138,13 @@ class TalkAdmin(PrefetchAdmin, admin.ModelAdmin):
 
     def publish_talks(self, request, queryset):
         if "apply" in request.POST:
-            published = 0
-            for talk in queryset.all():
-                track_field_name = "selected_track-{}".format(talk.id)
-                if request.POST[track_field_name]:
-                    track = Track.objects.get(id=int(request.POST[track_field_name]))
-                    talk.publish(track)
-                    published += 1
+            talk_tracks = {}
+            for talk_id in queryset.values_list("id", flat=True):
+                track_field_name = "selected_track-{}".format(talk_id)
+                if request.POST.get(track_field_name):
+                    talk_tracks[talk_id] = int(request.POST[track_field_name])
+            result = publish_talks(talk_tracks)
+            published = result["talks"]
             self.message_user(
                 request,
                 ngettext_lazy(
@@ -152,6 +154,18 @@ class TalkAdmin(PrefetchAdmin, admin.ModelAdmin):
                 )
                 % {"count": published},
             )
+            if result["speakers"]:
+                self.message_user(
+                    request,
+                    ngettext_lazy(
+                        "The images of one new published speaker are copied in"
+                        " the background.",
+                        "The images of %(count)d new published speakers are"
+                        " copied in the background.",
+                        result["speakers"],
+                    )
+                    % {"count": result["speakers"]},
+                )
             return HttpResponseRedirect(request.get_full_path())
 
         return render(
@@ -168,24 +182,11 @@ class TalkAdmin(PrefetchAdmin, admin.ModelAdmin):
         for talk in queryset.filter(
             spots__gt=0, event_id=Event.objects.current_event_id()
         ):
-            confirmed_reservations = SessionReservation.objects.filter(
-                talk=talk, is_confirmed=True
-            ).count()
-            if talk.spots > confirmed_reservations:
-                waiting_reservations = (
-                    SessionReservation.objects.filter(talk=talk, is_waiting=True)
-                    .select_related("attendee", "attendee__user")
-                    .order_by("created")
-                )
-                for reservation in waiting_reservations[
-                    : talk.spots - confirmed_reservations
-                ]:
-                    user = reservation.attendee.user
-                    reservation.is_waiting = False
-                    reservation.save()
-                    send_reservation_confirmation_mail(request, reservation, user)
-                    attendees.add(user.email)
-                    mailcount += 1
+            for reservation in promote_waiting_reservations(talk.id):
+                user = reservation.attendee.user
+                send_reservation_confirmation_mail(request, reservation, user)
+                attendees.add(user.email)
+                mailcount += 1
         if mailcount > 0:
             self.message_user(
                 request,
@@ -315,12 +316,7 @@ class AttendeeFeedbackAdmin(admin.ModelAdmin):
         return obj.attendee.user.email
 
     def talk_speakers(self, obj):
-        return ", ".join(
-            [
-                str(s.published_speaker)
-                for s in TalkPublishedSpeaker.objects.filter(talk=obj.talk)
-            ]
-        )
+        return obj.talk.published_speaker_label
 
     def talk_title(self, obj):
         return obj.talk.title
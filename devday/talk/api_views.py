@@ -1,23 +1,36 @@
+from hashlib import sha1
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.relations import StringRelatedField
 from rest_framework.response import Response
 
+from event.models import EventContentVersion
+from speaker.api_views import get_image_variant_urls
 from speaker.models import Speaker
 from talk.models import Talk
 
 
 class NestedSpeakersSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(source="thumbnail")
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Speaker
-        fields = ["url", "name", "image"]
+        fields = ["url", "name", "image", "image_variants"]
         lookup_field = "slug"
         extra_kwargs = {
             "url": {'lookup_field': 'slug'}
         }
 
+    def get_image_variants(self, instance):
+        return get_image_variant_urls(instance, "thumbnail", self.context.get("request"))
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
 
@@ -54,11 +67,108 @@ class SessionSerializer(serializers.HyperlinkedModelSerializer):
         return ret
 
 
+class SessionCursorPagination(CursorPagination):
+    """
+    Cursor pagination that is only used if the client asks for it with the
+    page_size query parameter, so clients that expect a plain list of all
+    sessions keep working.
+    """
+
+    ordering = "id"
+    page_size = None
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.TALK_API_SESSION_MAX_PAGE_SIZE
+
+
+def get_content_versions(request):
+    """
+    Return the content versions of the events whose sessions are requested.
+    The versions are loaded once per request.
+    """
+    if not hasattr(request, "_content_versions"):
+        versions = EventContentVersion.objects.order_by("event_id")
+        event = request.query_params.get("event")
+        if event:
+            versions = versions.filter(event__slug=event)
+        request._content_versions = list(
+            versions.values_list("event_id", "version", "modified")
+        )
+    return request._content_versions
+
+
+# noinspection PyUnusedLocal
+def session_etag(request, *args, **kwargs):
+    # the browsable API renders user specific pages
+    if request.accepted_renderer.format != "json":
+        return None
+    return sha1(
+        repr(
+            (
+                [version[:2] for version in get_content_versions(request)],
+                request.get_host(),
+                request.get_full_path(),
+            )
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+# noinspection PyUnusedLocal
+def session_last_modified(request, *args, **kwargs):
+    if request.accepted_renderer.format != "json":
+        return None
+    return max(
+        (version[2] for version in get_content_versions(request)), default=None
+    )
+
+
+session_condition = method_decorator(
+    condition(etag_func=session_etag, last_modified_func=session_last_modified)
+)
+
+
 class SessionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Talk.objects.filter(published_speakers__isnull=False)
+    """
+    Published sessions, optionally filtered by the slug of their event with
+    the event query parameter. Responses carry an ETag and a Last-Modified
+    header derived from the content versions of the events, so clients can
+    poll with conditional requests.
+    """
+
+    queryset = (
+        Talk.objects.filter(published_speakers__isnull=False)
+        .distinct()
+        .select_related("event")
+        .prefetch_related("published_speakers")
+        .order_by("id")
+    )
     serializer_class = SessionSerializer
+    pagination_class = SessionCursorPagination
     lookup_field = 'slug'
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        event = self.request.query_params.get("event")
+        if event:
+            queryset = queryset.filter(event__slug=event)
+        return queryset
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @session_condition
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @session_condition
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['put'])
     def favourite(self, request, slug=None):
         session = self.get_object()
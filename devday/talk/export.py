@@ -0,0 +1,53 @@
+"""
+Export of submitted sessions for the program committee.
+
+"""
+from django.db.models import Avg, Count, Prefetch, Sum
+
+from talk.models import Talk, TalkComment
+
+
+def get_session_summary(event, comment_order="modified"):
+    """
+    Return the talks of the given event with their speakers, formats, vote
+    aggregates and comments.
+
+    The vote aggregates are annotated as num_votes, avg_score and total_score
+    and the comments ordered by comment_order are available as
+    summary_comments. Evaluating the queryset takes a constant number of
+    queries.
+    """
+    return (
+        Talk.objects.filter(event=event)
+        .annotate(
+            num_votes=Count("vote"),
+            avg_score=Avg("vote__score"),
+            total_score=Sum("vote__score"),
+        )
+        .prefetch_related(
+            "draft_speakers",
+            "talkformat",
+            Prefetch(
+                "talkcomment_set",
+                queryset=TalkComment.objects.select_related("commenter").order_by(
+                    comment_order
+                ),
+                to_attr="summary_comments",
+            ),
+        )
+    )
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterate over the given queryset in slices of chunk_size objects. Unlike
+    QuerySet.iterator() this keeps prefetch_related lookups working. The
+    queryset needs a unique ordering.
+    """
+    offset = 0
+    while True:
+        chunk = list(queryset[offset : offset + chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        offset += chunk_size
@@ -0,0 +1,422 @@
+"""
+Pre-rendered schedule feeds for the InfoBeamer signage and calendar clients.
+
+The schedule of an event is loaded once per content version of the event and
+rendered to XML, JSON and iCalendar templates. A template is a list of byte
+strings and timestamps, so applying the starttoday and offsethours time shifts
+of a request only formats the timestamps again instead of loading and
+rendering the whole schedule. The rendered feeds are cached per content
+version and time shift.
+
+The schedule is partitioned into days by the local dates of its time slots,
+so devices can fetch the feed of a single day.
+
+"""
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.utils import timezone
+
+from devday.utils import caching
+from talk.models import TalkSlot, TimeSlot
+
+XML_DECLARATION = b"<?xml version='1.0' encoding='utf-8'?>\n"
+XML_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+ICAL_TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+FEED_FORMATS = ("xml", "json", "ical")
+
+# timestamps are marked in the rendered text with characters of the private
+# use area that are removed from the content of the schedule
+_MARKER_START = "\ue000"
+_MARKER_END = "\ue001"
+_MARKER_RE = re.compile(
+    "{}(\\d+){}".format(_MARKER_START, _MARKER_END).encode("utf-8")
+)
+
+
+def feed_cache_namespace(event_id):
+    return "talk:feed:{}".format(event_id)
+
+
+def _clean(text):
+    return text.replace(_MARKER_START, "").replace(_MARKER_END, "")
+
+
+def local_date(timestamp):
+    return timezone.localtime(timestamp, timezone.get_default_timezone()).date()
+
+
+def build_schedule_data(event):
+    """
+    Return the scheduled sessions of the given event grouped by day and room
+    or None if the event has no time slots.
+    """
+    time_slots = list(
+        TimeSlot.objects.filter(event=event)
+        .order_by("start_time")
+        .values_list("id", "start_time", "end_time")
+    )
+    if not time_slots:
+        return None
+
+    # time slots ordered by their start time are grouped by their local date
+    # in one pass
+    days = []
+    days_by_time_slot = {}
+    for day_date, day_time_slots in groupby(
+        time_slots, key=lambda time_slot: local_date(time_slot[1])
+    ):
+        day_time_slots = list(day_time_slots)
+        day = {
+            "index": len(days) + 1,
+            "date": day_date,
+            "min_time": day_time_slots[0][1],
+            "max_time": max(end_time for _, _, end_time in day_time_slots),
+            "rooms": {},
+        }
+        days.append(day)
+        for time_slot_id, _, _ in day_time_slots:
+            days_by_time_slot[time_slot_id] = day
+
+    talk_slots = (
+        TalkSlot.objects.filter(
+            talk__event=event, talk__track__isnull=False, time__event=event
+        )
+        .select_related("talk", "time", "room")
+        .prefetch_related("talk__published_speakers")
+        .order_by("time__start_time", "room__name")
+    )
+    for talk_slot in talk_slots:
+        talk = talk_slot.talk
+        days_by_time_slot[talk_slot.time_id]["rooms"].setdefault(
+            talk_slot.room_id, {"name": _clean(talk_slot.room.name), "talks": []}
+        )["talks"].append(
+            {
+                "id": talk.id,
+                "title": _clean(talk.title),
+                "abstract": _clean(talk.abstract),
+                "start_time": talk_slot.time.start_time,
+                "end_time": talk_slot.time.end_time,
+                "speakers": [
+                    (_clean(speaker.slug), _clean(speaker.name))
+                    for speaker in talk.published_speakers.all()
+                ],
+            }
+        )
+    for day in days:
+        day["rooms"] = list(day["rooms"].values())
+    return {
+        "title": _clean(event.title),
+        "slug": event.slug,
+        "start_time": event.start_time,
+        "end_time": event.end_time,
+        "min_time": time_slots[0][1],
+        "max_time": max(end_time for _, _, end_time in time_slots),
+        "days": days,
+    }
+
+
+def format_timestamp(timestamp, kind):
+    if kind == "ical":
+        return timestamp.astimezone(timezone.utc).strftime(ICAL_TIMESTAMP_FORMAT)
+    local_time = timezone.localtime(timestamp, timezone.get_default_timezone())
+    if kind == "date":
+        return local_time.strftime("%Y-%m-%d")
+    if kind == "time":
+        return local_time.strftime("%H:%M")
+    formatted = local_time.strftime(XML_TIMESTAMP_FORMAT)
+    return "%s:%s" % (formatted[:-2], formatted[-2:])
+
+
+def format_duration(start_time, end_time):
+    duration = end_time - start_time
+    return "%02d:%02d" % (duration.seconds / 3600, duration.seconds % 3600 / 60)
+
+
+class FeedTemplate(object):
+    """
+    Collect the timestamps of a feed while its text is built and split the
+    text into byte strings and timestamps afterwards.
+    """
+
+    def __init__(self):
+        self.timestamps = []
+
+    def timestamp(self, timestamp, kind="timestamp"):
+        """
+        Return a marker for the given timestamp that is replaced by the
+        shifted timestamp formatted according to kind when the feed is
+        rendered.
+        """
+        self.timestamps.append((timestamp, kind))
+        return "{}{}{}".format(_MARKER_START, len(self.timestamps) - 1, _MARKER_END)
+
+    def split(self, text):
+        """
+        Split the given text, a string or UTF-8 encoded bytes, into byte
+        strings and timestamps.
+        """
+        if isinstance(text, str):
+            text = text.encode("utf-8")
+        parts = _MARKER_RE.split(text)
+        segments = []
+        for index, part in enumerate(parts):
+            if index % 2:
+                segments.append(self.timestamps[int(part)])
+            elif part:
+                segments.append(part)
+        return segments
+
+
+def build_xml_template(data, days):
+    template = FeedTemplate()
+    schedule_xml = ElementTree.Element("schedule")
+    ElementTree.SubElement(schedule_xml, "version").text = data["title"]
+    conference = ElementTree.SubElement(schedule_xml, "conference")
+    ElementTree.SubElement(conference, "acronym").text = "DevDay"
+    ElementTree.SubElement(conference, "title").text = data["title"]
+    ElementTree.SubElement(conference, "start").text = template.timestamp(
+        data["start_time"], "date"
+    )
+    ElementTree.SubElement(conference, "end").text = template.timestamp(
+        data["end_time"], "date"
+    )
+    ElementTree.SubElement(conference, "days").text = str(len(data["days"]))
+    ElementTree.SubElement(conference, "timeslot_duration").text = "00:15"
+    for day in days:
+        day_xml = ElementTree.SubElement(
+            schedule_xml,
+            "day",
+            index=str(day["index"]),
+            date=template.timestamp(day["min_time"], "date"),
+            start=template.timestamp(day["min_time"]),
+            end=template.timestamp(day["max_time"]),
+        )
+        for room in day["rooms"]:
+            room_xml = ElementTree.SubElement(day_xml, "room", name=room["name"])
+            for talk in room["talks"]:
+                event_xml = ElementTree.SubElement(
+                    room_xml, "event", guid=str(talk["id"]), id=str(talk["id"])
+                )
+                ElementTree.SubElement(event_xml, "date").text = template.timestamp(
+                    talk["start_time"]
+                )
+                ElementTree.SubElement(event_xml, "start").text = template.timestamp(
+                    talk["start_time"], "time"
+                )
+                ElementTree.SubElement(event_xml, "duration").text = format_duration(
+                    talk["start_time"], talk["end_time"]
+                )
+                ElementTree.SubElement(event_xml, "room").text = room["name"]
+                ElementTree.SubElement(event_xml, "title").text = talk["title"]
+                ElementTree.SubElement(event_xml, "abstract").text = talk["abstract"]
+                ElementTree.SubElement(event_xml, "language").text = "de"
+                persons_xml = ElementTree.SubElement(event_xml, "persons")
+                for slug, name in talk["speakers"]:
+                    ElementTree.SubElement(persons_xml, "person", id=slug).text = name
+    # ElementTree writes the markers unescaped in UTF-8 but omits the XML
+    # declaration for this encoding
+    return template.split(
+        XML_DECLARATION + ElementTree.tostring(schedule_xml, "utf-8")
+    )
+
+
+def build_json_template(data, days):
+    template = FeedTemplate()
+
+    def session(talk):
+        return {
+            "id": talk["id"],
+            "title": talk["title"],
+            "abstract": talk["abstract"],
+            "start": template.timestamp(talk["start_time"]),
+            "end": template.timestamp(talk["end_time"]),
+            "duration": format_duration(talk["start_time"], talk["end_time"]),
+            "speakers": [{"id": slug, "name": name} for slug, name in talk["speakers"]],
+        }
+
+    schedule = {
+        "title": data["title"],
+        "start": template.timestamp(data["start_time"], "date"),
+        "end": template.timestamp(data["end_time"], "date"),
+        "day_count": len(data["days"]),
+        "days": [
+            {
+                "index": day["index"],
+                "date": template.timestamp(day["min_time"], "date"),
+                "start": template.timestamp(day["min_time"]),
+                "end": template.timestamp(day["max_time"]),
+                "rooms": [
+                    {
+                        "name": room["name"],
+                        "sessions": [session(talk) for talk in room["talks"]],
+                    }
+                    for room in day["rooms"]
+                ],
+            }
+            for day in days
+        ],
+    }
+    return template.split(json.dumps(schedule, ensure_ascii=False))
+
+
+def escape_ical_text(text):
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_ical_line(line):
+    """
+    Fold the given content line into lines of at most 75 octets.
+    """
+    lines = []
+    current = ""
+    for character in line:
+        if len((current + character).encode("utf-8")) > 75:
+            lines.append(current)
+            current = " "
+        current += character
+    lines.append(current)
+    return "\r\n".join(lines)
+
+
+def build_ical_template(data, days):
+    template = FeedTemplate()
+    timestamp = format_timestamp(timezone.now(), "ical")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//DevDay//Schedule//EN",
+        "X-WR-CALNAME:{}".format(escape_ical_text(data["title"])),
+    ]
+    for room in (room for day in days for room in day["rooms"]):
+        for talk in room["talks"]:
+            lines += [
+                "BEGIN:VEVENT",
+                "UID:session-{}@{}".format(talk["id"], data["slug"]),
+                "DTSTAMP:{}".format(timestamp),
+                "DTSTART:{}".format(template.timestamp(talk["start_time"], "ical")),
+                "DTEND:{}".format(template.timestamp(talk["end_time"], "ical")),
+                "SUMMARY:{}".format(escape_ical_text(talk["title"])),
+                "DESCRIPTION:{}".format(escape_ical_text(talk["abstract"])),
+                "LOCATION:{}".format(escape_ical_text(room["name"])),
+                "END:VEVENT",
+            ]
+    lines.append("END:VCALENDAR")
+    return template.split(
+        "".join(fold_ical_line(line) + "\r\n" for line in lines)
+    )
+
+
+TEMPLATE_BUILDERS = {
+    "xml": build_xml_template,
+    "json": build_json_template,
+    "ical": build_ical_template,
+}
+
+
+def render_template(segments, delta):
+    return b"".join(
+        segment
+        if isinstance(segment, bytes)
+        else format_timestamp(segment[0] + delta, segment[1]).encode("ascii")
+        for segment in segments
+    )
+
+
+def get_time_shift(min_time, start_today=False, offset_hours=0):
+    """
+    Return the time shift that moves the schedule to today if start_today is
+    set and by the given number of hours.
+    """
+    delta = timedelta(hours=offset_hours)
+    if start_today:
+        delta += date.today() - min_time.date()
+    return delta
+
+
+def get_schedule_feed(
+    event, version, feed_format, start_today=False, offset_hours=0, day=None
+):
+    """
+    Return the schedule of the given event at the given content version in
+    the given format and moved by the given time shift as bytes. If day is
+    given only the day with that index or the day that is today after the
+    time shift for "today" is included. Return None if the event has no time
+    slots or the day does not exist.
+    """
+    namespace = feed_cache_namespace(event.id)
+    timeout = settings.TALK_SCHEDULE_FEED_CACHE_TIMEOUT
+
+    def get_data():
+        return caching.get_or_build(
+            namespace,
+            lambda: build_schedule_data(event),
+            timeout,
+            name="{}:data".format(version),
+        )
+
+    def build_outline():
+        data = get_data()
+        if data is None:
+            return None
+        return data["min_time"], [day["min_time"] for day in data["days"]]
+
+    outline = caching.get_or_build(
+        namespace, build_outline, timeout, name="{}:outline".format(version)
+    )
+    if outline is None:
+        return None
+    min_time, day_start_times = outline
+    delta = get_time_shift(min_time, start_today, offset_hours)
+    if day == "today":
+        today = timezone.localdate()
+        day = next(
+            (
+                index
+                for index, start_time in enumerate(day_start_times, 1)
+                if local_date(start_time + delta) == today
+            ),
+            None,
+        )
+        if day is None:
+            return None
+    elif day is not None:
+        day = int(day)
+        if not 1 <= day <= len(day_start_times):
+            return None
+
+    def build_template():
+        data = get_data()
+        days = data["days"] if day is None else [data["days"][day - 1]]
+        return TEMPLATE_BUILDERS[feed_format](data, days)
+
+    def render():
+        return render_template(
+            caching.get_or_build(
+                namespace,
+                build_template,
+                timeout,
+                name="{}:{}:{}:template".format(version, feed_format, day or ""),
+            ),
+            delta,
+        )
+
+    return caching.get_or_build(
+        namespace,
+        render,
+        timeout,
+        name="{}:{}:{}:{}".format(
+            version, feed_format, day or "", int(delta.total_seconds())
+        ),
+    )
@@ -21,6 +21,7 @@ from talk.models import (
     Vote,
     TalkDraftSpeaker,
 )
+from talk.reservation import reserve
 
 User = get_user_model()
 
@@ -258,15 +259,10 @@ class TalkAddReservationForm(forms.ModelForm):
         super().__init__(**kwargs)
 
     def save(self, commit=True):
-        self.instance.attendee = self.attendee
-        self.instance.talk = self.talk
-        self.instance.is_confirmed = False
-        if (
-            self.instance.talk.sessionreservation_set.filter(is_confirmed=True).count()
-            >= self.instance.talk.spots
-        ):
-            self.instance.is_waiting = True
-        return super().save(commit)
+        # the reservation is always saved because the decision whether it goes
+        # on the waiting list is only valid while the talk is locked
+        self.instance, _ = reserve(self.talk, self.attendee)
+        return self.instance
 
 
 class AttendeeTalkFeedbackForm(forms.ModelForm):
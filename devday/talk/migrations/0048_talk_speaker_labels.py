@@ -0,0 +1,50 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+def set_speaker_labels(apps, schema_editor):
+    Talk = apps.get_model("talk", "Talk")
+    TalkDraftSpeaker = apps.get_model("talk", "TalkDraftSpeaker")
+    TalkPublishedSpeaker = apps.get_model("talk", "TalkPublishedSpeaker")
+
+    db_alias = schema_editor.connection.alias
+    draft_speakers = {}
+    for talk_id, name in TalkDraftSpeaker.objects.using(db_alias).order_by(
+            "order").values_list("talk_id", "draft_speaker__name"):
+        draft_speakers.setdefault(talk_id, []).append(name)
+    published_speakers = {}
+    for talk_id, name, event_title in TalkPublishedSpeaker.objects.using(
+            db_alias).order_by("order").values_list(
+            "talk_id", "published_speaker__name",
+            "published_speaker__event__title"):
+        published_speakers.setdefault(talk_id, []).append(
+            "{0} ({1})".format(name, event_title))
+    for talk in Talk.objects.using(db_alias).filter(
+            id__in=set(draft_speakers) | set(published_speakers)):
+        talk.draft_speaker_label = ", ".join(draft_speakers.get(talk.id, []))
+        talk.published_speaker_label = ", ".join(
+            published_speakers.get(talk.id, []))
+        talk.save(update_fields=[
+            "draft_speaker_label", "published_speaker_label"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talk', '0047_use_links_for_talk_media_drop_old_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='talk',
+            name='draft_speaker_label',
+            field=models.TextField(blank=True, editable=False, verbose_name='Draft speakers'),
+        ),
+        migrations.AddField(
+            model_name='talk',
+            name='published_speaker_label',
+            field=models.TextField(blank=True, editable=False, verbose_name='Published speakers'),
+        ),
+        migrations.RunPython(set_speaker_labels, migrations.RunPython.noop),
+    ]
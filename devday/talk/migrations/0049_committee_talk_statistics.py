@@ -0,0 +1,50 @@
+# Generated by Django 2.2.28 on 2026-10-18 21:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+
+
+def create_committee_talk_statistics(apps, schema_editor):
+    Talk = apps.get_model("talk", "Talk")
+    CommitteeTalkStatistics = apps.get_model("talk", "CommitteeTalkStatistics")
+
+    db_alias = schema_editor.connection.alias
+    statistics = {}
+    for item in Talk.objects.using(db_alias).filter(vote__isnull=False).values(
+            "id").annotate(vote_count=Count("vote"), vote_sum=Sum("vote__score")):
+        statistics[item["id"]] = CommitteeTalkStatistics(
+            talk_id=item["id"], vote_count=item["vote_count"],
+            vote_sum=item["vote_sum"])
+    for item in Talk.objects.using(db_alias).filter(
+            talkcomment__isnull=False).values("id").annotate(
+            comment_count=Count("talkcomment")):
+        statistics.setdefault(item["id"], CommitteeTalkStatistics(
+            talk_id=item["id"])).comment_count = item["comment_count"]
+    CommitteeTalkStatistics.objects.using(db_alias).bulk_create(
+        statistics.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talk', '0048_talk_speaker_labels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommitteeTalkStatistics',
+            fields=[
+                ('talk', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='committee_statistics', serialize=False, to='talk.Talk')),
+                ('vote_count', models.PositiveIntegerField(default=0, verbose_name='Vote count')),
+                ('vote_sum', models.PositiveIntegerField(default=0, verbose_name='Vote sum')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Comment count')),
+            ],
+            options={
+                'verbose_name': 'Committee talk statistics',
+                'verbose_name_plural': 'Committee talk statistics',
+            },
+        ),
+        migrations.RunPython(
+            create_committee_talk_statistics, migrations.RunPython.noop),
+    ]
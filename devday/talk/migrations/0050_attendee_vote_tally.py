@@ -0,0 +1,45 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, Sum
+
+
+def create_attendee_vote_tallies(apps, schema_editor):
+    AttendeeVote = apps.get_model("talk", "AttendeeVote")
+    AttendeeVoteTally = apps.get_model("talk", "AttendeeVoteTally")
+
+    db_alias = schema_editor.connection.alias
+    AttendeeVoteTally.objects.using(db_alias).bulk_create(
+        AttendeeVoteTally(talk_id=item["talk_id"], **{
+            name: item[name] for name in (
+                "vote_count", "score_sum", "score_square_sum")})
+        for item in AttendeeVote.objects.using(db_alias).values(
+            "talk_id").order_by("talk_id").annotate(
+            vote_count=Count("id"), score_sum=Sum("score"),
+            score_square_sum=Sum(F("score") * F("score"))))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talk', '0049_committee_talk_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendeeVoteTally',
+            fields=[
+                ('talk', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendee_vote_tally', serialize=False, to='talk.Talk')),
+                ('vote_count', models.PositiveIntegerField(default=0, verbose_name='Vote count')),
+                ('score_sum', models.PositiveIntegerField(default=0, verbose_name='Score sum')),
+                ('score_square_sum', models.PositiveIntegerField(default=0, verbose_name='Score square sum')),
+            ],
+            options={
+                'verbose_name': 'Attendee vote tally',
+                'verbose_name_plural': 'Attendee vote tallies',
+            },
+        ),
+        migrations.RunPython(
+            create_attendee_vote_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:18
+
+from django.db import migrations
+import psqlextra.manager.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talk', '0050_attendee_vote_tally'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='vote',
+            managers=[
+                ('objects', psqlextra.manager.manager.PostgresManager()),
+            ],
+        ),
+    ]
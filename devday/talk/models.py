@@ -1,11 +1,14 @@
 import logging
+import math
 from datetime import timedelta
 
 from django.conf import settings
 from django.core import signing
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models.signals import m2m_changed, pre_delete, post_delete
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
@@ -55,6 +58,44 @@ class TalkManager(models.Manager):
         TalkDraftSpeaker.objects.create(talk=talk, draft_speaker=draft_speaker, order=1)
         return talk
 
+    def update_speaker_labels(self, talk_ids):
+        """
+        Store the names of the draft and published speakers of the talks with
+        the given ids in their speaker label fields. Return a dictionary
+        mapping the talk ids to tuples of the new draft and published speaker
+        labels.
+        """
+        talk_ids = set(talk_ids)
+        draft_speakers = {talk_id: [] for talk_id in talk_ids}
+        published_speakers = {talk_id: [] for talk_id in talk_ids}
+        for link in TalkDraftSpeaker.objects.filter(talk_id__in=talk_ids).select_related(
+            "draft_speaker"
+        ):
+            draft_speakers[link.talk_id].append(str(link.draft_speaker))
+        for link in TalkPublishedSpeaker.objects.filter(
+            talk_id__in=talk_ids
+        ).select_related("published_speaker", "published_speaker__event"):
+            published_speakers[link.talk_id].append(str(link.published_speaker))
+        labels = {
+            talk_id: (
+                ", ".join(draft_speakers[talk_id]),
+                ", ".join(published_speakers[talk_id]),
+            )
+            for talk_id in talk_ids
+        }
+        self.bulk_update(
+            [
+                self.model(
+                    id=talk_id,
+                    draft_speaker_label=draft_label,
+                    published_speaker_label=published_label,
+                )
+                for talk_id, (draft_label, published_label) in labels.items()
+            ],
+            ["draft_speaker_label", "published_speaker_label"],
+        )
+        return labels
+
 
 class Talk(models.Model):
     draft_speakers = models.ManyToManyField(
@@ -90,6 +131,14 @@ class Talk(models.Model):
         verbose_name=_("Spots"),
         help_text=_("Maximum number of attendees for this talk"),
     )
+    # names of the speakers for __str__, kept up to date by the receivers of
+    # changes to speakers and speaker assignments below
+    draft_speaker_label = models.TextField(
+        verbose_name=_("Draft speakers"), blank=True, editable=False
+    )
+    published_speaker_label = models.TextField(
+        verbose_name=_("Published speakers"), blank=True, editable=False
+    )
 
     objects = TalkManager()
     reservable = ReservableTalkManager()
@@ -118,26 +167,9 @@ class Talk(models.Model):
         super(Talk, self).save(force_insert, force_update, using, update_fields)
 
     def __str__(self):
-        if TalkPublishedSpeaker.objects.filter(talk=self).exists():
-            return "{} - {}".format(
-                ", ".join(
-                    [
-                        str(speaker.published_speaker)
-                        for speaker in TalkPublishedSpeaker.objects.filter(talk=self)
-                    ]
-                ),
-                self.title,
-            )
-        else:
-            return "{} - {}".format(
-                ", ".join(
-                    [
-                        str(speaker.draft_speaker)
-                        for speaker in TalkDraftSpeaker.objects.filter(talk=self)
-                    ]
-                ),
-                self.title,
-            )
+        return "{} - {}".format(
+            self.published_speaker_label or self.draft_speaker_label, self.title
+        )
 
     @property
     def is_limited(self):
@@ -185,6 +217,49 @@ class TalkPublishedSpeaker(OrderedModel, TimeStampedModel):
         verbose_name_plural = _("Talk published speakers")
 
 
+@receiver(post_save, sender=TalkDraftSpeaker)
+@receiver(post_delete, sender=TalkDraftSpeaker)
+@receiver(post_save, sender=TalkPublishedSpeaker)
+@receiver(post_delete, sender=TalkPublishedSpeaker)
+def update_speaker_labels_of_talk(sender, instance, **kwargs):
+    draft_label, published_label = Talk.objects.update_speaker_labels(
+        [instance.talk_id]
+    )[instance.talk_id]
+    if sender.talk.is_cached(instance):
+        instance.talk.draft_speaker_label = draft_label
+        instance.talk.published_speaker_label = published_label
+
+
+@receiver(post_save, sender=Speaker)
+def update_speaker_labels_of_draft_speaker(sender, instance, created, **kwargs):
+    if not created:
+        Talk.objects.update_speaker_labels(
+            TalkDraftSpeaker.objects.filter(draft_speaker=instance).values_list(
+                "talk_id", flat=True
+            )
+        )
+
+
+@receiver(post_save, sender=PublishedSpeaker)
+def update_speaker_labels_of_published_speaker(sender, instance, created, **kwargs):
+    if not created:
+        Talk.objects.update_speaker_labels(
+            TalkPublishedSpeaker.objects.filter(
+                published_speaker=instance
+            ).values_list("talk_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Event)
+def update_published_speaker_labels_of_event(sender, instance, created, **kwargs):
+    if not created:
+        Talk.objects.update_speaker_labels(
+            TalkPublishedSpeaker.objects.filter(
+                published_speaker__event=instance
+            ).values_list("talk_id", flat=True)
+        )
+
+
 @receiver(post_delete, sender=TalkDraftSpeaker)
 def remove_talks_without_speakers(sender, instance, **kwargs):
     talk = instance.talk
@@ -276,15 +351,33 @@ class Vote(models.Model):
     talk = models.ForeignKey(Talk, on_delete=models.CASCADE)
     score = models.PositiveSmallIntegerField()
 
+    objects = PostgresManager()
+
     class Meta:
         unique_together = ["voter", "talk"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded values to update the committee statistics,
+        # deferred fields are missing
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, attname):
+        """
+        Return the value of the given field as it has been loaded from the
+        database. Fall back to the current value if the field has not been
+        loaded, which loads a deferred field.
+        """
+        loaded_values = getattr(self, "_loaded_values", {})
+        if attname in loaded_values:
+            return loaded_values[attname]
+        return getattr(self, attname)
+
     def __str__(self):
         return "{} voted {} for {} by {}".format(
-            self.voter,
-            self.score,
-            self.talk.title,
-            ", ".join([str(speaker) for speaker in self.talk.draft_speakers.all()]),
+            self.voter, self.score, self.talk.title, self.talk.draft_speaker_label
         )
 
 
@@ -303,10 +396,224 @@ class TalkComment(TimeStampedModel):
             self.commenter,
             self.comment,
             self.talk.title,
-            ", ".join(
-                [str(draft_speaker) for draft_speaker in self.talk.draft_speakers.all()]
+            self.talk.draft_speaker_label,
+        )
+
+
+def add_to_talk_counters(manager, deltas):
+    """
+    Add the given deltas to the counters of talks kept by the model of the
+    given manager. deltas maps talk ids to dictionaries of counter field names
+    and the values to add. All existing counters are updated by one UPDATE
+    statement, the counters of talks without a row are computed from scratch
+    by the refresh_many method of the manager.
+    """
+    if not deltas:
+        return
+    existing = set(
+        manager.filter(talk_id__in=deltas).values_list("talk_id", flat=True)
+    )
+    manager.refresh_many(deltas.keys() - existing)
+    if not existing:
+        return
+    field_names = {name for talk_deltas in deltas.values() for name in talk_deltas}
+    manager.filter(talk_id__in=existing).update(
+        **{
+            name: F(name)
+            + Case(
+                *[
+                    When(talk_id=talk_id, then=Value(deltas[talk_id].get(name, 0)))
+                    for talk_id in existing
+                ],
+                default=Value(0),
+                output_field=models.IntegerField()
+            )
+            for name in field_names
+        }
+    )
+
+
+def refresh_talk_counters(manager, talk_ids, counters):
+    """
+    Compute the counters of the given talks kept by the model of the given
+    manager from scratch. counters maps counter field names to tuples of a
+    queryset of objects with a talk_id and the aggregate of these objects
+    that is the value of the counter.
+
+    The rows are created and locked before the aggregates are read by the
+    UPDATE statement, so deltas that concurrent transactions add to the rows
+    after they have been locked are added to the computed values instead of
+    being overwritten by them.
+    """
+    talk_ids = sorted(set(talk_ids))
+    if not talk_ids:
+        return
+    with transaction.atomic():
+        manager.bulk_create(
+            [manager.model(talk_id=talk_id) for talk_id in talk_ids],
+            ignore_conflicts=True,
+        )
+        list(
+            manager.select_for_update()
+            .filter(talk_id__in=talk_ids)
+            .order_by("talk_id")
+            .values_list("talk_id", flat=True)
+        )
+        manager.filter(talk_id__in=talk_ids).update(
+            **{
+                name: Coalesce(
+                    Subquery(
+                        queryset.filter(talk_id=OuterRef("talk_id"))
+                        .order_by()
+                        .values("talk_id")
+                        .annotate(value=aggregate)
+                        .values("value"),
+                        output_field=models.IntegerField(),
+                    ),
+                    0,
+                )
+                for name, (queryset, aggregate) in counters.items()
+            }
+        )
+
+
+class CommitteeTalkStatisticsManager(models.Manager):
+    def refresh(self, talk_id):
+        """
+        Compute the statistics of the talk with the given id from its votes
+        and comments.
+        """
+        self.refresh_many([talk_id])
+
+    def refresh_many(self, talk_ids):
+        """
+        Compute the statistics of the talks with the given ids from their
+        votes and comments.
+        """
+        refresh_talk_counters(
+            self,
+            talk_ids,
+            {
+                "vote_count": (Vote.objects.all(), Count("id")),
+                "vote_sum": (Vote.objects.all(), Sum("score")),
+                "comment_count": (TalkComment.objects.all(), Count("id")),
+            },
+        )
+
+    def add(self, talk_id, **deltas):
+        """
+        Add the given deltas to the counters of the talk with the given id.
+        Return the number of updated rows, which is 0 if there are no
+        statistics for the talk yet.
+        """
+        return self.filter(talk_id=talk_id).update(
+            **{name: F(name) + delta for name, delta in deltas.items()}
+        )
+
+    def add_many(self, deltas):
+        """
+        Add the deltas in the given dictionary of talk ids to dictionaries of
+        counter names and deltas to the statistics of the talks.
+        """
+        add_to_talk_counters(self, deltas)
+
+    def annotate_talks(self, queryset):
+        """
+        Annotate the talks of the given queryset with the vote_count,
+        vote_sum, average_score and comment_count from their statistics.
+        """
+        return queryset.annotate(
+            vote_count=Coalesce("committee_statistics__vote_count", 0),
+            vote_sum=Coalesce("committee_statistics__vote_sum", 0),
+            average_score=Cast("committee_statistics__vote_sum", models.FloatField())
+            / Cast(
+                NullIf("committee_statistics__vote_count", 0), models.FloatField()
             ),
+            comment_count=Coalesce("committee_statistics__comment_count", 0),
+        )
+
+
+class CommitteeTalkStatistics(models.Model):
+    """
+    Vote and comment counters of a talk for the program committee, kept up to
+    date by the receivers of changes to votes and comments below.
+    """
+
+    talk = models.OneToOneField(
+        Talk,
+        primary_key=True,
+        related_name="committee_statistics",
+        on_delete=models.CASCADE,
+    )
+    vote_count = models.PositiveIntegerField(_("Vote count"), default=0)
+    vote_sum = models.PositiveIntegerField(_("Vote sum"), default=0)
+    comment_count = models.PositiveIntegerField(_("Comment count"), default=0)
+
+    objects = CommitteeTalkStatisticsManager()
+
+    class Meta:
+        verbose_name = _("Committee talk statistics")
+        verbose_name_plural = _("Committee talk statistics")
+
+
+@receiver(post_save, sender=Vote)
+def update_committee_statistics_for_saved_vote(sender, instance, created, **kwargs):
+    loaded_values = getattr(instance, "_loaded_values", None)
+    if created:
+        updated = CommitteeTalkStatistics.objects.add(
+            instance.talk_id, vote_count=1, vote_sum=instance.score
         )
+    elif (
+        loaded_values
+        and "score" in loaded_values
+        and loaded_values.get("talk_id", instance.talk_id) == instance.talk_id
+    ):
+        updated = CommitteeTalkStatistics.objects.add(
+            instance.talk_id, vote_sum=instance.score - loaded_values["score"]
+        )
+    else:
+        # the previous score is unknown or the vote has been moved to another
+        # talk
+        if loaded_values:
+            previous_talk_id = loaded_values.get("talk_id", instance.talk_id)
+            if previous_talk_id != instance.talk_id:
+                CommitteeTalkStatistics.objects.refresh(previous_talk_id)
+        updated = 0
+    if not updated:
+        CommitteeTalkStatistics.objects.refresh(instance.talk_id)
+    instance._loaded_values = {"talk_id": instance.talk_id, "score": instance.score}
+
+
+@receiver(pre_delete, sender=Vote)
+def load_deleted_vote(sender, instance, **kwargs):
+    # deferred fields cannot be loaded after the vote has been deleted
+    instance._loaded_values = {
+        attname: instance.get_loaded_value(attname) for attname in ("talk_id", "score")
+    }
+
+
+@receiver(post_delete, sender=Vote)
+def update_committee_statistics_for_deleted_vote(sender, instance, **kwargs):
+    CommitteeTalkStatistics.objects.add(
+        instance.get_loaded_value("talk_id"),
+        vote_count=-1,
+        vote_sum=-instance.get_loaded_value("score"),
+    )
+
+
+@receiver(post_save, sender=TalkComment)
+def update_committee_statistics_for_saved_comment(
+    sender, instance, created, **kwargs
+):
+    if created and not CommitteeTalkStatistics.objects.add(
+        instance.talk_id, comment_count=1
+    ):
+        CommitteeTalkStatistics.objects.refresh(instance.talk_id)
+
+
+@receiver(post_delete, sender=TalkComment)
+def update_committee_statistics_for_deleted_comment(sender, instance, **kwargs):
+    CommitteeTalkStatistics.objects.add(instance.talk_id, comment_count=-1)
 
 
 class RoomManager(models.Manager):
@@ -440,10 +747,107 @@ class AttendeeVote(TimeStampedModel):
             self.attendee,
             self.score,
             self.talk.title,
-            ", ".join(self.talk.published_speakers.all()),
+            self.talk.published_speaker_label,
         )
 
 
+class AttendeeVoteTallyManager(models.Manager):
+    def add(self, talk_id, vote_count, score_sum, score_square_sum):
+        """
+        Add the given deltas to the tally of the talk with the given id. A
+        missing tally is computed from the votes of the talk instead.
+        """
+        self.add_many(
+            {
+                talk_id: {
+                    "vote_count": vote_count,
+                    "score_sum": score_sum,
+                    "score_square_sum": score_square_sum,
+                }
+            }
+        )
+
+    def add_many(self, deltas):
+        """
+        Add the deltas in the given dictionary of talk ids to dictionaries of
+        counter names and deltas to the tallies of the talks.
+        """
+        add_to_talk_counters(self, deltas)
+
+    def refresh(self, talk_id):
+        """
+        Compute the tally of the talk with the given id from its votes.
+        """
+        self.refresh_many([talk_id])
+
+    def refresh_many(self, talk_ids):
+        """
+        Compute the tallies of the talks with the given ids from their votes.
+        """
+        votes = AttendeeVote.objects.all()
+        refresh_talk_counters(
+            self,
+            talk_ids,
+            {
+                "vote_count": (votes, Count("id")),
+                "score_sum": (votes, Sum("score")),
+                "score_square_sum": (votes, Sum(F("score") * F("score"))),
+            },
+        )
+
+
+class AttendeeVoteTally(models.Model):
+    """
+    Running tally of the attendee votes for a talk. Votes cast with
+    talk.voting.cast_attendee_vote update the tally incrementally, other
+    saved votes refresh it and deleted votes are subtracted by the receivers
+    below.
+    """
+
+    talk = models.OneToOneField(
+        Talk,
+        primary_key=True,
+        related_name="attendee_vote_tally",
+        on_delete=models.CASCADE,
+    )
+    vote_count = models.PositiveIntegerField(_("Vote count"), default=0)
+    score_sum = models.PositiveIntegerField(_("Score sum"), default=0)
+    score_square_sum = models.PositiveIntegerField(_("Score square sum"), default=0)
+
+    objects = AttendeeVoteTallyManager()
+
+    class Meta:
+        verbose_name = _("Attendee vote tally")
+        verbose_name_plural = _("Attendee vote tallies")
+
+    @property
+    def average(self):
+        if not self.vote_count:
+            return None
+        return self.score_sum / self.vote_count
+
+    @property
+    def standard_deviation(self):
+        if not self.vote_count:
+            return None
+        variance = self.score_square_sum / self.vote_count - self.average ** 2
+        return math.sqrt(max(variance, 0))
+
+
+@receiver(post_save, sender=AttendeeVote)
+def update_attendee_vote_tally_for_saved_vote(sender, instance, **kwargs):
+    AttendeeVoteTally.objects.refresh(instance.talk_id)
+
+
+@receiver(post_delete, sender=AttendeeVote)
+def update_attendee_vote_tally_for_deleted_vote(sender, instance, **kwargs):
+    AttendeeVoteTally.objects.filter(talk_id=instance.talk_id).update(
+        vote_count=F("vote_count") - 1,
+        score_sum=F("score_sum") - instance.score,
+        score_square_sum=F("score_square_sum") - instance.score ** 2,
+    )
+
+
 class AttendeeFeedback(TimeStampedModel):
     attendee = models.ForeignKey(
         Attendee,
@@ -476,12 +880,7 @@ class AttendeeFeedback(TimeStampedModel):
         return "{} gave feedback for {} by {}: score={}, comment={}".format(
             self.attendee,
             self.talk.title,
-            ", ".join(
-                [
-                    str(published_speaker)
-                    for published_speaker in self.talk.published_speakers.all()
-                ]
-            ),
+            self.talk.published_speaker_label,
             self.score,
             self.comment,
         )
@@ -0,0 +1,114 @@
+"""
+Publish many sessions at once.
+
+All sessions are published in one transaction with a fixed number of queries:
+the tracks, sessions, draft speakers and existing published speakers are
+loaded in bulk, missing published speakers and speaker assignments are
+created with bulk_create and the tracks and speaker labels of the sessions are
+set with bulk_update. The images of new published speakers are copied from
+their speakers by a background job after the transaction has been committed.
+
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import QuerySet
+
+from event.models import EventContentVersion
+from speaker.images import run_in_background
+from speaker.models import PublishedSpeaker
+from talk.models import Talk, TalkDraftSpeaker, TalkPublishedSpeaker, Track
+from talk.schedule import invalidate_schedule
+
+logger = logging.getLogger(__name__)
+
+
+def publish_talks(talk_tracks):
+    """
+    Publish the sessions in the given dictionary of talk ids to track ids.
+    Return a dictionary with the number of published sessions, of new
+    published speakers and of new speaker assignments.
+    """
+    with transaction.atomic():
+        tracks = Track.objects.in_bulk(set(talk_tracks.values()))
+        talks = list(
+            Talk.objects.filter(id__in=talk_tracks.keys()).select_related("event")
+        )
+        talks = [talk for talk in talks if talk_tracks[talk.id] in tracks]
+        logger.info("publishing %d sessions", len(talks))
+
+        draft_links = list(
+            TalkDraftSpeaker.objects.filter(talk__in=talks)
+            .select_related("draft_speaker", "draft_speaker__user")
+            .order_by("talk_id", "order")
+        )
+        event_ids = {talk.event_id for talk in talks}
+        published_speakers = {
+            (speaker.speaker_id, speaker.event_id): speaker
+            for speaker in PublishedSpeaker.objects.filter(
+                event_id__in=event_ids,
+                speaker_id__in={link.draft_speaker_id for link in draft_links},
+            )
+        }
+
+        talks_by_id = {talk.id: talk for talk in talks}
+        new_speakers = []
+        for link in draft_links:
+            event = talks_by_id[link.talk_id].event
+            key = (link.draft_speaker_id, event.id)
+            if key not in published_speakers:
+                published_speakers[key] = PublishedSpeaker.objects.build_from_speaker(
+                    link.draft_speaker, event
+                )
+                new_speakers.append(published_speakers[key])
+        PublishedSpeaker.objects.bulk_create(new_speakers)
+        logger.info("created %d published speakers", len(new_speakers))
+
+        existing_links = set(
+            TalkPublishedSpeaker.objects.filter(talk__in=talks).values_list(
+                "talk_id", "published_speaker_id"
+            )
+        )
+        new_links = []
+        for link in draft_links:
+            published_speaker = published_speakers[
+                (link.draft_speaker_id, talks_by_id[link.talk_id].event_id)
+            ]
+            if (link.talk_id, published_speaker.id) not in existing_links:
+                existing_links.add((link.talk_id, published_speaker.id))
+                new_links.append(
+                    TalkPublishedSpeaker(
+                        talk_id=link.talk_id,
+                        published_speaker=published_speaker,
+                        order=link.order,
+                    )
+                )
+        # the bulk_create of OrderedModel would renumber the order
+        QuerySet(TalkPublishedSpeaker).bulk_create(new_links)
+        logger.info("created %d speaker assignments", len(new_links))
+
+        for talk in talks:
+            talk.track = tracks[talk_tracks[talk.id]]
+        Talk.objects.bulk_update(talks, ["track"])
+
+        # bulk operations do not send the signals that update the speaker
+        # labels, invalidate the schedule and bump the content versions
+        if new_links:
+            Talk.objects.update_speaker_labels(
+                {link.talk_id for link in new_links}
+            )
+        for event_id in event_ids:
+            invalidate_schedule(event_id)
+        EventContentVersion.objects.bump(event_ids)
+
+        if new_speakers:
+            run_in_background(
+                PublishedSpeaker.objects.copy_images_from_speakers,
+                [published_speaker.id for published_speaker in new_speakers],
+            )
+    logger.info("published %d sessions", len(talks))
+    return {
+        "talks": len(talks),
+        "speakers": len(new_speakers),
+        "links": len(new_links),
+    }
@@ -1,9 +1,18 @@
 """
 Functions for reservation handling.
 
+All changes that depend on the number of confirmed reservations of a talk lock
+the talk row first. Concurrent reservations for the same talk are therefore
+processed one after the other and the number of confirmed reservations never
+exceeds the spots of the talk.
+
 """
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
+from django.db import transaction
+from django.utils import timezone
+
+from talk.models import SessionReservation, Talk
 
 
 def get_reservation_email_context(reservation, request, confirmation_key):
@@ -16,3 +25,97 @@ def get_reservation_email_context(reservation, request, confirmation_key):
         "event": reservation.talk.event,
         "user": reservation.attendee.user,
     }
+
+
+def _lock_talk(talk_id):
+    return Talk.objects.select_for_update().only("id", "spots").get(pk=talk_id)
+
+
+def _confirmed_reservations(talk_id):
+    return SessionReservation.objects.filter(talk_id=talk_id, is_confirmed=True)
+
+
+def reserve(talk, attendee):
+    """
+    Reserve a spot of the given talk for the given attendee. The reservation is
+    put on the waiting list if the talk is fully booked.
+
+    Return a tuple of the reservation and a boolean that is True if the
+    reservation has been created and False if the attendee had already
+    reserved a spot.
+    """
+    with transaction.atomic():
+        locked_talk = _lock_talk(talk.id)
+        reservation = SessionReservation.objects.filter(
+            talk_id=talk.id, attendee=attendee
+        ).first()
+        if reservation is not None:
+            return reservation, False
+        reservation = SessionReservation.objects.create(
+            talk=talk,
+            attendee=attendee,
+            is_confirmed=False,
+            is_waiting=_confirmed_reservations(talk.id).count() >= locked_talk.spots,
+        )
+    return reservation, True
+
+
+def confirm_reservation(reservation):
+    """
+    Confirm the given reservation if the talk has a free spot. Otherwise the
+    reservation is put on the waiting list.
+
+    Return True if the reservation is confirmed and False if it has been put
+    on the waiting list.
+    """
+    with transaction.atomic():
+        locked_talk = _lock_talk(reservation.talk_id)
+        confirmed = _confirmed_reservations(locked_talk.id)
+        if confirmed.filter(pk=reservation.pk).exists():
+            reservation.is_confirmed = True
+            return True
+        if confirmed.count() >= locked_talk.spots:
+            reservation.is_waiting = True
+            reservation.save(update_fields=["is_waiting", "modified"])
+            return False
+        reservation.is_confirmed = True
+        reservation.is_waiting = False
+        reservation.save(update_fields=["is_confirmed", "is_waiting", "modified"])
+    return True
+
+
+def cancel_reservation(reservation):
+    """
+    Cancel the given reservation. The spot is not handed on, use
+    promote_waiting_reservations to move reservations from the waiting list.
+    """
+    with transaction.atomic():
+        _lock_talk(reservation.talk_id)
+        reservation.delete()
+
+
+def promote_waiting_reservations(talk_id, count=None):
+    """
+    Move the oldest reservations of the given talk from the waiting list. If
+    no count is given as many reservations as there are free spots are moved.
+
+    Return the list of moved reservations with talk, event, attendee and user
+    selected to send confirmation mails.
+    """
+    with transaction.atomic():
+        locked_talk = _lock_talk(talk_id)
+        if count is None:
+            count = locked_talk.spots - _confirmed_reservations(talk_id).count()
+        if count <= 0:
+            return []
+        reservations = list(
+            SessionReservation.objects.filter(talk_id=talk_id, is_waiting=True)
+            .select_related("talk", "talk__event", "attendee", "attendee__user")
+            .order_by("created")[:count]
+        )
+        SessionReservation.objects.filter(
+            pk__in=[reservation.pk for reservation in reservations]
+        ).update(is_waiting=False, modified=timezone.now())
+    for reservation in reservations:
+        reservation.is_waiting = False
+    return reservations
@@ -0,0 +1,145 @@
+"""
+Schedule grid layout for the sessions of an event.
+
+The layout is computed in one pass over the time slots and talk slots of an
+event and is kept in the cache until one of the objects it is built from
+changes. The cache is local to each process, so the cache key contains the
+content version of the event that is stored in the database and bumped by all
+processes.
+
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+
+from devday.utils import caching
+from event.models import EventContentVersion
+from talk.models import Room, Talk, TalkSlot, TimeSlot
+
+
+def schedule_cache_namespace(event_id):
+    return "talk:schedule:{}".format(event_id)
+
+
+def invalidate_schedule(event_id):
+    if event_id is not None:
+        caching.invalidate(schedule_cache_namespace(event_id))
+
+
+def count_overlaps(time_slots):
+    """
+    Count the other time slots that each time slot contains or is contained
+    in. Time slots with identical start and end times contain each other and
+    are therefore counted twice.
+    """
+    overlaps = [0] * len(time_slots)
+    by_start = sorted(range(len(time_slots)), key=lambda i: time_slots[i].start_time)
+
+    def start_time(index):
+        return time_slots[index].start_time
+
+    # time slots starting at the same time or earlier and ending at the same
+    # time or later contain the current time slot
+    ends = []
+    for _, group in groupby(by_start, key=start_time):
+        group = list(group)
+        for index in group:
+            insort(ends, time_slots[index].end_time)
+        for index in group:
+            overlaps[index] += (
+                len(ends) - bisect_left(ends, time_slots[index].end_time) - 1
+            )
+
+    # time slots starting at the same time or later and ending at the same time
+    # or earlier are contained in the current time slot
+    ends = []
+    for _, group in groupby(reversed(by_start), key=start_time):
+        group = list(group)
+        for index in group:
+            insort(ends, time_slots[index].end_time)
+        for index in group:
+            overlaps[index] += bisect_right(ends, time_slots[index].end_time) - 1
+    return overlaps
+
+
+def build_block(time_slots, rooms, talks_by_time_and_room):
+    block_room_ids = set()
+    for time_slot in time_slots:
+        block_room_ids.update(talks_by_time_and_room.get(time_slot.id, {}))
+    block_rooms = [room for room in rooms if room.id in block_room_ids]
+
+    schedule = []
+    rows_by_start_time = {}
+    for time_slot, overlap_count in zip(time_slots, count_overlaps(time_slots)):
+        attributes = {}
+        if overlap_count > 1:
+            attributes["rowspan"] = overlap_count
+        elif overlap_count == 1:
+            attributes["colspan"] = len(block_rooms) - 1
+        row = rows_by_start_time.get(time_slot.start_time)
+        if row is None:
+            row = {"time_slots": [], "room_talks": {}}
+            rows_by_start_time[time_slot.start_time] = row
+            schedule.append(row)
+        row["time_slots"].append([time_slot, attributes])
+        room_talks = talks_by_time_and_room.get(time_slot.id, {})
+        for room in block_rooms:
+            if room.id in room_talks:
+                row["room_talks"].setdefault(room, []).extend(
+                    [time_slot, room_talks[room.id], attributes]
+                )
+    return {"time_slots": time_slots, "rooms": block_rooms, "schedule": schedule}
+
+
+def build_schedule(event):
+    """
+    Build the schedule grid of the given event.
+
+    The result contains the blocks of the grid indexed by block number and the
+    list of published talks that have not been scheduled yet.
+    """
+    time_slots = TimeSlot.objects.filter(event=event).order_by(
+        "block", "start_time", "end_time"
+    )
+    talk_slots = (
+        TalkSlot.objects.filter(talk__event=event)
+        .select_related("talk", "talk__event", "talk__track", "room", "time")
+        .prefetch_related("talk__published_speakers")
+        .order_by("time__start_time", "talk__title")
+    )
+    rooms = list(Room.objects.for_event(event))
+
+    talks_by_time_and_room = {}
+    for talk_slot in talk_slots:
+        talks_by_time_and_room.setdefault(talk_slot.time_id, {}).setdefault(
+            talk_slot.room_id, []
+        ).append(talk_slot.talk)
+
+    blocks = {
+        block: build_block(list(block_time_slots), rooms, talks_by_time_and_room)
+        for block, block_time_slots in groupby(time_slots, key=attrgetter("block"))
+    }
+
+    unscheduled = list(
+        Talk.objects.filter(event=event, track__isnull=False, talkslot__isnull=True)
+        .select_related("event", "track")
+        .prefetch_related("published_speakers")
+        .order_by("title")
+    )
+    return {"blocks": blocks, "unscheduled": unscheduled}
+
+
+def get_schedule(event):
+    """
+    Return the schedule grid of the given event from the cache or build it if
+    it has not been cached yet.
+    """
+    version = EventContentVersion.objects.get_for_event(event.id).version
+    return caching.get_or_build(
+        schedule_cache_namespace(event.id),
+        lambda: build_schedule(event),
+        settings.TALK_SCHEDULE_CACHE_TIMEOUT,
+        name="{}:grid".format(version),
+    )
@@ -4,10 +4,27 @@ Custom signals sent during the confirmation processes.
 """
 from attendee.signals import attendence_cancelled
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import Signal, receiver
 from django.template.loader import render_to_string
-from talk.models import SessionReservation
-from talk.reservation import get_reservation_email_context
+from event.models import Event, EventContentVersion
+from speaker.models import PublishedSpeaker
+from talk.models import (
+    Room,
+    SessionReservation,
+    Talk,
+    TalkMedia,
+    TalkPublishedSpeaker,
+    TalkSlot,
+    TimeSlot,
+    Track,
+)
+from talk.reservation import (
+    get_reservation_email_context,
+    promote_waiting_reservations,
+)
+from talk.schedule import invalidate_schedule
 
 session_reservation_confirmed = Signal(providing_args=["reservation", "request"])
 
@@ -42,19 +59,10 @@ def send_reservation_confirmation_mail(
 def send_confirmation_mails_to_pending_reservations(sender, **kwargs):
     old_reservation = kwargs.get("reservation")
     request = kwargs.get("request")
-    reservation = (
-        SessionReservation.objects.filter(
-            talk_id=old_reservation.talk_id, is_waiting=True
+    for reservation in promote_waiting_reservations(old_reservation.talk_id, 1):
+        send_reservation_confirmation_mail(
+            request, reservation, reservation.attendee.user
         )
-        .select_related("talk", "talk__event", "attendee", "attendee__user")
-        .order_by("created")
-        .first()
-    )
-    if reservation:
-        user = reservation.attendee.user
-        reservation.is_waiting = False
-        reservation.save()
-        send_reservation_confirmation_mail(request, reservation, user)
 
 
 @receiver(attendence_cancelled, dispatch_uid="talk_check_pending_reservations_attendee")
@@ -62,16 +70,67 @@ def send_confirmation_mails_to_remaining_attendees(sender, **kwargs):
     old_attendee = kwargs.get("attendee")
     request = kwargs.get("request")
     for old_reservation in SessionReservation.objects.filter(attendee=old_attendee):
-        reservation = (
-            SessionReservation.objects.filter(
-                talk_id=old_reservation.talk_id, is_waiting=True
+        for reservation in promote_waiting_reservations(old_reservation.talk_id, 1):
+            send_reservation_confirmation_mail(
+                request, reservation, reservation.attendee.user
             )
-            .select_related("talk", "talk__event", "attendee", "attendee__user")
-            .order_by("created")
-            .first()
-        )
-        if reservation:
-            user = reservation.attendee.user
-            reservation.is_waiting = False
-            reservation.save()
-            send_reservation_confirmation_mail(request, reservation, user)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_schedule_for_event(sender, instance, **kwargs):
+    invalidate_schedule(instance.pk)
+
+
+@receiver(post_save, sender=PublishedSpeaker)
+@receiver(post_delete, sender=PublishedSpeaker)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Talk)
+@receiver(post_delete, sender=Talk)
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+def invalidate_schedule_for_event_object(sender, instance, **kwargs):
+    invalidate_schedule(instance.event_id)
+
+
+@receiver(post_save, sender=TalkPublishedSpeaker)
+@receiver(post_delete, sender=TalkPublishedSpeaker)
+@receiver(post_save, sender=TalkSlot)
+@receiver(post_delete, sender=TalkSlot)
+def invalidate_schedule_for_talk_object(sender, instance, **kwargs):
+    try:
+        invalidate_schedule(instance.talk.event_id)
+    except ObjectDoesNotExist:
+        # the talk is being deleted and invalidates the schedule itself
+        pass
+
+
+@receiver(post_save, sender=PublishedSpeaker)
+@receiver(post_delete, sender=PublishedSpeaker)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Talk)
+@receiver(post_delete, sender=Talk)
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+def bump_content_version_for_event_object(sender, instance, **kwargs):
+    EventContentVersion.objects.bump([instance.event_id])
+
+
+@receiver(post_save, sender=TalkMedia)
+@receiver(post_delete, sender=TalkMedia)
+@receiver(post_save, sender=TalkPublishedSpeaker)
+@receiver(post_delete, sender=TalkPublishedSpeaker)
+@receiver(post_save, sender=TalkSlot)
+@receiver(post_delete, sender=TalkSlot)
+def bump_content_version_for_talk_object(sender, instance, **kwargs):
+    try:
+        EventContentVersion.objects.bump([instance.talk.event_id])
+    except ObjectDoesNotExist:
+        # the talk is being deleted and bumps the content version itself
+        pass
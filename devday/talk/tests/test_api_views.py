@@ -0,0 +1,133 @@
+from django.test import TestCase, override_settings
+
+from attendee.tests import attendee_testutils
+from event.models import EventContentVersion
+from event.tests import event_testutils
+from speaker.models import PublishedSpeaker
+from speaker.tests import speaker_testutils
+from talk.models import Track
+from talk.tests import talk_testutils
+
+
+class SessionViewSetTest(TestCase):
+    url = "/api/sessions/"
+
+    def setUp(self):
+        self.event = event_testutils.create_test_event("Test event")
+        self.speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.track = Track.objects.create(name="Test track", event=self.event)
+        self.talks = [
+            self.create_published_talk(self.event, "Session {}".format(i))
+            for i in range(3)
+        ]
+        user, password = attendee_testutils.create_test_user("user@example.org")
+        self.client.login(username=user.email, password=password)
+
+    def create_published_talk(self, event, title):
+        talk = talk_testutils.create_test_talk(self.speaker, event, title=title)
+        talk.publish(self.track)
+        return talk
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [s["title"] for s in data], ["Session 0", "Session 1", "Session 2"]
+        )
+        self.assertEqual(data[0]["event"], "Test event")
+        self.assertEqual(len(data[0]["speakers"]), 1)
+        self.assertEqual(data[0]["speakers"][0]["name"], "Test Speaker")
+
+    def test_list_queries_do_not_depend_on_sessions(self):
+        speaker, _, _ = speaker_testutils.create_test_speaker(
+            "other@example.org", name="Other Speaker"
+        )
+        self.talks[0].draft_speakers.add(speaker)
+        self.talks[0].publish(self.track)
+        self.client.get(self.url)
+        with self.assertNumQueries(6):
+            self.client.get(self.url)
+        for i in range(3, 6):
+            self.create_published_talk(self.event, "Session {}".format(i))
+        with self.assertNumQueries(6):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()), 6)
+
+    def test_event_filter(self):
+        other_event = event_testutils.create_test_event("Other event")
+        other_talk = self.create_published_talk(other_event, "Other session")
+        response = self.client.get(self.url, {"event": other_event.slug})
+        self.assertEqual([s["id"] for s in response.json()], [other_talk.slug])
+
+    def test_cursor_pagination(self):
+        response = self.client.get(self.url, {"page_size": 2})
+        data = response.json()
+        self.assertEqual(
+            [s["title"] for s in data["results"]], ["Session 0", "Session 1"]
+        )
+        self.assertIsNone(data["previous"])
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual([s["title"] for s in data["results"]], ["Session 2"])
+        self.assertIsNone(data["next"])
+
+    @override_settings(TALK_API_SESSION_MAX_PAGE_SIZE=1)
+    def test_cursor_pagination_max_page_size(self):
+        response = self.client.get(self.url, {"page_size": 50})
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            self.url, {"event": self.event.slug}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.talks[0].title = "Changed"
+        self.talks[0].save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_conditional_get_detail(self):
+        url = "{}{}/".format(self.url, self.talks[0].slug)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_published_speaker_change_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        published_speaker = PublishedSpeaker.objects.get(speaker=self.speaker)
+        published_speaker.name = "Renamed Speaker"
+        published_speaker.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()[0]["speakers"][0]["name"], "Renamed Speaker"
+        )
+
+    def test_publish_changes_version(self):
+        version = EventContentVersion.objects.get(event=self.event).version
+        talk = talk_testutils.create_test_talk(
+            self.speaker, self.event, title="New session"
+        )
+        talk.publish(self.track)
+        self.assertGreater(
+            EventContentVersion.objects.get(event=self.event).version, version
+        )
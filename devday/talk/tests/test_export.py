@@ -0,0 +1,82 @@
+from django.test import TestCase
+
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.export import get_session_summary, iterate_in_chunks
+from talk.models import Talk, TalkComment, TalkFormat, Vote
+from talk.tests import talk_testutils
+
+
+class SessionSummaryTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event("Export Event")
+        self.speaker, _, _ = speaker_testutils.create_test_speaker(
+            organization="Speaker Org"
+        )
+        self.format = TalkFormat.objects.create(name="Talk", duration=45)
+        self.voter1, _ = attendee_testutils.create_test_user("voter1@example.org")
+        self.voter2, _ = attendee_testutils.create_test_user("voter2@example.org")
+        self.talks = []
+        for title in ("Talk 1", "Talk 2", "Talk 3"):
+            talk = talk_testutils.create_test_talk(self.speaker, self.event, title)
+            talk.talkformat.add(self.format)
+            self.talks.append(talk)
+        Vote.objects.create(voter=self.voter1, talk=self.talks[0], score=2)
+        Vote.objects.create(voter=self.voter2, talk=self.talks[0], score=5)
+        self.first_comment = TalkComment.objects.create(
+            commenter=self.voter1, talk=self.talks[0], comment="First"
+        )
+        self.second_comment = TalkComment.objects.create(
+            commenter=self.voter2, talk=self.talks[0], comment="Second"
+        )
+
+    def test_get_session_summary(self):
+        talks = list(get_session_summary(self.event).order_by("title"))
+        self.assertEqual(talks, self.talks)
+        self.assertEqual(talks[0].num_votes, 2)
+        self.assertEqual(talks[0].avg_score, 3.5)
+        self.assertEqual(talks[0].total_score, 7)
+        self.assertEqual(
+            talks[0].summary_comments, [self.first_comment, self.second_comment]
+        )
+        self.assertEqual(talks[1].num_votes, 0)
+        self.assertIsNone(talks[1].avg_score)
+        self.assertIsNone(talks[1].total_score)
+        self.assertEqual(talks[1].summary_comments, [])
+
+    def test_get_session_summary_comment_order(self):
+        self.first_comment.comment = "Changed"
+        self.first_comment.save()
+        talk = get_session_summary(self.event).get(pk=self.talks[0].pk)
+        self.assertEqual(
+            talk.summary_comments, [self.second_comment, self.first_comment]
+        )
+        talk = get_session_summary(self.event, comment_order="created").get(
+            pk=self.talks[0].pk
+        )
+        self.assertEqual(
+            talk.summary_comments, [self.first_comment, self.second_comment]
+        )
+
+    def test_get_session_summary_queries(self):
+        with self.assertNumQueries(4):
+            for talk in get_session_summary(self.event):
+                [s.name for s in talk.draft_speakers.all()]
+                [str(f) for f in talk.talkformat.all()]
+                [str(c.commenter) for c in talk.summary_comments]
+
+    def test_iterate_in_chunks(self):
+        talks = get_session_summary(self.event).order_by("title", "pk")
+        with self.assertNumQueries(8):
+            result = [
+                (talk, list(talk.draft_speakers.all()))
+                for talk in iterate_in_chunks(talks, 2)
+            ]
+        self.assertEqual([talk for talk, _ in result], self.talks)
+        self.assertEqual([speakers for _, speakers in result], [[self.speaker]] * 3)
+
+    def test_iterate_in_chunks_exact_multiple(self):
+        talks = Talk.objects.filter(event=self.event).order_by("title", "pk")
+        with self.assertNumQueries(2):
+            self.assertEqual(list(iterate_in_chunks(talks, 3)), self.talks)
@@ -0,0 +1,242 @@
+import json
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.feeds import (
+    build_schedule_data,
+    escape_ical_text,
+    fold_ical_line,
+    get_schedule_feed,
+    get_time_shift,
+    local_date,
+)
+from talk.models import Room, TalkSlot, TimeSlot, Track
+from talk.tests import talk_testutils
+
+
+class ScheduleFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = event_testutils.create_test_event("Feed Event")
+        self.start = self.event.start_time.replace(
+            minute=0, second=0, microsecond=0
+        )
+        room1 = Room.objects.create(event=self.event, name="Room 1")
+        room2 = Room.objects.create(event=self.event, name="Room 2")
+        slot1 = TimeSlot.objects.create(
+            event=self.event,
+            name="Slot 1",
+            start_time=self.start,
+            end_time=self.start + timedelta(hours=1),
+        )
+        slot2 = TimeSlot.objects.create(
+            event=self.event,
+            name="Slot 2",
+            start_time=self.start + timedelta(hours=1),
+            end_time=self.start + timedelta(hours=2, minutes=30),
+        )
+        track = Track.objects.create(event=self.event, name="Track")
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.talks = []
+        for title in ("Talk 1", "Talk 2 \ue0000\ue001", "Talk 3"):
+            talk = talk_testutils.create_test_talk(speaker, self.event, title)
+            talk.publish(track)
+            self.talks.append(talk)
+        TalkSlot.objects.create(talk=self.talks[0], room=room1, time=slot1)
+        TalkSlot.objects.create(talk=self.talks[1], room=room2, time=slot1)
+        TalkSlot.objects.create(talk=self.talks[2], room=room2, time=slot2)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_build_schedule_data(self):
+        with self.assertNumQueries(3):
+            data = build_schedule_data(self.event)
+        self.assertEqual(data["min_time"], self.start)
+        self.assertEqual(len(data["days"]), 1)
+        rooms = data["days"][0]["rooms"]
+        self.assertEqual([room["name"] for room in rooms], ["Room 1", "Room 2"])
+        # timestamp markers are removed from the content
+        self.assertEqual(
+            [talk["title"] for talk in rooms[1]["talks"]], ["Talk 2 0", "Talk 3"]
+        )
+        self.assertEqual(
+            rooms[0]["talks"][0]["speakers"],
+            [("test-speaker", "Test Speaker")],
+        )
+
+    def test_build_schedule_data_without_time_slots(self):
+        event = event_testutils.create_test_event("Empty Event")
+        self.assertIsNone(build_schedule_data(event))
+        self.assertIsNone(get_schedule_feed(event, 1, "xml"))
+
+    def test_xml_feed(self):
+        root = ElementTree.fromstring(get_schedule_feed(self.event, 1, "xml"))
+        self.assertEqual(root.find("./conference/title").text, "Feed Event")
+        self.assertEqual(root.find("./conference/days").text, "1")
+        self.assertEqual(len(root.findall("day/room")), 2)
+        events = root.findall("day/room/event")
+        self.assertEqual(len(events), 3)
+        self.assertEqual(events[2].find("duration").text, "01:30")
+        self.assertEqual(
+            events[0].find("start").text,
+            timezone.localtime(self.start).strftime("%H:%M"),
+        )
+
+    def test_xml_feed_encoding(self):
+        self.talks[0].title = "Grüße"
+        self.talks[0].save()
+        content = get_schedule_feed(self.event, 2, "xml")
+        self.assertTrue(content.startswith(b"<?xml version='1.0' encoding='utf-8'?>\n"))
+        self.assertIn("<title>Grüße</title>".encode("utf-8"), content)
+
+    def test_xml_feed_time_shift(self):
+        root = ElementTree.fromstring(
+            get_schedule_feed(self.event, 1, "xml", offset_hours=2)
+        )
+        self.assertEqual(
+            root.find("day/room/event/start").text,
+            timezone.localtime(self.start + timedelta(hours=2)).strftime("%H:%M"),
+        )
+
+    def test_json_feed(self):
+        data = json.loads(get_schedule_feed(self.event, 1, "json").decode("utf-8"))
+        self.assertEqual(data["title"], "Feed Event")
+        self.assertEqual(data["day_count"], 1)
+        sessions = data["days"][0]["rooms"][1]["sessions"]
+        self.assertEqual(
+            [session["id"] for session in sessions],
+            [self.talks[1].id, self.talks[2].id],
+        )
+        self.assertEqual(
+            sessions[1]["start"][:16],
+            timezone.localtime(self.start + timedelta(hours=1)).strftime(
+                "%Y-%m-%dT%H:%M"
+            ),
+        )
+
+    def test_ical_feed(self):
+        content = get_schedule_feed(self.event, 1, "ical").decode("utf-8")
+        self.assertTrue(content.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertEqual(content.count("BEGIN:VEVENT"), 3)
+        self.assertIn(
+            "DTSTART:{}".format(
+                self.start.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            ),
+            content,
+        )
+
+    def add_second_day(self):
+        room = Room.objects.get(event=self.event, name="Room 1")
+        self.second_day = local_date(self.start) + timedelta(days=1)
+        start = timezone.make_aware(
+            datetime.combine(self.second_day, time(10)),
+            timezone.get_default_timezone(),
+        )
+        slot = TimeSlot.objects.create(
+            event=self.event,
+            name="Day 2",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+        TalkSlot.objects.filter(talk=self.talks[2]).update(room=room, time=slot)
+
+    def test_build_schedule_data_multiple_days(self):
+        self.add_second_day()
+        days = build_schedule_data(self.event)["days"]
+        self.assertEqual([day["index"] for day in days], [1, 2])
+        self.assertEqual(
+            [day["date"] for day in days], [local_date(self.start), self.second_day]
+        )
+        self.assertEqual(
+            [[room["name"] for room in day["rooms"]] for day in days],
+            [["Room 1", "Room 2"], ["Room 1"]],
+        )
+        self.assertEqual(
+            days[0]["max_time"], self.start + timedelta(hours=2, minutes=30)
+        )
+
+    def test_xml_feed_multiple_days(self):
+        self.add_second_day()
+        root = ElementTree.fromstring(get_schedule_feed(self.event, 1, "xml"))
+        self.assertEqual(root.find("./conference/days").text, "2")
+        days = root.findall("day")
+        self.assertEqual([day.attrib["index"] for day in days], ["1", "2"])
+        self.assertEqual(days[1].attrib["date"], self.second_day.isoformat())
+        self.assertEqual(len(days[0].findall("room/event")), 2)
+        self.assertEqual(len(days[1].findall("room/event")), 1)
+
+    def test_day_feeds(self):
+        self.add_second_day()
+        root = ElementTree.fromstring(get_schedule_feed(self.event, 1, "xml", day="2"))
+        self.assertEqual(root.find("./conference/days").text, "2")
+        self.assertEqual([day.attrib["index"] for day in root.findall("day")], ["2"])
+        data = json.loads(get_schedule_feed(self.event, 1, "json", day=1))
+        self.assertEqual([day["index"] for day in data["days"]], [1])
+        self.assertIsNone(get_schedule_feed(self.event, 1, "xml", day="3"))
+        self.assertIsNone(get_schedule_feed(self.event, 1, "xml", day="0"))
+
+    def test_today_feed(self):
+        self.add_second_day()
+        offset_hours = (timezone.localdate() - local_date(self.start)).days * 24
+        data = json.loads(
+            get_schedule_feed(
+                self.event, 1, "json", offset_hours=offset_hours, day="today"
+            )
+        )
+        self.assertEqual([day["index"] for day in data["days"]], [1])
+        data = json.loads(
+            get_schedule_feed(
+                self.event, 1, "json", offset_hours=offset_hours - 24, day="today"
+            )
+        )
+        self.assertEqual([day["index"] for day in data["days"]], [2])
+        self.assertIsNone(
+            get_schedule_feed(
+                self.event, 1, "json", offset_hours=offset_hours + 24, day="today"
+            )
+        )
+
+    def test_get_time_shift(self):
+        self.assertEqual(get_time_shift(self.start), timedelta())
+        self.assertEqual(
+            get_time_shift(self.start, offset_hours=-1), timedelta(hours=-1)
+        )
+        self.assertEqual(
+            get_time_shift(self.start, start_today=True),
+            date.today() - self.start.date(),
+        )
+
+    def test_feeds_are_cached_per_version(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            content = get_schedule_feed(self.event, 1, "xml")
+            with self.assertNumQueries(0):
+                self.assertEqual(get_schedule_feed(self.event, 1, "xml"), content)
+                get_schedule_feed(self.event, 1, "json")
+                shifted = get_schedule_feed(self.event, 1, "xml", offset_hours=1)
+            self.assertNotEqual(shifted, content)
+            self.talks[0].title = "Changed"
+            self.talks[0].save()
+            self.assertEqual(get_schedule_feed(self.event, 1, "xml"), content)
+            self.assertIn(b"Changed", get_schedule_feed(self.event, 2, "xml"))
+
+
+class ICalTest(TestCase):
+    def test_escape_ical_text(self):
+        self.assertEqual(escape_ical_text("a;b,c\\d\ne"), "a\\;b\\,c\\\\d\\ne")
+
+    def test_fold_ical_line(self):
+        line = "DESCRIPTION:" + "ä" * 60
+        folded = fold_ical_line(line).split("\r\n")
+        self.assertTrue(all(len(part.encode("utf-8")) <= 75 for part in folded))
+        self.assertTrue(all(part.startswith(" ") for part in folded[1:]))
+        self.assertEqual(
+            "".join(part[1:] for part in folded[1:]), line[len(folded[0]) :]
+        )
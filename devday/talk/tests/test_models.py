@@ -4,7 +4,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import signing
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 
@@ -16,6 +18,7 @@ from speaker.tests import speaker_testutils
 from talk.models import (
     AttendeeFeedback,
     AttendeeVote,
+    CommitteeTalkStatistics,
     Room,
     SessionReservation,
     Talk,
@@ -138,6 +141,68 @@ class TalkTest(TestCase):
         self.assertFalse(talk.draft_speakers.exists())
         self.assertEqual("{}".format(talk), "{} - {}".format(published_speaker, "Test"))
 
+    def test_str_without_queries(self):
+        talk = Talk.objects.create(
+            draft_speaker=self.speaker,
+            title="Test",
+            abstract="Test abstract",
+            remarks="Test remarks",
+            event=self.event,
+        )
+        talk.publish(Track.objects.create(name="Test track", event=self.event))
+        talk = Talk.objects.get(pk=talk.pk)
+        with self.assertNumQueries(0):
+            label = "{}".format(talk)
+        self.assertEqual(
+            label,
+            "{} - {}".format(
+                PublishedSpeaker.objects.get(speaker=self.speaker), "Test"
+            ),
+        )
+
+    def test_str_after_speaker_changes(self):
+        talk = Talk.objects.create(
+            draft_speaker=self.speaker,
+            title="Test",
+            abstract="Test abstract",
+            remarks="Test remarks",
+            event=self.event,
+        )
+        speaker2, _, _ = speaker_testutils.create_test_speaker(
+            "speaker2@example.org", "Test Speaker 2"
+        )
+        talk_draft_speaker = TalkDraftSpeaker.objects.create(
+            talk=talk, draft_speaker=speaker2, order=2
+        )
+        speaker2.name = "Renamed Speaker"
+        speaker2.save()
+        talk.refresh_from_db()
+        self.assertEqual(
+            "{}".format(talk), "{}, Renamed Speaker - Test".format(self.speaker)
+        )
+        talk_draft_speaker.delete()
+        talk.refresh_from_db()
+        self.assertEqual("{}".format(talk), "{} - Test".format(self.speaker))
+
+    def test_str_after_published_speaker_changes(self):
+        talk = Talk.objects.create(
+            draft_speaker=self.speaker,
+            title="Test",
+            abstract="Test abstract",
+            remarks="Test remarks",
+            event=self.event,
+        )
+        talk.publish(Track.objects.create(name="Test track", event=self.event))
+        published_speaker = PublishedSpeaker.objects.get(speaker=self.speaker)
+        published_speaker.name = "Published Speaker"
+        published_speaker.save()
+        self.event.title = "Renamed Event"
+        self.event.save()
+        talk.refresh_from_db()
+        self.assertEqual(
+            "{}".format(talk), "Published Speaker (Renamed Event) - Test"
+        )
+
     def test_publish(self):
         track = Track.objects.create(name="Test track", event=self.event)
         talk = Talk.objects.create(
@@ -436,6 +501,12 @@ class VoteTest(TestCase):
             "{} voted {} for {} by {}".format(self.voter, 5, "Test", self.speaker),
         )
 
+    def test_str_without_queries(self):
+        Vote.objects.create(voter=self.voter, talk=self.talk, score=5)
+        vote = Vote.objects.select_related("voter", "talk").get()
+        with self.assertNumQueries(0):
+            "{}".format(vote)
+
 
 class TalkCommentTest(TestCase):
     def setUp(self):
@@ -465,6 +536,127 @@ class TalkCommentTest(TestCase):
         )
 
 
+class CommitteeTalkStatisticsTest(TestCase):
+    def setUp(self):
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.talk = Talk.objects.create(
+            draft_speaker=speaker,
+            title="Test",
+            abstract="Test abstract",
+            remarks="Test remarks",
+            event=create_test_event(),
+        )
+        self.voters = [
+            User.objects.create_user(email="voter{}@example.org".format(number))
+            for number in range(3)
+        ]
+
+    def assertStatistics(self, vote_count, vote_sum, comment_count):
+        statistics = CommitteeTalkStatistics.objects.get(talk=self.talk)
+        self.assertEqual(
+            (statistics.vote_count, statistics.vote_sum, statistics.comment_count),
+            (vote_count, vote_sum, comment_count),
+        )
+
+    def test_no_statistics_without_votes(self):
+        self.assertFalse(
+            CommitteeTalkStatistics.objects.filter(talk=self.talk).exists()
+        )
+
+    def test_votes(self):
+        Vote.objects.create(voter=self.voters[0], talk=self.talk, score=3)
+        self.assertStatistics(1, 3, 0)
+        vote = Vote.objects.create(voter=self.voters[1], talk=self.talk, score=4)
+        self.assertStatistics(2, 7, 0)
+        vote.score = 1
+        vote.save()
+        self.assertStatistics(2, 4, 0)
+        vote = Vote.objects.get(voter=self.voters[0])
+        vote.score = 5
+        vote.save()
+        self.assertStatistics(2, 6, 0)
+        Vote.objects.filter(voter=self.voters[0]).delete()
+        self.assertStatistics(1, 1, 0)
+
+    def test_vote_saved_without_loaded_score(self):
+        vote = Vote.objects.create(voter=self.voters[0], talk=self.talk, score=3)
+        Vote(id=vote.id, voter=self.voters[0], talk=self.talk, score=2).save()
+        self.assertStatistics(1, 2, 0)
+
+    def test_vote_saved_with_deferred_fields(self):
+        Vote.objects.create(voter=self.voters[0], talk=self.talk, score=3)
+        vote = Vote.objects.only("id", "score").get()
+        vote.score = 5
+        vote.save()
+        self.assertStatistics(1, 5, 0)
+        vote = Vote.objects.defer("score").get()
+        vote.score = 2
+        vote.save()
+        self.assertStatistics(1, 2, 0)
+
+    def test_vote_deleted_with_deferred_fields(self):
+        Vote.objects.create(voter=self.voters[0], talk=self.talk, score=3)
+        Vote.objects.create(voter=self.voters[1], talk=self.talk, score=4)
+        Vote.objects.only("id").get(voter=self.voters[0]).delete()
+        self.assertStatistics(1, 4, 0)
+        Vote.objects.only("id").delete()
+        self.assertStatistics(0, 0, 0)
+
+    def test_comments(self):
+        comment = TalkComment.objects.create(
+            commenter=self.voters[0], talk=self.talk, comment="First"
+        )
+        self.assertStatistics(0, 0, 1)
+        TalkComment.objects.create(
+            commenter=self.voters[1], talk=self.talk, comment="Second"
+        )
+        comment.comment = "Changed"
+        comment.save()
+        self.assertStatistics(0, 0, 2)
+        comment.delete()
+        self.assertStatistics(0, 0, 1)
+
+    def test_refresh(self):
+        Vote.objects.create(voter=self.voters[0], talk=self.talk, score=3)
+        TalkComment.objects.create(
+            commenter=self.voters[1], talk=self.talk, comment="Comment"
+        )
+        CommitteeTalkStatistics.objects.update(
+            vote_count=5, vote_sum=20, comment_count=0
+        )
+        CommitteeTalkStatistics.objects.refresh(self.talk.id)
+        self.assertStatistics(1, 3, 1)
+
+    def test_refresh_locks_statistics_before_reading_votes(self):
+        with CaptureQueriesContext(connection) as queries:
+            CommitteeTalkStatistics.objects.refresh(self.talk.id)
+        statements = [query["sql"] for query in queries]
+        locks = [
+            number for number, sql in enumerate(statements) if "FOR UPDATE" in sql
+        ]
+        reads = [
+            number for number, sql in enumerate(statements) if "talk_vote" in sql
+        ]
+        self.assertTrue(locks)
+        self.assertTrue(reads)
+        self.assertLess(max(locks), min(reads))
+        self.assertStatistics(0, 0, 0)
+
+    def test_annotate_talks(self):
+        talk = CommitteeTalkStatistics.objects.annotate_talks(Talk.objects.all()).get()
+        self.assertEqual(
+            (talk.vote_count, talk.vote_sum, talk.average_score, talk.comment_count),
+            (0, 0, None, 0),
+        )
+        for voter, score in zip(self.voters, (1, 2, 4)):
+            Vote.objects.create(voter=voter, talk=self.talk, score=score)
+        talk = CommitteeTalkStatistics.objects.annotate_talks(Talk.objects.all()).get()
+        self.assertEqual(
+            (talk.vote_count, talk.vote_sum, talk.comment_count), (3, 7, 0)
+        )
+        self.assertAlmostEqual(talk.average_score, 7 / 3)
+
+
 class TalkSlotTest(TestCase):
     def test___str__(self):
         event = create_test_event()
@@ -0,0 +1,153 @@
+import os
+from unittest import mock
+
+from django.contrib.staticfiles import finders
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from event.tests import event_testutils
+from speaker.models import PublishedSpeaker
+from speaker.tests import speaker_testutils
+from talk.models import Talk, TalkDraftSpeaker, TalkPublishedSpeaker, Track
+from talk.publish import publish_talks
+
+
+def create_talks(event, count, prefix="publish"):
+    talks = []
+    for number in range(count):
+        speaker, _, _ = speaker_testutils.create_test_speaker(
+            email="{}{}@example.org".format(prefix, number),
+            name="Speaker {} {}".format(prefix, number),
+        )
+        talks.append(
+            Talk.objects.create(
+                draft_speaker=speaker,
+                title="Talk {} {}".format(prefix, number),
+                abstract="Abstract",
+                remarks="Remarks",
+                event=event,
+            )
+        )
+    return talks
+
+
+class PublishTalksTest(speaker_testutils.TemporaryMediaTestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event()
+        self.track = Track.objects.create(event=self.event, name="Track")
+
+    def test_publish_talks(self):
+        talks = create_talks(self.event, 2)
+        result = publish_talks({talk.id: self.track.id for talk in talks})
+        self.assertEqual(result, {"talks": 2, "speakers": 2, "links": 2})
+        for talk in talks:
+            talk.refresh_from_db()
+            self.assertEqual(talk.track, self.track)
+            published_speaker = talk.published_speakers.get()
+            self.assertEqual(
+                published_speaker.speaker, talk.draft_speakers.get()
+            )
+            self.assertEqual(published_speaker.event, self.event)
+
+    def test_publish_talks_keeps_speaker_order(self):
+        talk = create_talks(self.event, 1)[0]
+        second, _, _ = speaker_testutils.create_test_speaker(
+            email="second@example.org", name="Second"
+        )
+        TalkDraftSpeaker.objects.create(talk=talk, draft_speaker=second)
+        publish_talks({talk.id: self.track.id})
+        self.assertEqual(
+            list(
+                TalkPublishedSpeaker.objects.filter(talk=talk).values_list(
+                    "published_speaker__speaker_id", "order"
+                )
+            ),
+            list(
+                TalkDraftSpeaker.objects.filter(talk=talk).values_list(
+                    "draft_speaker_id", "order"
+                )
+            ),
+        )
+
+    def test_publish_talks_ignores_unknown_tracks(self):
+        talk = create_talks(self.event, 1)[0]
+        result = publish_talks({talk.id: 0})
+        self.assertEqual(result["talks"], 0)
+        talk.refresh_from_db()
+        self.assertIsNone(talk.track)
+        self.assertFalse(talk.published_speakers.exists())
+
+    def test_publish_talks_twice(self):
+        talks = create_talks(self.event, 2)
+        publish_talks({talk.id: self.track.id for talk in talks})
+        track = Track.objects.create(event=self.event, name="Other track")
+        result = publish_talks({talk.id: track.id for talk in talks})
+        self.assertEqual(result, {"talks": 2, "speakers": 0, "links": 0})
+        self.assertEqual(PublishedSpeaker.objects.count(), 2)
+        self.assertEqual(Talk.objects.filter(track=track).count(), 2)
+
+    def test_publish_talks_reuses_published_speaker(self):
+        talks = create_talks(self.event, 1)
+        speaker = talks[0].draft_speakers.get()
+        talks.append(
+            Talk.objects.create(
+                draft_speaker=speaker,
+                title="Second talk",
+                abstract="Abstract",
+                remarks="Remarks",
+                event=self.event,
+            )
+        )
+        result = publish_talks({talk.id: self.track.id for talk in talks})
+        self.assertEqual(result, {"talks": 2, "speakers": 1, "links": 2})
+
+    def test_publish_talks_query_count(self):
+        talks = create_talks(self.event, 1, prefix="one")
+        with CaptureQueriesContext(connection) as one_talk, mock.patch(
+            "talk.publish.run_in_background"
+        ):
+            publish_talks({talk.id: self.track.id for talk in talks})
+        talks = create_talks(self.event, 5, prefix="five")
+        with CaptureQueriesContext(connection) as five_talks, mock.patch(
+            "talk.publish.run_in_background"
+        ):
+            publish_talks({talk.id: self.track.id for talk in talks})
+        self.assertEqual(len(one_talk), len(five_talks))
+
+    def create_talk_with_portrait(self):
+        talk = create_talks(self.event, 1)[0]
+        speaker = talk.draft_speakers.get()
+        with open(finders.find(os.path.join("img", "speaker-dummy.png")), "rb") as f:
+            speaker.portrait.save("speaker-dummy.png", f)
+        return talk, speaker
+
+    def test_publish_talks_copies_images(self):
+        talk, speaker = self.create_talk_with_portrait()
+        publish_talks({talk.id: self.track.id})
+        published_speaker = talk.published_speakers.get()
+        self.assertTrue(published_speaker.portrait)
+        self.assertTrue(os.path.samefile(
+            published_speaker.portrait.path, speaker.portrait.path
+        ))
+        self.assertEqual(
+            published_speaker.derived_images_source, published_speaker.portrait.name
+        )
+
+    def test_publish_talks_defers_image_copying(self):
+        talk, speaker = self.create_talk_with_portrait()
+        with self.settings(SPEAKER_IMAGE_WORKERS=2):
+            publish_talks({talk.id: self.track.id})
+        published_speaker = talk.published_speakers.get()
+        self.assertFalse(published_speaker.portrait)
+
+        # run the job that is scheduled after the commit
+        PublishedSpeaker.objects.copy_images_from_speakers([published_speaker.id])
+        published_speaker.refresh_from_db()
+        self.assertTrue(published_speaker.portrait)
+        self.assertTrue(published_speaker.thumbnail)
+
+    def test_publish_talks_invalidates_schedule(self):
+        talk = create_talks(self.event, 1)[0]
+        with mock.patch("talk.publish.invalidate_schedule") as invalidate_schedule:
+            publish_talks({talk.id: self.track.id})
+        invalidate_schedule.assert_called_once_with(self.event.id)
@@ -1,10 +1,40 @@
+import threading
+import unittest
+from datetime import timedelta
 from unittest import mock
 
+from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
+from django.db import connection
 from django.http import HttpRequest
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
-from talk.reservation import get_reservation_email_context
+from attendee.models import Attendee
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.models import SessionReservation
+from talk.reservation import (
+    cancel_reservation,
+    confirm_reservation,
+    get_reservation_email_context,
+    promote_waiting_reservations,
+    reserve,
+)
+from talk.tests import talk_testutils
+
+User = get_user_model()
+
+
+def create_attendees(event, count):
+    attendees = []
+    for i in range(count):
+        user, _ = attendee_testutils.create_test_user(
+            "reservation{}@example.org".format(i)
+        )
+        attendees.append(Attendee.objects.create(user=user, event=event))
+    return attendees
 
 
 class ReservationEmailContextTest(TestCase):
@@ -36,3 +66,167 @@ class ReservationEmailContextTest(TestCase):
         self.assertEqual(data["event"], "Test event")
         self.assertIn("user", data)
         self.assertEqual(data["user"], "fakeuser")
+
+
+class ReservationAllocatorTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.talk = talk_testutils.create_test_talk(
+            speaker, self.event, "Workshop", spots=2
+        )
+        self.attendees = create_attendees(self.event, 4)
+
+    def test_reserve(self):
+        reservation, created = reserve(self.talk, self.attendees[0])
+        self.assertTrue(created)
+        self.assertFalse(reservation.is_confirmed)
+        self.assertFalse(reservation.is_waiting)
+
+    def test_reserve_existing(self):
+        reservation, _ = reserve(self.talk, self.attendees[0])
+        self.assertEqual(reserve(self.talk, self.attendees[0]), (reservation, False))
+        self.assertEqual(SessionReservation.objects.count(), 1)
+
+    def test_reserve_fully_booked(self):
+        for attendee in self.attendees[:2]:
+            self.assertTrue(confirm_reservation(reserve(self.talk, attendee)[0]))
+        reservation, created = reserve(self.talk, self.attendees[2])
+        self.assertTrue(created)
+        self.assertTrue(reservation.is_waiting)
+
+    def test_confirm_reservation(self):
+        reservation, _ = reserve(self.talk, self.attendees[0])
+        self.assertTrue(confirm_reservation(reservation))
+        reservation.refresh_from_db()
+        self.assertTrue(reservation.is_confirmed)
+        self.assertFalse(reservation.is_waiting)
+
+    def test_confirm_reservation_twice_when_fully_booked(self):
+        reservations = [reserve(self.talk, a)[0] for a in self.attendees[:2]]
+        for reservation in reservations:
+            self.assertTrue(confirm_reservation(reservation))
+        self.assertTrue(confirm_reservation(reservations[0]))
+        reservations[0].refresh_from_db()
+        self.assertFalse(reservations[0].is_waiting)
+
+    def test_confirm_reservation_overbooked(self):
+        reservations = [reserve(self.talk, a)[0] for a in self.attendees[:3]]
+        self.assertTrue(confirm_reservation(reservations[0]))
+        self.assertTrue(confirm_reservation(reservations[1]))
+        self.assertFalse(confirm_reservation(reservations[2]))
+        reservations[2].refresh_from_db()
+        self.assertFalse(reservations[2].is_confirmed)
+        self.assertTrue(reservations[2].is_waiting)
+
+    def test_cancel_reservation(self):
+        reservation, _ = reserve(self.talk, self.attendees[0])
+        cancel_reservation(reservation)
+        self.assertFalse(SessionReservation.objects.exists())
+
+    def test_promote_waiting_reservations(self):
+        now = timezone.now()
+        confirmed = SessionReservation.objects.create(
+            talk=self.talk, attendee=self.attendees[0], is_confirmed=True
+        )
+        waiting = [
+            SessionReservation.objects.create(
+                talk=self.talk,
+                attendee=attendee,
+                is_waiting=True,
+                created=now - timedelta(minutes=minutes),
+            )
+            for attendee, minutes in zip(self.attendees[1:], (1, 3, 2))
+        ]
+        promoted = promote_waiting_reservations(self.talk.id)
+        self.assertEqual(promoted, [waiting[1]])
+        self.assertFalse(promoted[0].is_waiting)
+        self.assertEqual(promoted[0].attendee.user, self.attendees[2].user)
+        self.assertEqual(
+            list(
+                SessionReservation.objects.filter(is_waiting=True).order_by("pk")
+            ),
+            [waiting[0], waiting[2]],
+        )
+
+        cancel_reservation(confirmed)
+        self.assertEqual(promote_waiting_reservations(self.talk.id, 1), [waiting[2]])
+        self.assertEqual(promote_waiting_reservations(self.talk.id, 0), [])
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "row level locks need PostgreSQL"
+)
+class ReservationConcurrencyTest(SimpleTestCase):
+    """
+    The threads use their own database connections and need committed data.
+    The test data is removed explicitly instead of flushing all tables like
+    TransactionTestCase does.
+    """
+
+    databases = {"default"}
+    THREADS = 12
+
+    def setUp(self):
+        self.event = event_testutils.create_test_event("Concurrency Event")
+        self.speaker, speaker_user, _ = speaker_testutils.create_test_speaker(
+            "concurrency-speaker@example.org"
+        )
+        self.talk = talk_testutils.create_test_talk(
+            self.speaker, self.event, "Workshop", spots=3
+        )
+        self.attendees = create_attendees(self.event, self.THREADS)
+        self.users = [speaker_user] + [a.user for a in self.attendees]
+
+    def tearDown(self):
+        self.event.delete()
+        self.speaker.delete()
+        User.objects.filter(pk__in=[user.pk for user in self.users]).delete()
+
+    def run_concurrently(self, func, args):
+        barrier = threading.Barrier(len(args))
+        errors = []
+
+        def worker(arg):
+            try:
+                barrier.wait()
+                func(arg)
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(arg,)) for arg in args]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_confirmations_do_not_overbook(self):
+        reservations = [reserve(self.talk, a)[0] for a in self.attendees]
+        self.run_concurrently(confirm_reservation, reservations)
+        self.assertEqual(
+            SessionReservation.objects.filter(is_confirmed=True).count(), 3
+        )
+        self.assertEqual(
+            SessionReservation.objects.filter(is_waiting=True).count(),
+            self.THREADS - 3,
+        )
+
+    def test_concurrent_reservations_of_one_attendee(self):
+        self.run_concurrently(
+            lambda attendee: reserve(self.talk, attendee),
+            [self.attendees[0]] * self.THREADS,
+        )
+        self.assertEqual(SessionReservation.objects.count(), 1)
+
+    def test_concurrent_reserve_and_confirm(self):
+        self.run_concurrently(
+            lambda attendee: confirm_reservation(reserve(self.talk, attendee)[0]),
+            self.attendees,
+        )
+        self.assertEqual(
+            SessionReservation.objects.filter(is_confirmed=True).count(), 3
+        )
+        self.assertEqual(SessionReservation.objects.count(), self.THREADS)
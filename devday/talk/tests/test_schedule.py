@@ -0,0 +1,178 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from event.models import EventContentVersion
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.models import Room, TalkSlot, TimeSlot, Track
+from talk.schedule import build_schedule, count_overlaps, get_schedule
+from talk.tests import talk_testutils
+
+
+def time_slot(start, end):
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    return SimpleNamespace(
+        start_time=now + timedelta(hours=start), end_time=now + timedelta(hours=end)
+    )
+
+
+class CountOverlapsTest(TestCase):
+    def test_no_overlaps(self):
+        self.assertEqual(
+            count_overlaps([time_slot(0, 1), time_slot(1, 2), time_slot(2, 3)]),
+            [0, 0, 0],
+        )
+
+    def test_contained_time_slots(self):
+        self.assertEqual(
+            count_overlaps([time_slot(0, 1), time_slot(1, 2), time_slot(0, 2)]),
+            [1, 1, 2],
+        )
+
+    def test_identical_time_slots(self):
+        self.assertEqual(count_overlaps([time_slot(0, 1), time_slot(0, 1)]), [2, 2])
+
+    def test_empty(self):
+        self.assertEqual(count_overlaps([]), [])
+
+
+class ScheduleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = event_testutils.create_test_event("Schedule Event")
+        start = self.event.start_time.replace(minute=0, second=0, microsecond=0)
+        self.room1 = Room.objects.create(event=self.event, name="Room 1", priority=1)
+        self.room2 = Room.objects.create(event=self.event, name="Room 2", priority=2)
+        Room.objects.create(event=self.event, name="Unused", priority=3)
+        self.slot1 = TimeSlot.objects.create(
+            event=self.event,
+            name="Slot 1",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+        self.slot2 = TimeSlot.objects.create(
+            event=self.event,
+            name="Slot 2",
+            start_time=start + timedelta(hours=1),
+            end_time=start + timedelta(hours=2),
+        )
+        self.lunch = TimeSlot.objects.create(
+            event=self.event,
+            name="Lunch",
+            start_time=start + timedelta(hours=2),
+            end_time=start + timedelta(hours=3),
+            text_body="Lunch",
+            block=1,
+        )
+        self.track = Track.objects.create(event=self.event, name="Track")
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.talks = []
+        for title in ("Talk 1", "Talk 2", "Talk 3", "Unscheduled"):
+            talk = talk_testutils.create_test_talk(speaker, self.event, title)
+            talk.publish(self.track)
+            self.talks.append(talk)
+        TalkSlot.objects.create(talk=self.talks[0], room=self.room1, time=self.slot1)
+        TalkSlot.objects.create(talk=self.talks[1], room=self.room2, time=self.slot1)
+        TalkSlot.objects.create(talk=self.talks[2], room=self.room2, time=self.slot2)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_build_schedule(self):
+        schedule = build_schedule(self.event)
+        self.assertEqual(schedule["unscheduled"], [self.talks[3]])
+        blocks = schedule["blocks"]
+        self.assertEqual(list(blocks.keys()), [0, 1])
+
+        self.assertEqual(blocks[0]["rooms"], [self.room1, self.room2])
+        rows = blocks[0]["schedule"]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["time_slots"], [[self.slot1, {}]])
+        self.assertEqual(list(rows[0]["room_talks"].keys()), [self.room1, self.room2])
+        self.assertEqual(
+            rows[0]["room_talks"][self.room1], [self.slot1, [self.talks[0]], {}]
+        )
+        self.assertEqual(
+            rows[1]["room_talks"], {self.room2: [self.slot2, [self.talks[2]], {}]}
+        )
+
+        self.assertEqual(blocks[1]["rooms"], [])
+        rows = blocks[1]["schedule"]
+        self.assertEqual(rows, [{"time_slots": [[self.lunch, {}]], "room_talks": {}}])
+
+    def test_build_schedule_overlapping_time_slots(self):
+        long_slot = TimeSlot.objects.create(
+            event=self.event,
+            name="Long",
+            start_time=self.slot1.start_time,
+            end_time=self.slot2.end_time,
+        )
+        blocks = build_schedule(self.event)["blocks"]
+        rows = blocks[0]["schedule"]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            rows[0]["time_slots"],
+            [[self.slot1, {"colspan": 1}], [long_slot, {"rowspan": 2}]],
+        )
+        self.assertEqual(rows[1]["time_slots"], [[self.slot2, {"colspan": 1}]])
+
+    def test_build_schedule_queries(self):
+        with self.assertNumQueries(6):
+            build_schedule(self.event)
+
+    def test_get_schedule_is_cached(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            schedule = get_schedule(self.event)
+            with self.assertNumQueries(1):
+                self.assertEqual(get_schedule(self.event), schedule)
+
+    def test_get_schedule_invalidated_by_content_version(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            get_schedule(self.event)
+            # another process changed the schedule and bumped the version
+            TalkSlot.objects.filter(talk=self.talks[0]).update(time=self.slot2)
+            EventContentVersion.objects.bump([self.event.id])
+            with self.assertNumQueries(7):
+                get_schedule(self.event)
+
+    def test_get_schedule_invalidated_by_talk_slot(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            self.assertEqual(get_schedule(self.event)["unscheduled"], [self.talks[3]])
+            TalkSlot.objects.create(
+                talk=self.talks[3], room=self.room1, time=self.slot2
+            )
+            self.assertEqual(get_schedule(self.event)["unscheduled"], [])
+
+    def test_get_schedule_invalidated_by_time_slot(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            self.assertEqual(len(get_schedule(self.event)["blocks"]), 2)
+            self.lunch.delete()
+            self.assertEqual(len(get_schedule(self.event)["blocks"]), 1)
+
+    def test_get_schedule_invalidated_by_room(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            get_schedule(self.event)
+            self.room1.name = "Renamed"
+            self.room1.save()
+            rooms = get_schedule(self.event)["blocks"][0]["rooms"]
+            self.assertEqual(rooms[0].name, "Renamed")
+
+    def test_get_schedule_invalidated_by_talk(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            get_schedule(self.event)
+            self.talks[3].title = "Renamed"
+            self.talks[3].save()
+            self.assertEqual(
+                get_schedule(self.event)["unscheduled"][0].title, "Renamed"
+            )
+
+    def test_get_schedule_invalidated_by_track(self):
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            self.assertEqual(len(get_schedule(self.event)["unscheduled"]), 1)
+            self.track.delete()
+            self.assertEqual(get_schedule(self.event)["unscheduled"], [])
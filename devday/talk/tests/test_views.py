@@ -1,3 +1,4 @@
+import json
 import time
 from datetime import datetime, timedelta
 from unittest import mock
@@ -6,6 +7,7 @@ from xml.etree import ElementTree
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.core import mail, signing
+from django.db.models import Min
 from django.http import QueryDict
 from django.test import TestCase, override_settings
 from django.urls import reverse
@@ -14,6 +16,7 @@ from django.utils.translation import ugettext as _
 
 from attendee.models import Attendee
 from attendee.tests import attendee_testutils
+from devday.models import SiteContentVersion
 from devday.utils.devdata import DevData
 from event.models import Event
 from event.tests import event_testutils
@@ -238,6 +241,52 @@ class TestTalkOverView(LoginTestMixin, TestCase):
         talks = list(response.context["talk_list"])
         self.assertListEqual([talk2, talk1], talks)
 
+    def test_get_queryset_statistics(self):
+        event = Event.objects.current_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        talk1 = Talk.objects.create(
+            draft_speaker=speaker, title="Test Session 1", event=event
+        )
+        talk2 = Talk.objects.create(
+            draft_speaker=speaker, title="Test Session 2", event=event
+        )
+        other_event_talk = Talk.objects.create(
+            draft_speaker=speaker,
+            title="Old Session",
+            event=event_testutils.create_test_event(
+                "Old event", start_time=event.start_time - timedelta(days=365)
+            ),
+        )
+        voters = [
+            attendee_testutils.create_test_user("voter{}@example.org".format(number))[0]
+            for number in range(2)
+        ]
+        Vote.objects.create(voter=voters[0], talk=talk1, score=2)
+        Vote.objects.create(voter=voters[1], talk=talk1, score=3)
+        Vote.objects.create(voter=voters[0], talk=talk2, score=5)
+        TalkComment.objects.create(commenter=voters[0], talk=talk2, comment="Good")
+        TalkComment.objects.create(
+            commenter=voters[0], talk=other_event_talk, comment="Old"
+        )
+
+        self.login_committee_member()
+        response = self.client.get(
+            "{}?sort_order=score&sort_dir=desc".format(self.url)
+        )
+        talks = list(response.context["talk_list"])
+        self.assertListEqual([talk2, talk1], talks)
+        self.assertEqual(
+            [
+                (talk.vote_count, talk.vote_sum, talk.average_score, talk.comment_count)
+                for talk in talks
+            ],
+            [(1, 5, 5.0, 1), (2, 5, 2.5, 0)],
+        )
+        response = self.client.get(
+            "{}?sort_order=score_sum&sort_dir=asc".format(self.url)
+        )
+        self.assertEqual(len(response.context["talk_list"]), 2)
+
 
 class TestTalkDetails(TestCase):
     def setUp(self):
@@ -319,6 +368,44 @@ class TestTalkDetails(TestCase):
         self.assertNotIn("reservation", response.context)
         self.assertNotIn("feedback_form", response.context)
 
+    @override_settings(EVENT_CONTENT_CACHE_MAX_AGE=120)
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=120", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        TalkMedia.objects.create(talk=self.talk, video="https://example.org/video")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_conditional_get_if_modified_since(self):
+        response = self.client.get(self.url)
+        last_modified = response["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_conditional_get_site_content_changed(self):
+        etag = self.client.get(self.url)["ETag"]
+        SiteContentVersion.objects.bump()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_not_cached_for_authenticated_user(self):
+        user, password = attendee_testutils.create_test_user()
+        self.client.login(username=user.get_username(), password=password)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertIn("private", response["Cache-Control"])
+
 
 class TestCommitteeTalkDetails(TestCase):
     def setUp(self):
@@ -537,6 +624,61 @@ class TestTalkVote(LoginTestMixin, TestCase):
         self.assertEqual(votes[0].voter, user)
 
 
+class TestTalkBatchVote(LoginTestMixin, TestCase):
+    def setUp(self):
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.event = event_testutils.create_test_event()
+        self.talks = [
+            Talk.objects.create(draft_speaker=speaker, event=self.event, title=title)
+            for title in ("Talk A", "Talk B")
+        ]
+        self.url = "/committee/talks/votes/"
+
+    def post_votes(self, votes):
+        return self.client.post(
+            self.url,
+            data=json.dumps({"votes": votes}),
+            content_type="application/json",
+        )
+
+    def test_needs_authentication(self):
+        response = self.post_votes([])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, "/accounts/login/?next={0:s}".format(self.url))
+
+    def test_needs_committee_permissions(self):
+        self.login_user()
+        response = self.post_votes([])
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_score_returns_json_error(self):
+        self.login_committee_member()
+        response = self.post_votes([{"talk": self.talks[0].id, "score": -1}])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["message"], "error")
+        self.assertEqual(list(data["errors"]), [str(self.talks[0].id)])
+        self.assertFalse(Vote.objects.exists())
+
+    def test_votes_are_stored(self):
+        user = self.login_committee_member()
+        self.talks[0].vote_set.create(voter=user, score=1)
+        response = self.post_votes(
+            [
+                {"talk": self.talks[0].id, "score": 4},
+                {"talk": self.talks[1].id, "score": 2},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {"message": "ok", "votes": 2})
+        self.assertEqual(
+            dict(Vote.objects.filter(voter=user).values_list("talk_id", "score")),
+            {self.talks[0].id: 4, self.talks[1].id: 2},
+        )
+        statistics = self.talks[0].committee_statistics
+        self.assertEqual((statistics.vote_count, statistics.vote_sum), (1, 4))
+
+
 class TestTalkVoteClear(LoginTestMixin, TestCase):
     def setUp(self):
         self.event = event_testutils.create_test_event()
@@ -937,6 +1079,100 @@ class TestTalkListView(TestCase):
         self.assertEqual(today, start_time.date())
         self.assertEqual(today, talk_start_time.date())
 
+    def test_infobeamer_xml_view_conditional_get(self):
+        url = reverse("infobeamer", kwargs={"event": self.event.slug})
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url, data={"starttoday": ""}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # the feed contains no CMS content
+        SiteContentVersion.objects.bump()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        talk_slot = TalkSlot.objects.filter(talk__event=self.event).first()
+        talk_slot.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_infobeamer_xml_view_invalid_offsethours(self):
+        response = self.client.get(
+            reverse("infobeamer", kwargs={"event": self.event.slug}),
+            data={"offsethours": "many"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TALK_SCHEDULE_FEED_MAX_OFFSET_HOURS=48)
+    def test_schedule_feed_offsethours_is_clamped(self):
+        url = reverse("schedule_json", kwargs={"event": self.event.slug})
+        for offset_hours, clamped in ((1000, 48), (-1000, -48)):
+            self.assertEqual(
+                self.client.get(url, data={"offsethours": offset_hours}).json(),
+                self.client.get(url, data={"offsethours": clamped}).json(),
+            )
+        self.assertNotEqual(
+            self.client.get(url, data={"offsethours": 48}).json(),
+            self.client.get(url).json(),
+        )
+
+    def test_schedule_json_view(self):
+        response = self.client.get(
+            reverse("schedule_json", kwargs={"event": self.event.slug})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertTrue(response.has_header("ETag"))
+        data = response.json()
+        self.assertEqual(data["title"], self.event.title)
+        self.assertEqual(
+            sum(
+                len(room["sessions"]) for day in data["days"] for room in day["rooms"]
+            ),
+            14,
+        )
+
+    def test_schedule_day_views(self):
+        response = self.client.get(
+            reverse("infobeamer_day", kwargs={"event": self.event.slug, "day": 1})
+        )
+        self.assertEqual(response.status_code, 200)
+        root = ElementTree.fromstring(response.content)
+        self.assertEqual(len(root.findall("day")), 1)
+        start_time = TimeSlot.objects.filter(event=self.event).aggregate(
+            Min("start_time")
+        )["start_time__min"]
+        offset_days = timezone.localdate() - timezone.localtime(start_time).date()
+        with self.settings(
+            TALK_SCHEDULE_FEED_MAX_OFFSET_HOURS=abs(offset_days.days) * 24
+        ):
+            response = self.client.get(
+                reverse(
+                    "schedule_json_day",
+                    kwargs={"event": self.event.slug, "day": "today"},
+                ),
+                data={"offsethours": offset_days.days * 24},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["days"][0]["index"], 1)
+        response = self.client.get(
+            reverse("schedule_json_day", kwargs={"event": self.event.slug, "day": 9})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_schedule_ical_view(self):
+        response = self.client.get(
+            reverse("schedule_ical", kwargs={"event": self.event.slug})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/calendar"))
+        self.assertEqual(response.content.count(b"BEGIN:VEVENT"), 14)
+
     def test_infobeamer_xml_view_skips_unscheduled_session(self):
         test_speaker, _, _ = speaker_testutils.create_test_speaker(
             "unscheduled@example.org", "Unscheduled Talk Speaker"
@@ -1160,7 +1396,7 @@ class TestEventSessionSummaryView(TestCase):
         )
         self.assertIn(
             self.talk.title,
-            r.content.decode(),
+            r.getvalue().decode(),
             "talk should be listed in session summary",
         )
 
@@ -1267,6 +1503,40 @@ class TestAttendeeVotingView(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class TestAttendeeVoteLeaderboard(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event("test event")
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.session = talk_testutils.create_test_talk(
+            speaker, self.event, title="Test session"
+        )
+        self.session.publish(Track.objects.create(name="Test track"))
+        user, _ = attendee_testutils.create_test_user("testattendee@example.org")
+        attendee = Attendee.objects.create(user=user, event=self.event)
+        AttendeeVote.objects.create(attendee=attendee, talk=self.session, score=4)
+        self.url = "/{}/voting/leaderboard/".format(self.event.slug)
+
+    def test_requires_staff(self):
+        user, password = attendee_testutils.create_test_user("user@example.org")
+        self.client.login(username=user.email, password=password)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_leaderboard(self):
+        staff, password = attendee_testutils.create_test_user("staff@example.org")
+        staff.is_staff = True
+        staff.save()
+        self.client.login(username=staff.email, password=password)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["event"], self.event.slug)
+        self.assertEqual(len(data["sessions"]), 1)
+        self.assertEqual(data["sessions"][0]["id"], self.session.id)
+        self.assertEqual(data["sessions"][0]["vote_count"], 1)
+        self.assertEqual(data["sessions"][0]["average"], 4.0)
+
+
 class TestAttendeeTalkVote(TestCase):
     def setUp(self):
         self.event = event_testutils.create_test_event("test event")
@@ -1325,6 +1595,8 @@ class TestAttendeeTalkVote(TestCase):
         self.assertJSONEqual(response.content, {"message": "ok"})
         vote.refresh_from_db()
         self.assertEqual(vote.score, 3)
+        tally = self.talk.attendee_vote_tally
+        self.assertEqual((tally.vote_count, tally.score_sum), (1, 3))
 
     def test_voting_closed_disables_view(self):
         self.event.voting_open = False
@@ -1389,6 +1661,107 @@ class TestAttendeeTalkClearVote(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class TestAttendeeTalkBatchVote(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event("test event")
+        self.event.voting_open = True
+        self.event.save()
+        self.speaker, _, _ = speaker_testutils.create_test_speaker()
+        track = Track.objects.create(name="Test track")
+        self.talks = []
+        for title in ("Session A", "Session B"):
+            talk = talk_testutils.create_test_talk(
+                self.speaker, self.event, title=title
+            )
+            talk.publish(track)
+            self.talks.append(talk)
+        self.user, self.password = attendee_testutils.create_test_user(
+            "testattendee@example.org"
+        )
+        self.attendee = Attendee.objects.create(user=self.user, event=self.event)
+        self.url = "/{}/submit-votes/".format(self.event.slug)
+
+    def post_votes(self, votes):
+        return self.client.post(
+            self.url,
+            data=json.dumps({"votes": votes}),
+            content_type="application/json",
+        )
+
+    def test_requires_login(self):
+        response = self.post_votes([])
+        self.assertRedirects(response, "/accounts/login/?next={}".format(self.url))
+
+    def test_requires_post(self):
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 405)
+
+    def test_malformed_body(self):
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.client.post(
+            self.url, data="no json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.post_votes([{"score": 3}])
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TALK_VOTE_BATCH_SIZE=1)
+    def test_too_many_votes(self):
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.post_votes(
+            [{"talk": talk.id, "score": 3} for talk in self.talks]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AttendeeVote.objects.exists())
+
+    def test_votes_are_stored(self):
+        self.talks[0].attendeevote_set.create(attendee=self.attendee, score=1)
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.post_votes(
+            [
+                {"talk": self.talks[0].id, "score": 4},
+                {"talk": str(self.talks[1].id), "score": "5"},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertJSONEqual(response.content, {"message": "ok", "votes": 2})
+        self.assertEqual(
+            dict(self.attendee.attendeevote_set.values_list("talk_id", "score")),
+            {self.talks[0].id: 4, self.talks[1].id: 5},
+        )
+        tally = self.talks[0].attendee_vote_tally
+        self.assertEqual((tally.vote_count, tally.score_sum), (1, 4))
+
+    def test_invalid_votes_store_nothing(self):
+        other_event = event_testutils.create_test_event("other event")
+        other_talk = talk_testutils.create_test_talk(
+            self.speaker, other_event, title="Other session"
+        )
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.post_votes(
+            [
+                {"talk": self.talks[0].id, "score": 4},
+                {"talk": self.talks[1].id, "score": "many"},
+                {"talk": other_talk.id, "score": 3},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["message"], "error")
+        self.assertEqual(
+            set(data["errors"]), {str(self.talks[1].id), str(other_talk.id)}
+        )
+        self.assertFalse(AttendeeVote.objects.exists())
+
+    def test_voting_closed_disables_view(self):
+        self.event.voting_open = False
+        self.event.save()
+        self.client.login(username=self.user.email, password=self.password)
+        response = self.post_votes([{"talk": self.talks[0].id, "score": 3}])
+        self.assertEqual(response.status_code, 404)
+
+
 class TestTalkAddReservation(TestCase):
     def setUp(self):
         now = timezone.now()
@@ -0,0 +1,197 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from attendee.models import Attendee
+from attendee.tests import attendee_testutils
+from event.tests import event_testutils
+from speaker.tests import speaker_testutils
+from talk.models import (
+    AttendeeVote,
+    AttendeeVoteTally,
+    CommitteeTalkStatistics,
+    Track,
+    Vote,
+)
+from talk.tests import talk_testutils
+from talk.voting import (
+    cast_attendee_vote,
+    cast_attendee_votes,
+    cast_committee_votes,
+    clear_attendee_vote,
+    get_attendee_vote_leaderboard,
+    get_attendee_vote_leaderboard_snapshot,
+)
+
+
+def create_attendees(event, count):
+    attendees = []
+    for i in range(count):
+        user, _ = attendee_testutils.create_test_user(
+            "voter{}@example.org".format(i)
+        )
+        attendees.append(Attendee.objects.create(user=user, event=event))
+    return attendees
+
+
+class AttendeeVotingTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        track = Track.objects.create(name="Test track", event=self.event)
+        self.talks = []
+        for title in ("Session A", "Session B"):
+            talk = talk_testutils.create_test_talk(speaker, self.event, title=title)
+            talk.publish(track)
+            self.talks.append(talk)
+        self.attendees = create_attendees(self.event, 3)
+
+    def assertTally(self, talk, vote_count, score_sum, score_square_sum):
+        tally = AttendeeVoteTally.objects.get(talk=talk)
+        self.assertEqual(
+            (tally.vote_count, tally.score_sum, tally.score_square_sum),
+            (vote_count, score_sum, score_square_sum),
+        )
+
+    def test_cast_attendee_vote(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        self.assertTally(self.talks[0], 1, 3, 9)
+        cast_attendee_vote(self.attendees[1], self.talks[0], 5)
+        self.assertTally(self.talks[0], 2, 8, 34)
+        self.assertFalse(AttendeeVoteTally.objects.filter(talk=self.talks[1]).exists())
+
+    def test_cast_attendee_vote_computes_missing_tally(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        AttendeeVoteTally.objects.filter(talk=self.talks[0]).delete()
+        cast_attendee_vote(self.attendees[1], self.talks[0], 5)
+        self.assertTally(self.talks[0], 2, 8, 34)
+
+    def test_cast_attendee_vote_replaces_vote(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        cast_attendee_vote(self.attendees[0], self.talks[0], 1)
+        self.assertTally(self.talks[0], 1, 1, 1)
+        self.assertEqual(
+            AttendeeVote.objects.get(attendee=self.attendees[0]).score, 1
+        )
+
+    def test_cast_attendee_votes(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 2)
+        # one of the tallies is missing and computed from the votes
+        with self.assertNumQueries(12):
+            cast_attendee_votes(
+                self.attendees[0], {self.talks[0].id: 4, self.talks[1].id: 5}
+            )
+        self.assertEqual(
+            dict(
+                AttendeeVote.objects.filter(attendee=self.attendees[0]).values_list(
+                    "talk_id", "score"
+                )
+            ),
+            {self.talks[0].id: 4, self.talks[1].id: 5},
+        )
+        self.assertTally(self.talks[0], 1, 4, 16)
+        self.assertTally(self.talks[1], 1, 5, 25)
+
+    def test_cast_attendee_votes_empty(self):
+        cast_attendee_votes(self.attendees[0], {})
+        self.assertFalse(AttendeeVote.objects.exists())
+
+    def test_clear_attendee_vote(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        cast_attendee_vote(self.attendees[1], self.talks[0], 4)
+        clear_attendee_vote(self.attendees[0], self.talks[0])
+        self.assertTally(self.talks[0], 1, 4, 16)
+        clear_attendee_vote(self.attendees[0], self.talks[0])
+        self.assertTally(self.talks[0], 1, 4, 16)
+
+    def test_saved_votes_refresh_tally(self):
+        vote = AttendeeVote.objects.create(
+            attendee=self.attendees[0], talk=self.talks[0], score=2
+        )
+        self.assertTally(self.talks[0], 1, 2, 4)
+        vote.score = 3
+        vote.save()
+        self.assertTally(self.talks[0], 1, 3, 9)
+        cast_attendee_vote(self.attendees[0], self.talks[0], 4)
+        self.assertTally(self.talks[0], 1, 4, 16)
+
+    def test_average_and_standard_deviation(self):
+        for attendee, score in zip(self.attendees, (2, 4, 4)):
+            cast_attendee_vote(attendee, self.talks[0], score)
+        tally = AttendeeVoteTally.objects.get(talk=self.talks[0])
+        self.assertAlmostEqual(tally.average, 10 / 3)
+        self.assertAlmostEqual(tally.standard_deviation, (8 / 9) ** 0.5)
+        self.assertIsNone(AttendeeVoteTally(talk=self.talks[1]).average)
+
+    def test_get_attendee_vote_leaderboard(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        cast_attendee_vote(self.attendees[0], self.talks[1], 5)
+        cast_attendee_vote(self.attendees[1], self.talks[1], 4)
+        with self.assertNumQueries(1):
+            leaderboard = get_attendee_vote_leaderboard(self.event)
+        self.assertEqual(
+            [(entry["id"], entry["vote_count"]) for entry in leaderboard],
+            [(self.talks[1].id, 2), (self.talks[0].id, 1)],
+        )
+        self.assertEqual(leaderboard[0]["average"], 4.5)
+        self.assertEqual(leaderboard[0]["title"], "Session B")
+
+    def test_get_attendee_vote_leaderboard_snapshot(self):
+        cast_attendee_vote(self.attendees[0], self.talks[0], 3)
+        cache.clear()
+        with mock.patch("devday.utils.caching.cache_enabled", return_value=True):
+            first = get_attendee_vote_leaderboard_snapshot(self.event)
+            cast_attendee_vote(self.attendees[1], self.talks[0], 5)
+            with self.assertNumQueries(0):
+                second = get_attendee_vote_leaderboard_snapshot(self.event)
+        cache.clear()
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["vote_count"], 1)
+
+
+class CommitteeVotingTest(TestCase):
+    def setUp(self):
+        self.event = event_testutils.create_test_event()
+        speaker, _, _ = speaker_testutils.create_test_speaker()
+        self.talks = [
+            talk_testutils.create_test_talk(speaker, self.event, title=title)
+            for title in ("Talk A", "Talk B")
+        ]
+        self.voters = [
+            attendee_testutils.create_test_user("committee{}@example.org".format(i))[0]
+            for i in range(2)
+        ]
+
+    def assertStatistics(self, talk, vote_count, vote_sum):
+        statistics = CommitteeTalkStatistics.objects.get(talk=talk)
+        self.assertEqual(
+            (statistics.vote_count, statistics.vote_sum), (vote_count, vote_sum)
+        )
+
+    def test_cast_committee_votes(self):
+        cast_committee_votes(self.voters[0], {self.talks[0].id: 3})
+        self.assertStatistics(self.talks[0], 1, 3)
+        cast_committee_votes(
+            self.voters[0], {self.talks[0].id: 5, self.talks[1].id: 2}
+        )
+        cast_committee_votes(self.voters[1], {self.talks[0].id: 4})
+        self.assertStatistics(self.talks[0], 2, 9)
+        self.assertStatistics(self.talks[1], 1, 2)
+        self.assertEqual(
+            Vote.objects.get(voter=self.voters[0], talk=self.talks[0]).score, 5
+        )
+
+    def test_cast_committee_votes_computes_missing_statistics(self):
+        cast_committee_votes(self.voters[0], {self.talks[0].id: 3})
+        CommitteeTalkStatistics.objects.filter(talk=self.talks[0]).delete()
+        cast_committee_votes(self.voters[1], {self.talks[0].id: 4})
+        self.assertStatistics(self.talks[0], 2, 7)
+
+    def test_deleted_votes_are_subtracted(self):
+        cast_committee_votes(
+            self.voters[0], {self.talks[0].id: 5, self.talks[1].id: 2}
+        )
+        Vote.objects.filter(voter=self.voters[0], talk=self.talks[1]).delete()
+        self.assertStatistics(self.talks[0], 1, 5)
+        self.assertStatistics(self.talks[1], 0, 0)
@@ -3,7 +3,7 @@ from django.conf.urls import url
 from talk.views import (
     CommitteeSpeakerDetails, CommitteeSubmitTalkComment,
     CommitteeTalkCommentDelete, CommitteeTalkDetails,
-    CommitteeTalkOverview, CommitteeTalkVote,
+    CommitteeTalkOverview, CommitteeTalkBatchVote, CommitteeTalkVote,
     CommitteeTalkVoteClear)
 
 urlpatterns = [
@@ -15,6 +15,8 @@ urlpatterns = [
         name='talk_committee_details'),
     url(r'^talks/(?P<pk>\d+)/comment/$', CommitteeSubmitTalkComment.as_view(),
         name='talk_comment'),
+    url(r'^talks/votes/$', CommitteeTalkBatchVote.as_view(),
+        name='talk_votes'),
     url(r'^talks/(?P<pk>\d+)/vote/$', CommitteeTalkVote.as_view(),
         name='talk_vote'),
     url(r'^talks/(?P<pk>\d+)/vote/clear/$', CommitteeTalkVoteClear.as_view(),
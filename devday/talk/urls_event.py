@@ -2,13 +2,17 @@ from django.conf.urls import url
 from django.views.generic import RedirectView
 
 from talk.views import (
+    AttendeeTalkBatchVote,
     AttendeeTalkClearVote,
     AttendeeTalkFeedback,
     AttendeeTalkVote,
+    AttendeeVoteLeaderboard,
     AttendeeVotingView,
     InfoBeamerXMLView,
     LimitedTalkList,
     RedirectVideoView,
+    ScheduleICalView,
+    ScheduleJSONView,
     TalkAddReservation,
     TalkCancelReservation,
     TalkConfirmReservation,
@@ -29,6 +33,26 @@ urlpatterns = [
         InfoBeamerXMLView.as_view(),
         name="infobeamer",
     ),
+    url(
+        r"^(?P<event>[^/]+)/schedule/(?P<day>\d+|today)\.xml$",
+        InfoBeamerXMLView.as_view(),
+        name="infobeamer_day",
+    ),
+    url(
+        r"^(?P<event>[^/]+)/schedule/(?P<day>\d+|today)\.json$",
+        ScheduleJSONView.as_view(),
+        name="schedule_json_day",
+    ),
+    url(
+        r"^(?P<event>[^/]+)/schedule\.json$",
+        ScheduleJSONView.as_view(),
+        name="schedule_json",
+    ),
+    url(
+        r"^(?P<event>[^/]+)/schedule\.ics$",
+        ScheduleICalView.as_view(),
+        name="schedule_ical",
+    ),
     url(r"^videos/$", RedirectVideoView.as_view()),
     url(
         r"^(?P<event>[^/]+)/talk-preview/$",
@@ -97,6 +121,11 @@ urlpatterns = [
         AttendeeVotingView.as_view(),
         name="attendee_voting",
     ),
+    url(
+        r"^(?P<event>[^/]+)/voting/leaderboard/$",
+        AttendeeVoteLeaderboard.as_view(),
+        name="attendee_vote_leaderboard",
+    ),
     url(
         r"^(?P<event>[^/]+)/clear-vote/$",
         AttendeeTalkClearVote.as_view(),
@@ -107,6 +136,11 @@ urlpatterns = [
         AttendeeTalkVote.as_view(),
         name="attendee_vote_change",
     ),
+    url(
+        r"^(?P<event>[^/]+)/submit-votes/$",
+        AttendeeTalkBatchVote.as_view(),
+        name="attendee_votes_submit",
+    ),
     url(
         r"^(?P<event>[^/]+)/session-feedback-summary/$",
         AttendeeTalkFeedbackSummary.as_view(),
@@ -1,8 +1,6 @@
-import csv
+import json
 import logging
-import xml.etree.ElementTree as ElementTree
-from datetime import date, timedelta
-from io import StringIO
+from datetime import date, datetime, time
 
 from django.conf import settings
 from django.contrib import messages
@@ -11,9 +9,17 @@ from django.contrib.auth.mixins import AccessMixin, PermissionRequiredMixin
 from django.contrib.sites.shortcuts import get_current_site
 from django.core import signing
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import send_mail
-from django.db.models import Avg, Count, F, Max, Min, Prefetch, Sum
-from django.db.transaction import atomic
+from django.core.mail import EmailMessage
+from django.db.models import (
+    Avg,
+    Count,
+    F,
+    FloatField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.http import (
     Http404,
     HttpResponse,
@@ -37,14 +43,18 @@ from django.views.generic.edit import (
     ModelFormMixin,
     UpdateView,
 )
-from django.views.generic.list import BaseListView
 
 from attendee.forms import DevDayRegistrationForm
 from attendee.models import Attendee
 from attendee.views import AttendeeRequiredMixin, StaffUserMixin
+from devday.utils.csv_export import StreamingCSVView
+from devday.utils.mail_queue import queue_mail
 from event.models import Event
+from event.views import EventContentConditionalMixin
 from speaker.models import Speaker
 from talk import signals
+from talk.export import get_session_summary, iterate_in_chunks
+from talk.feeds import get_schedule_feed
 from talk.forms import (
     AttendeeTalkFeedbackForm,
     AttendeeTalkVoteForm,
@@ -58,21 +68,31 @@ from talk.forms import (
 from talk.models import (
     AttendeeFeedback,
     AttendeeVote,
-    Room,
+    CommitteeTalkStatistics,
     SessionReservation,
     Talk,
     TalkComment,
-    TalkSlot,
     TimeSlot,
     Vote,
 )
-from talk.reservation import get_reservation_email_context
+from talk.reservation import (
+    cancel_reservation,
+    confirm_reservation,
+    get_reservation_email_context,
+)
+from talk.schedule import get_schedule
+from talk.voting import (
+    cast_attendee_vote,
+    cast_attendee_votes,
+    cast_committee_votes,
+    clear_attendee_vote,
+    get_attendee_vote_leaderboard_snapshot,
+)
 
 logger = logging.getLogger("talk")
 
 User = get_user_model()
 
-XML_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
 
 
 class PrepareSubmitSessionView(FormView):
@@ -175,7 +195,7 @@ class CommitteeRequiredMixin(PermissionRequiredMixin):
     permission_required = ("talk.add_vote", "talk.add_talkcomment")
 
 
-class TalkDetails(DetailView):
+class TalkDetails(EventContentConditionalMixin, DetailView):
     model = Talk
     slug_url_kwarg = "slug"
     slug_field = "slug"
@@ -228,40 +248,28 @@ class CommitteeTalkOverview(CommitteeRequiredMixin, ListView):
     template_name_suffix = "_committee_overview"
 
     ORDER_MAP = {
-        "speaker": "draft_speakers__name",
+        "title": "title",
+        "speaker": "draft_speaker_label",
         "score": "average_score",
         "score_sum": "vote_sum",
     }
 
     def get_queryset(self):
-        qs = (
+        qs = CommitteeTalkStatistics.objects.annotate_talks(
             super(CommitteeTalkOverview, self)
             .get_queryset()
             .filter(event=Event.objects.current_event())
-            .annotate(
-                average_score=Avg("vote__score"),
-                vote_sum=Sum("vote__score"),
-                vote_count=Count("vote__id"),
-            )
-            .order_by("title")
+            .prefetch_related("draft_speakers", "talkformat")
+        )
+        sort_order = CommitteeTalkOverview.ORDER_MAP.get(
+            self.request.GET.get("sort_order"), "title"
         )
-        sort_order = self.request.GET.get("sort_order", "title")
-        sort_order = CommitteeTalkOverview.ORDER_MAP.get(sort_order, sort_order)
         if self.request.GET.get("sort_dir") == "desc":
-            sort_order = "-{}".format(sort_order)
-        return qs.order_by(sort_order)
+            return qs.order_by(F(sort_order).desc(nulls_last=True), "title")
+        return qs.order_by(F(sort_order).asc(nulls_last=True), "title")
 
     def get_context_data(self, **kwargs):
         context = super(CommitteeTalkOverview, self).get_context_data(**kwargs)
-        talk_list = context["talk_list"]
-        for item in (
-            Talk.objects.values("id")
-            .annotate(comment_count=Count("talkcomment__id"))
-            .all()
-        ):
-            for talk in talk_list:
-                if item["id"] == talk.id:
-                    setattr(talk, "comment_count", item["comment_count"])
         context.update(
             {
                 "sort_order": self.request.GET.get("sort_order", "title"),
@@ -276,7 +284,7 @@ class CommitteeSpeakerDetails(CommitteeRequiredMixin, DetailView):
     template_name = "talk/speaker_details.html"
 
 
-class TalkListView(ListView):
+class TalkListView(EventContentConditionalMixin, ListView):
     model = Talk
 
     def dispatch(self, request, *args, **kwargs):
@@ -300,112 +308,8 @@ class TalkListView(ListView):
         return qs.order_by("title")
 
     def get_context_data_for_grid(self, context, **kwargs):
-        all_talks = context.get("talk_list", [])
-        time_slots = list(
-            TimeSlot.objects.filter(event=self.event).order_by(
-                "block", "start_time", "end_time"
-            )
-        )
-        talk_slots = list(
-            TalkSlot.objects.filter(talk__event=self.event)
-            .select_related("talk", "room", "time", "talk__event")
-            .order_by("time__start_time")
-        )
-
-        rooms = list(Room.objects.for_event(self.event))
-
-        blocks = {}
-
-        # assign time slots to blocks
-        for time_slot in time_slots:
-            block = blocks.setdefault(
-                time_slot.block, {"time_slots": [], "rooms": set()}
-            )
-            time_talk_slots = [
-                (talk_slot.room_id, talk_slot.talk)
-                for talk_slot in talk_slots
-                if talk_slot.time_id == time_slot.id
-            ]
-            block["time_slots"].append((time_slot, time_talk_slots, []))
-            block["rooms"] |= {
-                talk_slot_tuple[0] for talk_slot_tuple in time_talk_slots
-            }
-
-        # sort talks into ordered rooms
-        for block in blocks.values():
-            block["rooms"] = [room for room in rooms if room.id in block["rooms"]]
-            grouped_talks = {}
-            for time_slot, time_talk_slots, overlaps in block["time_slots"]:
-                grouped_talks.setdefault(
-                    time_slot, {"room_talks": {}, "attributes": {}}
-                )
-                for room_id, talk in time_talk_slots:
-                    room_talks = grouped_talks[time_slot]["room_talks"]
-                    for room in block["rooms"]:
-                        if room.id == room_id:
-                            room_talks.setdefault(room, []).append(talk)
-
-            # calculate overlaps
-            time_slot_count = len(block["time_slots"])
-            for index1 in range(time_slot_count):
-                time_slot1, time_talk_slots1, overlaps1 = block["time_slots"][index1]
-                for index2 in range(time_slot_count):
-                    time_slot2, time_talk_slots2, overlaps2 = block["time_slots"][
-                        index2
-                    ]
-                    if (
-                        time_slot1 != time_slot2
-                        and time_slot1.start_time >= time_slot2.start_time
-                        and time_slot1.end_time <= time_slot2.end_time
-                    ):
-                        overlaps2.append(index1)
-                        overlaps1.append(index2)
-
-            schedule = []
-            scheduled_times = {}
-            row = 0
-
-            # calculate column and row spans
-            for time_slot, time_talk_slots, overlaps in block["time_slots"]:
-                attributes = grouped_talks[time_slot]["attributes"]
-                if len(overlaps) > 1:
-                    attributes["rowspan"] = len(overlaps)
-                elif len(overlaps) == 1:
-                    attributes["colspan"] = len(block["rooms"]) - 1
-                if time_slot.start_time not in scheduled_times:
-                    scheduled_times[time_slot.start_time] = row
-                    index = row
-                    row += 1
-                else:
-                    index = scheduled_times[time_slot.start_time]
-                if len(schedule) - 1 < index:
-                    schedule_row = {
-                        "time_slots": [[time_slot, attributes]],
-                        "room_talks": {},
-                    }
-                    schedule.append(schedule_row)
-                else:
-                    schedule[index]["time_slots"].append([time_slot, attributes])
-                for room in block["rooms"]:
-                    if room in grouped_talks[time_slot]["room_talks"]:
-                        schedule[index]["room_talks"].setdefault(room, []).extend(
-                            [
-                                time_slot,
-                                grouped_talks[time_slot]["room_talks"][room],
-                                attributes,
-                            ]
-                        )
-                block["schedule"] = schedule
-
-        unscheduled = []
-        for talk in all_talks:
-            try:
-                talk.talkslot.time
-            except TalkSlot.DoesNotExist:
-                unscheduled.append(talk)
-        context.update(
-            {"event": self.event, "unscheduled": unscheduled, "blocks": blocks}
-        )
+        context["event"] = self.event
+        context.update(get_schedule(self.event))
         if (
             self.request.user.is_authenticated
             and Attendee.objects.filter(
@@ -461,7 +365,7 @@ class TalkListPreviewView(ListView):
         return context
 
 
-class TalkVideoView(ListView):
+class TalkVideoView(EventContentConditionalMixin, ListView):
     model = Talk
     template_name_suffix = "_videos"
     event = None
@@ -485,132 +389,86 @@ class TalkVideoView(ListView):
         return context
 
 
-class InfoBeamerXMLView(BaseListView):
-    model = Talk
+class BaseScheduleFeedView(View):
+    feed_format = None
+    content_type = None
+
+    # noinspection PyUnusedLocal
+    def get(self, request, *args, **kwargs):
+        try:
+            offset_hours = int(request.GET.get("offsethours", "0"))
+        except ValueError:
+            return HttpResponseBadRequest()
+        max_offset_hours = settings.TALK_SCHEDULE_FEED_MAX_OFFSET_HOURS
+        offset_hours = max(-max_offset_hours, min(offset_hours, max_offset_hours))
+        versions = self.content_versions or self.get_content_versions()
+        content = get_schedule_feed(
+            self.event,
+            versions[0].version,
+            self.feed_format,
+            start_today="starttoday" in request.GET,
+            offset_hours=offset_hours,
+            day=self.kwargs.get("day"),
+        )
+        if content is None:
+            raise Http404()
+        return HttpResponse(content=content, content_type=self.content_type)
+
+
+class ScheduleFeedView(EventContentConditionalMixin, BaseScheduleFeedView):
+    """
+    Serve the pre-rendered schedule of an event or of one of its days. The
+    day is given by its index or as "today". The starttoday query parameter
+    moves the schedule to today and offsethours moves it by the given number
+    of hours, at most TALK_SCHEDULE_FEED_MAX_OFFSET_HOURS in either direction.
+    """
+
+    content_etag_weak = False
+    content_includes_site_content = False
+    event = None
 
     def dispatch(self, request, *args, **kwargs):
-        event = self.kwargs.get("event")
-        if not event:
-            return HttpResponseRedirect(
-                "/{}/schedule.xml".format(Event.objects.current_event().slug)
+        self.event = get_object_or_404(Event, slug=self.kwargs.get("event"))
+        return super().dispatch(request, *args, **kwargs)
+
+    def depends_on_date(self):
+        return "starttoday" in self.request.GET or self.kwargs.get("day") == "today"
+
+    def get_content_etag_parts(self):
+        parts = super().get_content_etag_parts()
+        if self.depends_on_date():
+            parts.append(date.today())
+        return parts
+
+    def get_content_timestamps(self):
+        timestamps = super().get_content_timestamps()
+        if self.depends_on_date():
+            timestamps.append(
+                timezone.make_aware(datetime.combine(date.today(), time()))
             )
-        return super(InfoBeamerXMLView, self).dispatch(request, *args, **kwargs)
+        return timestamps
 
-    def recalculate_timestamp(self, timestamp, context):
-        if "starttoday" in self.request.GET:
-            start_time = context.get("min_time")
-            delta = date.today() - start_time.date()
-        else:
-            delta = timedelta()
-        delta += timedelta(hours=int(self.request.GET.get("offsethours", "0")))
-        local_time = timezone.localtime(
-            timestamp + delta, timezone.get_default_timezone()
-        )
-        return local_time
 
-    def to_xml_timestamp(self, timestamp, context):
-        formatted = self.recalculate_timestamp(timestamp, context).strftime(
-            XML_TIMESTAMP_FORMAT
-        )
-        return "%s:%s" % (formatted[:-2], formatted[-2:])
+class InfoBeamerXMLView(ScheduleFeedView):
+    feed_format = "xml"
+    content_type = "application/xml"
 
-    def to_xml_localtime(self, timestamp, context):
-        return self.recalculate_timestamp(timestamp, context).strftime("%H:%M")
+    def dispatch(self, request, *args, **kwargs):
+        if not self.kwargs.get("event"):
+            return HttpResponseRedirect(
+                "/{}/schedule.xml".format(Event.objects.current_event().slug)
+            )
+        return super().dispatch(request, *args, **kwargs)
 
-    def to_xml_date(self, timestamp, context):
-        return self.recalculate_timestamp(timestamp, context).strftime("%Y-%m-%d")
 
-    def get_queryset(self):
-        event = get_object_or_404(Event, slug=self.kwargs.get("event"))
-        return (
-            super(InfoBeamerXMLView, self)
-            .get_queryset()
-            .filter(track__isnull=False, event=event, talkslot__time__event=event)
-            .select_related("track", "talkslot", "talkslot__time", "talkslot__room")
-            .order_by("talkslot__time__start_time", "talkslot__room__name")
-        )
+class ScheduleJSONView(ScheduleFeedView):
+    feed_format = "json"
+    content_type = "application/json"
 
-    def get_context_data(self, **kwargs):
-        context = super(InfoBeamerXMLView, self).get_context_data(**kwargs)
-        event = get_object_or_404(Event, slug=self.kwargs.get("event"))
-        time_slots = TimeSlot.objects.filter(event=event)
-        if not time_slots.exists():
-            raise Http404()
-        time_range = time_slots.aggregate(Min("start_time"), Max("end_time"))
-        context["min_time"] = time_range["start_time__min"]
-        context["max_time"] = time_range["end_time__max"]
-        talks = context.get("talk_list", [])
-        talks_by_room_and_time = {}
-        for talk in talks:
-            # build dictionary grouped by room and time (sm and xs display)
-            talks_by_room_and_time.setdefault(talk.talkslot.room, []).append(talk)
-        context.update(
-            {
-                "event": event,
-                "talks_by_room_and_time": talks_by_room_and_time,
-                "rooms": event.room_set.all(),
-                "times": time_slots,
-            }
-        )
-        return context
 
-    def render_to_response(self, context, **response_kwargs):
-        event = context.get("event")
-        schedule_xml = ElementTree.Element("schedule")
-        # TODO: use event argument and render proper event title
-        ElementTree.SubElement(schedule_xml, "version").text = event.title
-        conference = ElementTree.SubElement(schedule_xml, "conference")
-        ElementTree.SubElement(conference, "acronym").text = "DevDay"
-        ElementTree.SubElement(conference, "title").text = event.title
-        ElementTree.SubElement(conference, "start").text = self.to_xml_date(
-            event.start_time, context
-        )
-        ElementTree.SubElement(conference, "end").text = self.to_xml_date(
-            event.end_time, context
-        )
-        ElementTree.SubElement(conference, "days").text = "1"  # FIXME compute days
-        ElementTree.SubElement(conference, "timeslot_duration").text = "00:15"
-        day_xml = ElementTree.SubElement(
-            schedule_xml,
-            "day",
-            index="1",
-            date=self.to_xml_date(context["min_time"], context),
-            start=self.to_xml_timestamp(context["min_time"], context),
-            end=self.to_xml_timestamp(context["max_time"], context),
-        )
-        room_talks = context["talks_by_room_and_time"]
-        for room in room_talks:
-            room_xml = ElementTree.SubElement(day_xml, "room", name=room.name)
-            for talk in room_talks[room]:
-                event_xml = ElementTree.SubElement(
-                    room_xml, "event", guid=str(talk.pk), id=str(talk.pk)
-                )
-                start_time = talk.talkslot.time.start_time
-                duration = talk.talkslot.time.end_time - start_time
-                ElementTree.SubElement(event_xml, "date").text = self.to_xml_timestamp(
-                    start_time, context
-                )
-                ElementTree.SubElement(event_xml, "start").text = self.to_xml_localtime(
-                    start_time, context
-                )
-                ElementTree.SubElement(event_xml, "duration").text = "%02d:%02d" % (
-                    duration.seconds / 3600,
-                    duration.seconds % 3600 / 60,
-                )
-                ElementTree.SubElement(event_xml, "room").text = room.name
-                ElementTree.SubElement(event_xml, "title").text = talk.title
-                ElementTree.SubElement(event_xml, "abstract").text = talk.abstract
-                ElementTree.SubElement(event_xml, "language").text = "de"
-                persons_xml = ElementTree.SubElement(event_xml, "persons")
-                for speaker in talk.published_speakers.all():
-                    ElementTree.SubElement(
-                        persons_xml, "person", id=str(speaker.slug)
-                    ).text = speaker.name
-
-        response_kwargs.setdefault("content_type", "application/xml")
-        return HttpResponse(
-            content=ElementTree.tostring(schedule_xml, "utf-8"), **response_kwargs
-        )
+class ScheduleICalView(ScheduleFeedView):
+    feed_format = "ical"
+    content_type = "text/calendar; charset=utf-8"
 
 
 class CommitteeTalkDetails(CommitteeRequiredMixin, DetailView):
@@ -618,11 +476,8 @@ class CommitteeTalkDetails(CommitteeRequiredMixin, DetailView):
     template_name_suffix = "_committee_details"
 
     def get_queryset(self):
-        return (
-            super(CommitteeTalkDetails, self)
-            .get_queryset()
-            .prefetch_related()
-            .annotate(average_score=Avg("vote__score"))
+        return CommitteeTalkStatistics.objects.annotate_talks(
+            super(CommitteeTalkDetails, self).get_queryset()
         )
 
     def get_context_data(self, **kwargs):
@@ -686,11 +541,13 @@ class CommitteeSubmitTalkComment(CommitteeRequiredMixin, SingleObjectMixin, Form
         # send email to speaker if comment is visible
         if self.talk_comment.is_visible:
             recipients = [speaker.user.email for speaker in talk.draft_speakers.all()]
-            send_mail(
-                self.get_email_subject(),
-                self.get_email_text_body(),
-                settings.DEFAULT_FROM_EMAIL,
-                recipients,
+            queue_mail(
+                EmailMessage(
+                    self.get_email_subject(),
+                    self.get_email_text_body(),
+                    settings.DEFAULT_FROM_EMAIL,
+                    recipients,
+                )
             )
         return super(CommitteeSubmitTalkComment, self).form_valid(form)
 
@@ -735,6 +592,69 @@ class CommitteeTalkVoteClear(CommitteeRequiredMixin, SingleObjectMixin, View):
         return JsonResponse({"message": "vote deleted"})
 
 
+class BatchVoteMixin(object):
+    """
+    Mixin for views that accept a JSON body with a list of votes like
+    {"votes": [{"talk": 1, "score": 3}, ...]}. All votes are validated before
+    any of them is stored. The talks are checked with one query.
+
+    Views set talk_queryset to the talks that can be voted for, which are
+    limited to the event returned by get_event, and vote_function to the
+    function that stores the votes. It is called with the voter returned by
+    get_voter and a dictionary of talk ids and scores.
+    """
+
+    http_method_names = ["post"]
+    vote_form_class = None
+    talk_queryset = Talk.objects.all()
+    vote_function = None
+
+    def get_event(self):
+        return Event.objects.current_event()
+
+    def get_voter(self):
+        return self.request.user
+
+    def get_votes(self):
+        """
+        Return a dictionary of talk ids and scores from the request body or
+        None if the body is malformed.
+        """
+        try:
+            votes = json.loads(self.request.body.decode("utf-8"))["votes"]
+            return {int(vote["talk"]): vote["score"] for vote in votes}
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    # noinspection PyUnusedLocal
+    def post(self, request, *args, **kwargs):
+        votes = self.get_votes()
+        if votes is None or len(votes) > settings.TALK_VOTE_BATCH_SIZE:
+            return HttpResponseBadRequest()
+        talks = self.talk_queryset.filter(event=self.get_event(), id__in=votes)
+        talk_ids = set(talks.values_list("id", flat=True))
+        scores = {}
+        errors = {}
+        for talk_id, score in votes.items():
+            if talk_id not in talk_ids:
+                errors[talk_id] = [_("Unknown session")]
+                continue
+            form = self.vote_form_class(data={"score": score})
+            if form.is_valid():
+                scores[talk_id] = form.cleaned_data["score"]
+            else:
+                errors[talk_id] = form.errors["score"]
+        if errors:
+            return JsonResponse({"message": "error", "errors": errors})
+        self.vote_function(self.get_voter(), scores)
+        return JsonResponse({"message": "ok", "votes": len(scores)})
+
+
+class CommitteeTalkBatchVote(CommitteeRequiredMixin, BatchVoteMixin, View):
+    vote_form_class = TalkVoteForm
+    vote_function = staticmethod(cast_committee_votes)
+
+
 class CommitteeTalkCommentDelete(CommitteeRequiredMixin, SingleObjectMixin, View):
     model = TalkComment
     http_method_names = ["post"]
@@ -837,64 +757,47 @@ class RedirectVideoView(RedirectView):
         )
 
 
-class EventSessionSummaryView(StaffUserMixin, BaseListView):
+class EventSessionSummaryView(StaffUserMixin, StreamingCSVView):
     model = Talk
+    csv_filename = "session-summary.csv"
+    csv_header = (
+        "Speaker",
+        "Organizations",
+        "Title",
+        "Abstract",
+        "Remarks",
+        "Formats",
+        "Avg. Score",
+        "Total Score",
+        "Comments",
+    )
 
     def get_queryset(self):
-        return (
-            super()
-            .get_queryset()
-            .filter(event=Event.objects.current_event())
-            .order_by("title")
+        return get_session_summary(Event.objects.current_event()).order_by(
+            "title", "pk"
         )
 
-    def render_to_response(self, context):
-        output = StringIO()
-        try:
-            writer = csv.writer(output, delimiter=";")
-            writer.writerow(
-                (
-                    "Speaker",
-                    "Organizations",
-                    "Title",
-                    "Abstract",
-                    "Remarks",
-                    "Formats",
-                    "Avg. Score",
-                    "Total Score",
-                    "Comments",
-                )
-            )
-            writer.writerows(
+    def get_rows(self, queryset):
+        return iterate_in_chunks(queryset, self.chunk_size)
+
+    def format_row(self, t):
+        speakers = t.draft_speakers.all()
+        return [
+            ", ".join([speaker.name for speaker in speakers]),
+            ", ".join([speaker.organization for speaker in speakers]),
+            t.title,
+            t.abstract,
+            t.remarks,
+            ", ".join([str(f) for f in t.talkformat.all()]),
+            t.avg_score,
+            t.total_score,
+            "\n".join(
                 [
-                    [
-                        ", ".join([speaker.name for speaker in t.draft_speakers.all()]),
-                        ", ".join(
-                            [speaker.organization for speaker in t.draft_speakers.all()]
-                        ),
-                        t.title,
-                        t.abstract,
-                        t.remarks,
-                        ", ".join([str(f) for f in t.talkformat.all()]),
-                        t.vote_set.aggregate(Avg("score"))["score__avg"],
-                        t.vote_set.aggregate(Sum("score"))["score__sum"],
-                        "\n".join(
-                            [
-                                "%s: %s (%s)" % (c.commenter, c.comment, c.modified)
-                                for c in t.talkcomment_set.order_by("modified").all()
-                            ]
-                        ),
-                    ]
-                    for t in context.get("object_list", [])
+                    "%s: %s (%s)" % (c.commenter, c.comment, c.modified)
+                    for c in t.summary_comments
                 ]
-            )
-            response = HttpResponse(
-                output.getvalue(), content_type="txt/csv; charset=utf-8"
-            )
-            response["Content-Disposition"] = "attachment; filename=session-summary.csv"
-            return response
-        finally:
-            output.close()
+            ),
+        ]
 
 
 class AttendeeVotingView(AttendeeRequiredMixin, ListView):
@@ -912,27 +815,45 @@ class AttendeeVotingView(AttendeeRequiredMixin, ListView):
             .get_queryset()
             .filter(track__isnull=False, event=self.event)
             .select_related("track")
-            .prefetch_related()
+            .annotate(
+                score=Coalesce(
+                    Subquery(
+                        AttendeeVote.objects.filter(
+                            attendee=self.attendee, talk=OuterRef("pk")
+                        ).values("score")
+                    ),
+                    0,
+                )
+            )
         )
         if self.request.user.is_staff:
             qs = qs.annotate(
-                vote_count=Count("attendeevote"),
-                vote_average=Avg("attendeevote__score"),
+                vote_count=Coalesce("attendee_vote_tally__vote_count", 0),
+                vote_average=Cast("attendee_vote_tally__score_sum", FloatField())
+                / Cast(NullIf("attendee_vote_tally__vote_count", 0), FloatField()),
             )
         return qs.order_by("title")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["event"] = self.event
-        attendee_scores = self.attendee.attendeevote_set.all()
-        scores = {talk.pk: 0 for talk in context["talk_list"]}
-        for score in attendee_scores:
-            scores[score.talk_id] = score.score
-        for talk in context["talk_list"]:
-            setattr(talk, "score", scores[talk.id])
         return context
 
 
+class AttendeeVoteLeaderboard(StaffUserMixin, View):
+    http_method_names = ["get"]
+
+    # noinspection PyUnusedLocal
+    def get(self, request, *args, **kwargs):
+        event = get_object_or_404(Event, slug=kwargs["event"])
+        return JsonResponse(
+            {
+                "event": event.slug,
+                "sessions": get_attendee_vote_leaderboard_snapshot(event),
+            }
+        )
+
+
 class AttendeeTalkVote(AttendeeRequiredMixin, BaseFormView):
     model = Talk
     http_method_names = ["post"]
@@ -956,19 +877,31 @@ class AttendeeTalkVote(AttendeeRequiredMixin, BaseFormView):
         return JsonResponse({"message": "error", "errors": form.errors})
 
     def form_valid(self, form):
-        score = form.cleaned_data["score"]
-        AttendeeVote.objects.upsert(
-            conflict_target=["attendee", "talk"],
-            fields={"attendee": self.attendee, "score": score, "talk": self.talk},
-        )
+        cast_attendee_vote(self.attendee, self.talk, form.cleaned_data["score"])
         return JsonResponse({"message": "ok"})
 
 
+class AttendeeTalkBatchVote(AttendeeRequiredMixin, BatchVoteMixin, View):
+    vote_form_class = AttendeeTalkVoteForm
+    talk_queryset = Talk.objects.filter(track__isnull=False)
+    vote_function = staticmethod(cast_attendee_votes)
+
+    def post(self, request, *args, **kwargs):
+        if not self.event.voting_open:
+            raise Http404()
+        return super().post(request, *args, **kwargs)
+
+    def get_event(self):
+        return self.event
+
+    def get_voter(self):
+        return self.attendee
+
+
 class AttendeeTalkClearVote(AttendeeRequiredMixin, View):
     model = Talk
     http_method_names = ["post"]
 
-    @atomic
     def post(self, request, *args, **kwargs):
         if not self.event.voting_open:
             raise Http404()
@@ -980,7 +913,7 @@ class AttendeeTalkClearVote(AttendeeRequiredMixin, View):
             event=self.event,
             track__isnull=False,
         )
-        talk.attendeevote_set.filter(attendee=self.attendee).delete()
+        clear_attendee_vote(self.attendee, talk)
         return JsonResponse({"message": "vote deleted"})
 
 
@@ -1157,7 +1090,7 @@ class TalkCancelReservation(AttendeeRequiredMixin, DeleteView):
             sender=self.__class__, reservation=self.object, request=self.request
         )
         success_url = self.get_success_url()
-        self.object.delete()
+        cancel_reservation(self.object)
         return HttpResponseRedirect(success_url)
 
 
@@ -1188,17 +1121,8 @@ class TalkConfirmReservation(AttendeeRequiredMixin, TemplateView):
         self.reservation = self.validate_key(kwargs.get("confirmation_key"))
         if self.reservation.attendee.user != self.request.user:
             raise ConfirmationError(self.WRONG_USER, code="wrong_user")
-        if (
-            self.reservation.talk.spots
-            <= SessionReservation.objects.filter(
-                is_confirmed=True, talk_id=self.reservation.talk_id
-            ).count()
-        ):
-            self.reservation.is_waiting = True
-            self.reservation.save()
+        if not confirm_reservation(self.reservation):
             raise ConfirmationError(self.OVERBOOKED, code="overbooked")
-        self.reservation.is_confirmed = True
-        self.reservation.save()
 
     def validate_key(self, confirmation_key):
         try:
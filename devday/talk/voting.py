@@ -0,0 +1,177 @@
+"""
+Attendee and committee votes and their running tallies.
+
+Every talk has a tally of the number of attendee votes, the sum of their
+scores and the sum of their squared scores that is updated in the same
+transaction as the votes. Averages, standard deviations and rankings are
+computed from the tallies without aggregating the votes.
+
+Votes of one attendee are serialized by locking the attendee row, so the
+previous score of a vote that is replaced is known exactly. Votes of different
+attendees only update the tallies with relative F expressions and do not block
+each other. Committee votes are handled the same way with the user row of the
+voter and the committee statistics of the talks.
+
+Many votes of one voter are stored with one multi-row upsert, which does not
+send signals, so the counters are updated here for all talks at once.
+
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from attendee.models import Attendee
+from devday.utils import caching
+from talk.models import (
+    AttendeeVote,
+    AttendeeVoteTally,
+    CommitteeTalkStatistics,
+    Vote,
+)
+
+User = get_user_model()
+
+
+def leaderboard_cache_namespace(event_id):
+    return "talk:attendee_votes:{}".format(event_id)
+
+
+def _lock_attendee(attendee_id):
+    return Attendee.objects.select_for_update().only("id").get(pk=attendee_id)
+
+
+def _lock_user(user_id):
+    return User.objects.select_for_update().only("id").get(pk=user_id)
+
+
+def _upsert_votes(model, voter_field, voter, scores):
+    """
+    Store the given dictionary of talk ids and scores as votes of the given
+    model for the given voter and return a dictionary of the talk ids and
+    previous scores of the votes that have been replaced.
+    """
+    if not scores:
+        return {}
+    previous_scores = dict(
+        model.objects.filter(**{voter_field: voter}, talk_id__in=scores).values_list(
+            "talk_id", "score"
+        )
+    )
+    model.objects.bulk_upsert(
+        conflict_target=[voter_field, "talk"],
+        rows=[
+            {voter_field: voter, "talk_id": talk_id, "score": score}
+            for talk_id, score in scores.items()
+        ],
+    )
+    return previous_scores
+
+
+def cast_attendee_votes(attendee, scores):
+    """
+    Store the scores in the given dictionary of talk ids and scores as votes
+    of the given attendee, replacing previous votes of the attendee for the
+    talks, and update the tallies of the talks.
+    """
+    with transaction.atomic():
+        _lock_attendee(attendee.id)
+        previous_scores = _upsert_votes(AttendeeVote, "attendee", attendee, scores)
+        deltas = {}
+        for talk_id, score in scores.items():
+            previous_score = previous_scores.get(talk_id)
+            deltas[talk_id] = {
+                "vote_count": int(previous_score is None),
+                "score_sum": score - (previous_score or 0),
+                "score_square_sum": score ** 2 - (previous_score or 0) ** 2,
+            }
+        AttendeeVoteTally.objects.add_many(deltas)
+
+
+def cast_attendee_vote(attendee, talk, score):
+    """
+    Store the score of the given attendee for the given talk, replacing a
+    previous vote of the attendee for the talk, and update the tally of the
+    talk.
+    """
+    cast_attendee_votes(attendee, {talk.id: score})
+
+
+def cast_committee_votes(voter, scores):
+    """
+    Store the scores in the given dictionary of talk ids and scores as
+    committee votes of the given user, replacing previous votes of the user
+    for the talks, and update the committee statistics of the talks.
+    """
+    with transaction.atomic():
+        _lock_user(voter.id)
+        previous_scores = _upsert_votes(Vote, "voter", voter, scores)
+        CommitteeTalkStatistics.objects.add_many(
+            {
+                talk_id: {
+                    "vote_count": int(talk_id not in previous_scores),
+                    "vote_sum": score - previous_scores.get(talk_id, 0),
+                }
+                for talk_id, score in scores.items()
+            }
+        )
+
+
+def clear_attendee_vote(attendee, talk):
+    """
+    Delete the vote of the given attendee for the given talk. The tally is
+    updated by the receiver of deleted votes.
+    """
+    with transaction.atomic():
+        _lock_attendee(attendee.id)
+        AttendeeVote.objects.filter(attendee=attendee, talk=talk).delete()
+
+
+def get_attendee_vote_leaderboard(event):
+    """
+    Return the voted sessions of the given event ordered by their average
+    score, number of votes and title. Every entry is a dictionary with the id,
+    title, speakers, vote_count, average and standard_deviation of the
+    session.
+    """
+    tallies = (
+        AttendeeVoteTally.objects.filter(
+            talk__event=event, talk__track__isnull=False, vote_count__gt=0
+        )
+        .select_related("talk")
+        .only(
+            "vote_count",
+            "score_sum",
+            "score_square_sum",
+            "talk__title",
+            "talk__published_speaker_label",
+        )
+    )
+    leaderboard = [
+        {
+            "id": tally.talk_id,
+            "title": tally.talk.title,
+            "speakers": tally.talk.published_speaker_label,
+            "vote_count": tally.vote_count,
+            "average": tally.average,
+            "standard_deviation": tally.standard_deviation,
+        }
+        for tally in tallies
+    ]
+    leaderboard.sort(
+        key=lambda entry: (-entry["average"], -entry["vote_count"], entry["title"])
+    )
+    return leaderboard
+
+
+def get_attendee_vote_leaderboard_snapshot(event):
+    """
+    Return the attendee vote leaderboard of the given event. The leaderboard
+    is shared for TALK_ATTENDEE_VOTE_LEADERBOARD_CACHE_TIMEOUT seconds, so
+    many clients polling it during open voting cause one query at a time.
+    """
+    return caching.get_or_build(
+        leaderboard_cache_namespace(event.id),
+        lambda: get_attendee_vote_leaderboard(event),
+        settings.TALK_ATTENDEE_VOTE_LEADERBOARD_CACHE_TIMEOUT,
+        name="leaderboard",
+    )